@@ -0,0 +1,132 @@
+"""
+Measure how much parsing large upstream responses stalls the event loop,
+parsing inline and in the thread and process parse executors.
+
+Usage:
+    python -m benchmarks.bench_parsing [--cities 20000] [--responses 8]
+
+While the responses are parsed, a probe coroutine asks to be woken up every
+millisecond; how late it wakes up is the event loop lag other requests see.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from unittest.mock import patch
+
+os.environ.setdefault("OPEN_WEATHER_API_KEY", "benchmark")
+
+from weather_data_fetcher_service.core import settings  # noqa: E402
+from weather_data_fetcher_service.core.constants import (  # noqa: E402
+    WeatherAPIConstants,
+)
+from weather_data_fetcher_service.services.open_weather_api_service import (  # noqa: E402
+    OpenWeatherAPIService,
+)
+from weather_data_fetcher_service.services.response_parsing import (  # noqa: E402
+    get_parse_executor,
+    project_city_list,
+    shutdown_parse_executor,
+)
+
+PROBE_INTERVAL_IN_SECONDS = 0.001
+
+
+def build_body(total_cities: int) -> bytes:
+    """
+    Build a `/group` response padded with the fields a forecast payload
+    would carry, most of which the service drops.
+    """
+    return json.dumps(
+        {
+            "cnt": total_cities,
+            "list": [
+                {
+                    "id": 3439525 + index,
+                    "name": f"City {index}",
+                    "coord": {"lon": random.uniform(-180, 180), "lat": 0.0},
+                    "main": {
+                        "temp": round(random.uniform(-10, 40), 2),
+                        "feels_like": 20.0,
+                        "pressure": 1013,
+                        "humidity": random.randint(0, 100),
+                    },
+                    "hourly": [
+                        {"dt": hour, "temp": 20.0, "pop": 0.1} for hour in range(12)
+                    ],
+                }
+                for index in range(total_cities)
+            ],
+        }
+    ).encode()
+
+
+async def probe(lags: list, stop: asyncio.Event):
+    while not stop.is_set():
+        expected = time.perf_counter() + PROBE_INTERVAL_IN_SECONDS
+        await asyncio.sleep(PROBE_INTERVAL_IN_SECONDS)
+        lags.append(max(time.perf_counter() - expected, 0))
+
+
+async def parse_all(service: OpenWeatherAPIService, bodies: list) -> tuple:
+    parse_executor = get_parse_executor()
+    lags = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, stop))
+    await asyncio.sleep(PROBE_INTERVAL_IN_SECONDS)
+
+    start = time.perf_counter()
+    if parse_executor is None:
+        for body in bodies:
+            service.keep_well_formed(project_city_list(json.loads(body)["list"]))
+            await asyncio.sleep(0)
+    else:
+        await asyncio.gather(
+            *[service.parse_in_executor(parse_executor, body) for body in bodies]
+        )
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe_task
+    return elapsed, lags
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cities", type=int, default=20000)
+    parser.add_argument("--responses", type=int, default=8)
+    args = parser.parse_args()
+
+    bodies = [build_body(args.cities) for _ in range(args.responses)]
+    service = OpenWeatherAPIService("[benchmark] -")
+    size_in_mb = sum(len(body) for body in bodies) / 1024 / 1024
+
+    print(f"Parsing {args.responses} responses, {size_in_mb:.1f} MB in total")
+    print(f"{'executor':<10} {'total':>10} {'max lag':>10} {'p99 lag':>10}")
+    for executor in (
+        WeatherAPIConstants.INLINE_PARSE_EXECUTOR,
+        WeatherAPIConstants.THREAD_PARSE_EXECUTOR,
+        WeatherAPIConstants.PROCESS_PARSE_EXECUTOR,
+    ):
+        with patch.object(settings, "PARSE_EXECUTOR", executor):
+            shutdown_parse_executor()
+            elapsed, lags = asyncio.run(parse_all(service, bodies))
+            shutdown_parse_executor()
+
+        p99 = (
+            statistics.quantiles(lags, n=100, method="inclusive")[98]
+            if len(lags) > 1
+            else max(lags)
+        )
+        print(
+            f"{executor:<10} {elapsed * 1000:>8.1f}ms {max(lags) * 1000:>8.1f}ms "
+            f"{p99 * 1000:>8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
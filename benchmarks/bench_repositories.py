@@ -0,0 +1,115 @@
+"""
+Compare the repository backends on the operations a bulk process performs.
+
+Usage:
+    python -m benchmarks.bench_repositories [--cities 10000] [--rounds 5]
+
+The Redis backend is included only when a Redis Stack server is reachable
+with the configured REDIS_* settings.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+os.environ.setdefault("OPEN_WEATHER_API_KEY", "benchmark")
+
+from weather_data_fetcher_service.core.repositories.memory_repository import (  # noqa: E402
+    InMemoryRepository,
+)
+from weather_data_fetcher_service.core.repositories.sqlite_repository import (  # noqa: E402
+    SQLiteRepository,
+)
+
+
+def build_results(total_cities: int) -> list:
+    return [
+        {
+            "city_id": 3439525 + index,
+            "temperature": round(random.uniform(-10, 40), 2),
+            "humidity": random.randint(0, 100),
+        }
+        for index in range(total_cities)
+    ]
+
+
+def build_repositories(tmp_dir: str) -> dict:
+    repositories = {
+        "memory": InMemoryRepository(),
+        "sqlite": SQLiteRepository(os.path.join(tmp_dir, "bench.db")),
+    }
+
+    try:
+        from weather_data_fetcher_service.core.repositories.redis_repository import (
+            RedisRepository,
+        )
+
+        redis_repository = RedisRepository()
+        redis_repository._redis.ping()
+        repositories["redis"] = redis_repository
+    except Exception:
+        print("Redis server not reachable, skipping the redis backend.")
+
+    return repositories
+
+
+async def timed(coroutine) -> float:
+    start = time.perf_counter()
+    await coroutine
+    return time.perf_counter() - start
+
+
+async def bench_repository(repository, results: list, rounds: int) -> dict:
+    process_id = random.randint(10**9, 10**10)
+    document = {"process_id": process_id, "total_cities": len(results)}
+
+    save_time = 0.0
+    fetch_time = 0.0
+    for _ in range(rounds):
+        document["results"] = results
+        save_time += await timed(repository.save_json_data(process_id, document))
+        fetch_time += await timed(repository.fetch_json_data(process_id))
+
+    append_time = 0.0
+    batch_size = 60
+    for index in range(0, len(results), batch_size):
+        append_time += await timed(
+            repository.append_json_data(
+                process_id, "results", results[index : index + batch_size]
+            )
+        )
+
+    range_time = await timed(repository.fetch_json_range(process_id, "results"))
+
+    return {
+        "save_json_data (ms)": save_time / rounds * 1000,
+        "fetch_json_data (ms)": fetch_time / rounds * 1000,
+        "append_json_data total (ms)": append_time * 1000,
+        "fetch_json_range full (ms)": range_time * 1000,
+    }
+
+
+async def main(total_cities: int, rounds: int):
+    results = build_results(total_cities)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        repositories = build_repositories(tmp_dir)
+
+        print(f"{total_cities} cities, {rounds} rounds")
+        for name, repository in repositories.items():
+            measures = await bench_repository(repository, results, rounds)
+            print(f"\n[{name}]")
+            for label, value in measures.items():
+                print(f"  {label:<30} {value:10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cities", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=5)
+    arguments = parser.parse_args()
+
+    asyncio.run(main(arguments.cities, arguments.rounds))
@@ -0,0 +1,135 @@
+"""
+Compare the JSON and packed result storage formats.
+
+Usage:
+    python -m benchmarks.bench_results_storage [--cities 100000]
+
+Reports the stored size and encode/decode throughput of each format. When a
+Redis Stack server is reachable, the memory used by both layouts is also
+measured with MEMORY USAGE.
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+
+os.environ.setdefault("OPEN_WEATHER_API_KEY", "benchmark")
+
+from weather_data_fetcher_service.core import settings  # noqa: E402
+from weather_data_fetcher_service.core.models.weather_data_models import (  # noqa: E402
+    CityWeatherProcessData,
+)
+from weather_data_fetcher_service.core.repositories.results_codec import (  # noqa: E402
+    encode_results_segment,
+    decode_results_segment,
+)
+
+
+def build_results(total_cities: int) -> list:
+    return [
+        {
+            "city_id": 3439525 + index,
+            "temperature": round(random.uniform(-10, 40), 2),
+            "humidity": random.randint(0, 100),
+        }
+        for index in range(total_cities)
+    ]
+
+
+def bench_json(results: list) -> dict:
+    process_data = CityWeatherProcessData(
+        process_id=1, total_cities=len(results), results=results
+    )
+
+    start = time.perf_counter()
+    document = process_data.to_json()
+    encode_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    json.loads(document)
+    decode_time = time.perf_counter() - start
+
+    return {"size": len(document), "encode": encode_time, "decode": decode_time}
+
+
+def bench_packed(results: list) -> dict:
+    segment_size = settings.RESULTS_SEGMENT_SIZE
+    chunks = [
+        results[index : index + segment_size]
+        for index in range(0, len(results), segment_size)
+    ]
+
+    start = time.perf_counter()
+    segments = [encode_results_segment(chunk) for chunk in chunks]
+    encode_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for segment in segments:
+        decode_results_segment(segment)
+    decode_time = time.perf_counter() - start
+
+    return {
+        "size": sum(len(segment) for segment in segments),
+        "encode": encode_time,
+        "decode": decode_time,
+        "segments": segments,
+    }
+
+
+def redis_memory_usage(results: list, segments: list):
+    try:
+        import redis
+
+        client = redis.Redis(
+            host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=settings.REDIS_DB
+        )
+        client.ping()
+    except Exception:
+        print("\nRedis server not reachable, skipping MEMORY USAGE comparison.")
+        return
+
+    json_key = "bench:results:json"
+    packed_key = "bench:results:packed"
+    process_data = CityWeatherProcessData(
+        process_id=1, total_cities=len(results), results=results
+    )
+
+    client.json().set(json_key, path=".", obj=process_data.to_json())
+    client.delete(packed_key)
+    client.hset(packed_key, mapping=dict(enumerate(segments)))
+
+    print("\nRedis MEMORY USAGE (bytes)")
+    print(f"  {'RedisJSON document':<20} {client.memory_usage(json_key):>12}")
+    print(f"  {'packed segments':<20} {client.memory_usage(packed_key):>12}")
+
+    client.delete(json_key, packed_key)
+
+
+def main(total_cities: int):
+    results = build_results(total_cities)
+    json_measures = bench_json(results)
+    packed_measures = bench_packed(results)
+
+    print(
+        f"{total_cities} cities, segment size {settings.RESULTS_SEGMENT_SIZE}\n"
+        f"\n  {'format':<8} {'bytes':>12} {'encode (ms)':>12} {'decode (ms)':>12}"
+    )
+    for name, measures in (("json", json_measures), ("packed", packed_measures)):
+        print(
+            f"  {name:<8} {measures['size']:>12} "
+            f"{measures['encode'] * 1000:>12.2f} {measures['decode'] * 1000:>12.2f}"
+        )
+
+    print(f"\n  size ratio: {json_measures['size'] / packed_measures['size']:.1f}x")
+
+    redis_memory_usage(results, packed_measures["segments"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cities", type=int, default=100000)
+    arguments = parser.parse_args()
+
+    main(arguments.cities)
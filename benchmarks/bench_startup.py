@@ -0,0 +1,76 @@
+"""
+Measure the cold start of a worker: importing the app, running its startup
+and serving the first request.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 5]
+
+Each run is a fresh interpreter using the in-memory backend, so nothing is
+cached between runs and no Redis server is needed.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+WATCHED_MODULES = ("aiohttp", "redis", "sqlite3", "flask", "rich")
+
+WORKER_SCRIPT = f"""
+import json, sys, time
+
+start = time.perf_counter()
+from main import app
+imported = time.perf_counter()
+
+from fastapi.testclient import TestClient
+
+with TestClient(app) as client:
+    started = time.perf_counter()
+    response = client.get("/api/v1/get-scheduled-refreshes")
+    served = time.perf_counter()
+
+assert response.status_code == 200, response.text
+print(json.dumps({{
+    "import": imported - start,
+    "first_request": served - started,
+    "loaded": [name for name in {WATCHED_MODULES!r} if name in sys.modules],
+}}))
+"""
+
+
+def run_worker() -> dict:
+    environment = {
+        **os.environ,
+        "OPEN_WEATHER_API_KEY": os.environ.get("OPEN_WEATHER_API_KEY", "benchmark"),
+        "REPOSITORY_BACKEND": "memory",
+        "LOG_ASYNC": "false",
+    }
+    output = subprocess.run(
+        [sys.executable, "-c", WORKER_SCRIPT],
+        env=environment,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    samples = [run_worker() for _ in range(args.runs)]
+
+    print(f"Cold start over {args.runs} runs (median)")
+    for metric in ("import", "first_request"):
+        median = statistics.median(sample[metric] for sample in samples)
+        print(f"  {metric:<14} {median * 1000:>9.1f} ms")
+    print(f"  loaded modules {', '.join(samples[-1]['loaded']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
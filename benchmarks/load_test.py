@@ -0,0 +1,275 @@
+"""
+Replay a corpus of API sessions against the service at rising concurrency.
+
+Usage:
+    python -m benchmarks.load_test [--sessions 200] [--concurrency 1,8,32]
+        [--seed 42] [--corpus sessions.jsonl] [--save-corpus sessions.jsonl]
+        [--upstream-latency-ms 50] [--url http://127.0.0.1:8000]
+        [--upstream-port 8900]
+
+Each session uploads a city list, triggers its bulk processing and polls its
+results, like a client would. The upstream weather API is replaced by a local
+stand-in and the in-memory repository replaces Redis.
+
+By default the app runs in-process. To load a running server instead, start
+it against the stand-in and pass its `--url`:
+
+    OPEN_WEATHER_BASE_URL=http://127.0.0.1:8900 REPOSITORY_BACKEND=memory \\
+        uvicorn main:app --port 8000
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import statistics
+import time
+
+UPSTREAM_HOST = "127.0.0.1"
+
+os.environ.setdefault("OPEN_WEATHER_API_KEY", "load-test")
+os.environ.setdefault("REPOSITORY_BACKEND", "memory")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# Every concurrency level replays the same city lists; don't let the later
+# levels reuse the results of the earlier ones.
+os.environ.setdefault("DEDUP_FRESHNESS_IN_SECONDS", "0")
+
+import httpx  # noqa: E402
+from aiohttp import web  # noqa: E402
+
+from weather_data_fetcher_service.core.constants import (  # noqa: E402
+    WeatherAPIConstants,
+)
+
+PROBE_INTERVAL_IN_SECONDS = 0.005
+
+
+def build_corpus(sessions: int, seed: int) -> list:
+    """
+    Build a reproducible list of sessions, with city lists of the sizes seen
+    in practice: mostly small, some region-sized.
+    """
+    randomizer = random.Random(seed)
+    corpus = []
+    for _ in range(sessions):
+        total_cities = randomizer.choice([1, 5, 20, 20, 60, 200])
+        corpus.append(
+            {
+                "cities_ids": [
+                    str(3439525 + randomizer.randrange(100000))
+                    for _ in range(total_cities)
+                ],
+                "polls": randomizer.randint(1, 5),
+            }
+        )
+    return corpus
+
+
+def load_corpus(path: str) -> list:
+    with open(path, encoding="utf-8") as corpus_file:
+        return [json.loads(line) for line in corpus_file if line.strip()]
+
+
+def save_corpus(path: str, corpus: list):
+    with open(path, "w", encoding="utf-8") as corpus_file:
+        for session in corpus:
+            corpus_file.write(json.dumps(session) + "\n")
+
+
+async def start_upstream(port: int, latency_in_seconds: float) -> web.AppRunner:
+    """
+    Serve a stand-in for the OpenWeather `/group` endpoint.
+    """
+
+    async def group(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency_in_seconds)
+        cities_ids = request.query.get("id", "").split(",")
+        return web.json_response(
+            {
+                "cnt": len(cities_ids),
+                "list": [
+                    {
+                        "id": int(city_id),
+                        "main": {"temp": 20.5, "humidity": 50},
+                    }
+                    for city_id in cities_ids
+                ],
+            }
+        )
+
+    upstream = web.Application()
+    upstream.router.add_get("/group", group)
+    runner = web.AppRunner(upstream, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, UPSTREAM_HOST, port).start()
+    return runner
+
+
+def build_client(url: str) -> httpx.AsyncClient:
+    if url:
+        return httpx.AsyncClient(base_url=url, timeout=None)
+
+    from main import app
+
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://load-test",
+        timeout=None,
+    )
+
+
+async def timed_request(
+    client, measures: dict, kind: str, method: str, path: str, **kwargs
+):
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, path, **kwargs)
+        failed = response.status_code >= 400
+    except httpx.HTTPError:
+        failed = True
+
+    measures.setdefault(kind, []).append(time.perf_counter() - start)
+    if failed:
+        measures.setdefault("errors", []).append(kind)
+
+
+async def run_session(client, measures: dict, process_id: int, session: dict):
+    await timed_request(
+        client,
+        measures,
+        "upload",
+        "POST",
+        "/api/v1/upload-city-list",
+        json={"process_id": process_id, "cities_ids": session["cities_ids"]},
+    )
+    await timed_request(
+        client,
+        measures,
+        "process",
+        "POST",
+        "/api/v2/process-city-data-in-bulk",
+        json={"process_id": process_id},
+    )
+    for _ in range(session["polls"]):
+        await timed_request(
+            client,
+            measures,
+            "poll",
+            "GET",
+            "/api/v1/get-city-data-process",
+            params={"process_id": process_id},
+        )
+
+
+async def probe(lags: list, stop: asyncio.Event):
+    while not stop.is_set():
+        expected = time.perf_counter() + PROBE_INTERVAL_IN_SECONDS
+        await asyncio.sleep(PROBE_INTERVAL_IN_SECONDS)
+        lags.append(max(time.perf_counter() - expected, 0))
+
+
+async def run_level(client, corpus: list, concurrency: int, process_ids) -> dict:
+    measures = {}
+    sessions = iter(corpus)
+
+    async def worker():
+        for session in sessions:
+            await run_session(client, measures, next(process_ids), session)
+
+    lags = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, stop))
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe_task
+    return {"elapsed": elapsed, "measures": measures, "lags": lags}
+
+
+def percentile(values: list, percent: int) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+def report(concurrency: int, level: dict):
+    measures = level["measures"]
+    errors = measures.pop("errors", [])
+    total_requests = sum(len(latencies) for latencies in measures.values())
+    lags = level["lags"] or [0.0]
+
+    print(
+        f"\nconcurrency {concurrency}: {total_requests / level['elapsed']:.1f} req/s, "
+        f"errors {len(errors) / max(total_requests, 1):.2%}, "
+        f"loop lag p99 {percentile(lags, 99) * 1000:.1f} ms "
+        f"max {max(lags) * 1000:.1f} ms"
+    )
+    print(f"  {'request':<10} {'count':>7} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for kind, latencies in measures.items():
+        print(
+            f"  {kind:<10} {len(latencies):>7} "
+            + " ".join(
+                f"{percentile(latencies, percent) * 1000:>7.1f}ms"
+                for percent in (50, 95, 99)
+            )
+        )
+
+
+async def main(arguments):
+    corpus = (
+        load_corpus(arguments.corpus)
+        if arguments.corpus
+        else build_corpus(arguments.sessions, arguments.seed)
+    )
+    if arguments.save_corpus:
+        save_corpus(arguments.save_corpus, corpus)
+
+    upstream = await start_upstream(
+        arguments.upstream_port, arguments.upstream_latency_ms / 1000
+    )
+    client = build_client(arguments.url)
+    process_ids = itertools.count(random.Random(arguments.seed).randrange(10**9))
+
+    try:
+        print(
+            f"{len(corpus)} sessions, upstream latency "
+            f"{arguments.upstream_latency_ms} ms, "
+            f"{'app at ' + arguments.url if arguments.url else 'in-process app'}"
+        )
+        for concurrency in arguments.concurrency:
+            report(
+                concurrency, await run_level(client, corpus, concurrency, process_ids)
+            )
+    finally:
+        await client.aclose()
+        await upstream.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument(
+        "--concurrency",
+        type=lambda levels: [int(level) for level in levels.split(",")],
+        default=[1, 8, 32],
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--corpus")
+    parser.add_argument("--save-corpus")
+    parser.add_argument("--upstream-latency-ms", type=float, default=50)
+    parser.add_argument("--upstream-port", type=int, default=8900)
+    parser.add_argument("--url")
+    arguments = parser.parse_args()
+
+    os.environ["OPEN_WEATHER_BASE_URL"] = (
+        f"http://{UPSTREAM_HOST}:{arguments.upstream_port}"
+    )
+    # The stand-in has no quota, so no process waits between request rounds.
+    WeatherAPIConstants.OPEN_WEATHER_CITIES_PER_MINUTE = 10**6
+
+    asyncio.run(main(arguments))
@@ -1,13 +1,39 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.repositories.repository_factory import (
+    get_repository,
+)
+from weather_data_fetcher_service.services.http_client import close_client_session
+from weather_data_fetcher_service.services.response_parsing import (
+    shutdown_parse_executor,
+)
+from weather_data_fetcher_service.rest.middlewares import ProfilingMiddleware
 from weather_data_fetcher_service.rest.routes import app1, app2
+from weather_data_fetcher_service.rest.views import refresh_scheduler
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the worker's repository client before the first request needs it.
+    get_repository()
+    if settings.SCHEDULER_ENABLED:
+        refresh_scheduler.start()
+    yield
+    await refresh_scheduler.stop()
+    await close_client_session()
+    shutdown_parse_executor()
+
 
 app = FastAPI(
     title="Weather Data Fetcher Service",
     description="A FastAPI-based service for fetching and processing weather data.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+app.add_middleware(ProfilingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
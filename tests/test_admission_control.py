@@ -0,0 +1,202 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.models.weather_data_models import (
+    CityWeatherProcessData,
+)
+from weather_data_fetcher_service.core.repositories.memory_repository import (
+    InMemoryRepository,
+)
+from weather_data_fetcher_service.process.weather_data_process import (
+    UploadCityListProcesser,
+)
+from weather_data_fetcher_service.rest import views
+from weather_data_fetcher_service.rest import middlewares
+from weather_data_fetcher_service.rest.admission_control import (
+    AdmissionController,
+    AdmissionRejected,
+)
+from weather_data_fetcher_service.rest.middlewares import AdmissionControlMiddleware
+from weather_data_fetcher_service.rest.views import (
+    estimate_process_cost,
+    estimate_upload_cost,
+)
+
+
+def build_controller(max_concurrent=1, **overrides):
+    return AdmissionController(
+        groups={"process": max_concurrent},
+        **{
+            "max_inflight_cities": 0,
+            "max_queued_requests": 8,
+            "max_queue_wait_seconds": 1,
+            **overrides,
+        },
+    )
+
+
+@pytest.mark.asyncio
+async def test_queued_request_is_admitted_on_release():
+    controller = build_controller()
+    group = controller.groups["process"]
+    await controller.acquire(group, 10)
+
+    waiting = asyncio.create_task(controller.acquire(group, 10))
+    await asyncio.sleep(0)
+    assert not waiting.done()
+    assert controller.snapshot()["groups"]["process"]["queued"] == 1
+
+    controller.release(group, 10, 2.0)
+    await waiting
+
+    assert group.active == 1
+    assert group.average_seconds == 2.0
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_with_429():
+    controller = build_controller(max_queued_requests=0)
+    group = controller.groups["process"]
+    await controller.acquire(group, 1)
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        await controller.acquire(group, 1)
+
+    assert rejected.value.status_code == 429
+    assert rejected.value.retry_after == 1
+
+
+@pytest.mark.asyncio
+async def test_queue_wait_timeout_rejects_with_503():
+    controller = build_controller(max_queue_wait_seconds=0.01)
+    group = controller.groups["process"]
+    await controller.acquire(group, 1)
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        await controller.acquire(group, 1)
+
+    assert rejected.value.status_code == 503
+    assert controller.snapshot()["queued_requests"] == 0
+
+
+@pytest.mark.asyncio
+async def test_city_budget_holds_back_large_requests():
+    controller = build_controller(max_concurrent=4, max_inflight_cities=100)
+    group = controller.groups["process"]
+    await controller.acquire(group, 60)
+
+    large = asyncio.create_task(controller.acquire(group, 150))
+    small = asyncio.create_task(controller.acquire(group, 10))
+    await asyncio.sleep(0)
+    assert not large.done() and not small.done()
+
+    controller.release(group, 60, 1.0)
+    await large
+    await asyncio.sleep(0)
+
+    assert not small.done()
+    assert controller.inflight_cities == 150
+
+    controller.release(group, 150, 1.0)
+    await small
+
+
+app = FastAPI()
+app.add_middleware(
+    AdmissionControlMiddleware,
+    routes={"/process": ("process", estimate_upload_cost)},
+)
+
+
+@app.post("/process")
+async def process():
+    return {"message": "processed"}
+
+
+client = TestClient(app)
+
+
+def test_middleware_answers_429_with_retry_after_when_saturated():
+    controller = build_controller(max_queued_requests=0)
+    controller.groups["process"].active = 1
+
+    with patch.object(settings, "ADMISSION_CONTROL_ENABLED", True), patch.object(
+        middlewares, "get_admission_controller", return_value=controller
+    ):
+        response = client.post("/process", json={"cities_ids": ["1", "2"]})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_middleware_admits_and_releases_requests():
+    controller = build_controller()
+
+    with patch.object(settings, "ADMISSION_CONTROL_ENABLED", True), patch.object(
+        middlewares, "get_admission_controller", return_value=controller
+    ):
+        response = client.post("/process", json={"cities_ids": ["1", "2"]})
+
+    assert response.json() == {"message": "processed"}
+    assert controller.groups["process"].active == 0
+    assert controller.inflight_cities == 0
+    assert controller.groups["process"].average_seconds is not None
+
+
+@pytest.mark.asyncio
+async def test_release_skips_cancelled_waiter():
+    controller = build_controller()
+    group = controller.groups["process"]
+    await controller.acquire(group, 1)
+
+    waiting = asyncio.create_task(controller.acquire(group, 1))
+    await asyncio.sleep(0)
+    # A cancelled wait leaves its waiter queued until the task resumes.
+    waiting.cancel()
+    await asyncio.sleep(0)
+    assert controller._waiters[0][2].cancelled()
+    controller.release(group, 1, 1.0)
+
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+    assert group.active == 0
+    assert controller.inflight_cities == 0
+    assert controller.snapshot()["queued_requests"] == 0
+
+
+def test_upload_cost_is_estimated_from_content_length():
+    controller = build_controller(max_inflight_cities=1000)
+    costs = []
+
+    async def acquire(group, cost):
+        costs.append(cost)
+
+    with patch.object(settings, "ADMISSION_CONTROL_ENABLED", True), patch.object(
+        middlewares, "get_admission_controller", return_value=controller
+    ), patch.object(controller, "acquire", acquire):
+        client.post("/process", content=b"x" * 80)
+
+    assert costs == [10]
+
+
+@pytest.mark.asyncio
+async def test_process_cost_is_read_from_the_size_record():
+    repository = InMemoryRepository()
+    uploader = UploadCityListProcesser(
+        CityWeatherProcessData(process_id=1, cities_ids=[1, 2, 3]),
+        lambda: repository,
+    )
+    await uploader.execute()
+
+    request = AsyncMock(body=AsyncMock(return_value=b'{"process_id": 1}'))
+    with patch.object(views, "get_repository", return_value=repository):
+        assert await estimate_process_cost(request) == 3
+
+        await repository.delete_process(1)
+        assert await estimate_process_cost(request) == 0
@@ -0,0 +1,165 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.models.weather_data_models import (
+    CityWeatherProcessData,
+)
+from weather_data_fetcher_service.core.rate_limiter import TokenBucket
+from weather_data_fetcher_service.core.repositories.memory_repository import (
+    InMemoryRepository,
+)
+from weather_data_fetcher_service.process.batch_scheduler import (
+    BatchFlow,
+    BatchScheduler,
+    get_batch_scheduler,
+)
+from weather_data_fetcher_service.process.base_process import ProcessResponse
+from weather_data_fetcher_service.process.weather_data_process import (
+    CityWeatherDataProcesser,
+)
+from weather_data_fetcher_service.rest import views
+from weather_data_fetcher_service.rest.parameters import ProcessParameter
+from weather_data_fetcher_service.services.base_weather_api_service import (
+    BaseWeatherAPIService,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def build_flow(process_id, batches, weight=1.0, tenant=None):
+    return BatchFlow(process_id, batches, AsyncMock(), weight, tenant)
+
+
+def drain(scheduler):
+    order = []
+    while scheduler.has_pending_batches():
+        selected = scheduler.next_batch()
+        if selected is None:
+            break
+        order.append(selected[0].process_id)
+    return order
+
+
+def test_token_bucket_refills_over_time():
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock=clock)
+
+    assert all(bucket.try_acquire() for _ in range(60))
+    assert not bucket.try_acquire()
+    assert bucket.time_until_available() == pytest.approx(1.0)
+
+    clock.now = 1.0
+    assert bucket.try_acquire()
+
+
+def test_next_batch_serves_small_jobs_first():
+    scheduler = BatchScheduler(requests_per_minute=60, small_job_cities=20)
+    scheduler.add_flow(build_flow(1, [["1"] * 20] * 5))
+    scheduler.add_flow(build_flow(2, [["2"] * 20]))
+
+    assert drain(scheduler) == [2, 1, 1, 1, 1, 1]
+
+
+def test_next_batch_interleaves_flows_by_weight():
+    scheduler = BatchScheduler(requests_per_minute=60)
+    scheduler.add_flow(build_flow(1, [["1"] * 20] * 6, weight=2.0))
+    scheduler.add_flow(build_flow(2, [["2"] * 20] * 3))
+
+    assert drain(scheduler) == [1, 1, 2, 1, 1, 2, 1, 1, 2]
+
+
+def test_next_batch_throttles_tenant():
+    clock = FakeClock()
+    scheduler = BatchScheduler(
+        requests_per_minute=60, tenant_requests_per_minute=1, clock=clock
+    )
+    scheduler.add_flow(build_flow(1, [["1"]] * 3, tenant="a"))
+    scheduler.add_flow(build_flow(2, [["2"]] * 3, tenant="a"))
+    scheduler.add_flow(build_flow(3, [["3"]] * 2, tenant="b"))
+
+    assert drain(scheduler) == [1, 3]
+    assert scheduler.next_batch() is None
+
+    clock.now = 60.0
+    assert [scheduler.next_batch()[0].process_id for _ in range(2)] == [2, 3]
+
+
+@pytest.mark.asyncio
+async def test_schedule_yields_every_batch_result():
+    scheduler = BatchScheduler(requests_per_minute=6000)
+    scheduler.logger = MagicMock()
+
+    async def fetch(cities_ids):
+        if cities_ids == ["3"]:
+            raise ValueError("upstream failure")
+        return [{"city_id": int(city_id)} for city_id in cities_ids]
+
+    results = [
+        result
+        async for result in scheduler.schedule(1, [["1", "2"], ["3"], ["4"]], fetch)
+    ]
+
+    assert sorted(map(str, results)) == sorted(
+        map(str, [[{"city_id": 1}, {"city_id": 2}], False, [{"city_id": 4}]])
+    )
+    assert not scheduler.has_pending_batches()
+    scheduler.logger.error.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_processor_fetches_through_scheduler():
+    repository = InMemoryRepository()
+    await repository.save_json_data(
+        1, CityWeatherProcessData(process_id=1, cities_ids=["1", "2", "3"]).to_json()
+    )
+
+    weather_api_service = AsyncMock(spec=BaseWeatherAPIService)
+    weather_api_service.cities_per_minute = 60
+    weather_api_service.cities_per_request = 2
+
+    async def fetch_data_in_bulk(cities_ids):
+        return [{"city_id": int(city_id)} for city_id in cities_ids]
+
+    weather_api_service.fetch_data_in_bulk = AsyncMock(side_effect=fetch_data_in_bulk)
+
+    get_batch_scheduler.cache_clear()
+    with patch.object(settings, "BATCH_SCHEDULER_ENABLED", True):
+        processor = CityWeatherDataProcesser(
+            lambda _: weather_api_service,
+            lambda: repository,
+            CityWeatherProcessData(process_id=1),
+            tenant="a",
+        )
+        processor.logger = MagicMock()
+        response = await processor.execute()
+    get_batch_scheduler.cache_clear()
+
+    assert response.status == 200
+    assert weather_api_service.fetch_data_in_bulk.call_count == 2
+    stored_process_data = await repository.fetch_json_data(1)
+    assert sorted(result["city_id"] for result in stored_process_data["results"]) == [
+        1,
+        2,
+        3,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_process_view_passes_tenant_and_weight():
+    with patch.object(views, "CityWeatherDataProcesser") as processor_class:
+        processor_class.return_value.execute = AsyncMock(
+            return_value=ProcessResponse(status=200, message="ok")
+        )
+        await views.process_city_data_view(
+            ProcessParameter(process_id=1, tenant="a", weight=2.0)
+        )
+
+    assert processor_class.call_args.kwargs["tenant"] == "a"
+    assert processor_class.call_args.kwargs["weight"] == 2.0
@@ -0,0 +1,136 @@
+import gzip
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.geo_index import (
+    BoundingBox,
+    CityGeoIndex,
+    get_geo_index,
+)
+from weather_data_fetcher_service.core.models.weather_data_models import (
+    CityWeatherProcessData,
+)
+from weather_data_fetcher_service.core.repositories.memory_repository import (
+    InMemoryRepository,
+)
+from weather_data_fetcher_service.process.weather_data_process import (
+    CityWeatherDataProcesser,
+)
+from weather_data_fetcher_service.services.base_weather_api_service import (
+    BaseWeatherAPIService,
+)
+from weather_data_fetcher_service.services.open_weather_api_service import (
+    OpenWeatherAPIService,
+)
+
+CITIES = [
+    {"id": 1, "coord": {"lon": -56.2, "lat": -34.9}},
+    {"id": 2, "coord": {"lon": -56.1, "lat": -34.8}},
+    {"id": 3, "coord": {"lon": -56.4, "lat": -34.6}},
+    {"id": 4, "coord": {"lon": -54.9, "lat": -34.9}},
+]
+
+
+@pytest.fixture
+def geo_index():
+    return CityGeoIndex.from_file_data(CITIES)
+
+
+def test_plan_boxes_clusters_dense_cells(geo_index):
+    boxes, stragglers = geo_index.plan_boxes(["1", "2", "3", "4", "99"], 1.0, 2)
+
+    assert len(boxes) == 1
+    box = boxes[0]
+    assert box.cities_ids == ["1", "2", "3"]
+    assert (box.lon_left, box.lat_bottom, box.lon_right, box.lat_top) == (
+        -56.4,
+        -34.9,
+        -56.1,
+        -34.6,
+    )
+    assert stragglers == ["99", "4"]
+
+
+def test_from_file_reads_gzipped_city_list(tmp_path):
+    path = tmp_path / "city.list.json.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as city_list_file:
+        json.dump(CITIES, city_list_file)
+
+    geo_index = CityGeoIndex.from_file(str(path))
+
+    assert geo_index.coordinates["4"] == (-54.9, -34.9)
+
+
+def test_get_geo_index_without_city_list():
+    get_geo_index.cache_clear()
+    with patch.object(settings, "GEO_CITY_LIST_PATH", ""):
+        assert get_geo_index() is None
+    get_geo_index.cache_clear()
+
+
+def test_box_url():
+    service = OpenWeatherAPIService("test_log")
+
+    with patch.object(settings, "GEO_BOX_ZOOM", 12):
+        url = service.box_url(BoundingBox(-56.4, -34.9, -56.1, -34.6, ["1"]))
+
+    assert "/box/city?bbox=-56.4,-34.9,-56.1,-34.6,12&" in url
+
+
+@pytest.mark.asyncio
+async def test_processor_fetches_clusters_by_box(geo_index):
+    repository = InMemoryRepository()
+    await repository.save_json_data(
+        1,
+        CityWeatherProcessData(process_id=1, cities_ids=["1", "2", "3", "4"]).to_json(),
+    )
+
+    weather_api_service = AsyncMock(spec=BaseWeatherAPIService)
+    weather_api_service.supports_box_queries = True
+    weather_api_service.cities_per_minute = 60
+    weather_api_service.cities_per_request = 20
+    # The box response leaves out city 3 and holds city 5, which wasn't asked.
+    weather_api_service.fetch_data_in_box = AsyncMock(
+        return_value=[{"city_id": 1}, {"city_id": 2}, {"city_id": 5}]
+    )
+
+    async def fetch_data_in_bulk(cities_ids):
+        return [{"city_id": int(city_id)} for city_id in cities_ids]
+
+    weather_api_service.fetch_data_in_bulk = AsyncMock(side_effect=fetch_data_in_bulk)
+
+    with patch(
+        "weather_data_fetcher_service.process.weather_data_process.get_geo_index",
+        return_value=geo_index,
+    ), patch.multiple(
+        settings, GEO_BATCHING_ENABLED=True, GEO_MIN_CITIES_PER_BOX=2
+    ), patch(
+        "asyncio.sleep", AsyncMock()
+    ) as sleep:
+        processor = CityWeatherDataProcesser(
+            lambda _: weather_api_service,
+            lambda: repository,
+            CityWeatherProcessData(process_id=1),
+        )
+        processor.logger = MagicMock()
+        response = await processor.execute()
+
+    assert response.status == 200
+    # The missed city fits in the round of the box query.
+    sleep.assert_not_awaited()
+    weather_api_service.fetch_data_in_box.assert_called_once()
+    assert [
+        call.args[0] for call in weather_api_service.fetch_data_in_bulk.mock_calls
+    ] == [
+        ["4"],
+        ["3"],
+    ]
+    stored_process_data = await repository.fetch_json_data(1)
+    assert sorted(result["city_id"] for result in stored_process_data["results"]) == [
+        1,
+        2,
+        3,
+        4,
+    ]
@@ -0,0 +1,241 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.constants import HedgingConstants
+from weather_data_fetcher_service.core.models.weather_data_models import (
+    CityWeatherProcessData,
+)
+from weather_data_fetcher_service.core.rate_limiter import TokenBucket
+from weather_data_fetcher_service.process.weather_data_process import (
+    CityWeatherDataProcesser,
+)
+from weather_data_fetcher_service.services import open_weather_api_service
+from weather_data_fetcher_service.services.hedging import (
+    RequestHedger,
+    get_request_hedger,
+)
+from weather_data_fetcher_service.services.open_weather_api_service import (
+    OpenWeatherAPIService,
+)
+
+
+def build_hedger(requests_per_minute=60, latencies=(0.01,) * 5):
+    hedger = RequestHedger(
+        percentile=0.95,
+        min_samples=5,
+        latency_window=10,
+        budget=TokenBucket(requests_per_minute),
+    )
+    for seconds in latencies:
+        hedger.latencies.record(seconds)
+    return hedger
+
+
+def respond_after(seconds, result):
+    async def send():
+        await asyncio.sleep(seconds)
+        return result
+
+    return send
+
+
+@pytest.mark.asyncio
+async def test_requests_are_not_hedged_before_enough_latencies():
+    hedger = build_hedger(latencies=[0.01])
+    hedge = AsyncMock(return_value=["hedge"])
+
+    assert await hedger.run(respond_after(0.05, ["primary"]), hedge) == ["primary"]
+    hedge.assert_not_called()
+    assert hedger.snapshot()["hedge_after_seconds"] is None
+
+
+@pytest.mark.asyncio
+async def test_slow_request_is_hedged_and_cancelled():
+    hedger = build_hedger()
+    primary_cancelled = asyncio.Event()
+
+    async def slow_primary():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            primary_cancelled.set()
+            raise
+
+    assert await hedger.run(slow_primary, respond_after(0, ["hedge"])) == ["hedge"]
+    await asyncio.sleep(0)
+
+    assert primary_cancelled.is_set()
+    assert hedger.snapshot()["hedges_sent"] == 1
+    assert hedger.snapshot()["hedge_wins"] == 1
+
+
+@pytest.mark.asyncio
+async def test_primary_answering_first_wins():
+    hedger = build_hedger()
+
+    result = await hedger.run(
+        respond_after(0.03, ["primary"]), respond_after(1, ["hedge"])
+    )
+
+    assert result == ["primary"]
+    assert hedger.hedges_sent == 1
+    assert hedger.hedge_wins == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_hedge_falls_back_to_primary():
+    hedger = build_hedger()
+
+    result = await hedger.run(respond_after(0.03, ["primary"]), respond_after(0, False))
+
+    assert result == ["primary"]
+    assert hedger.hedge_wins == 0
+
+
+@pytest.mark.asyncio
+async def test_hedges_are_skipped_without_budget():
+    hedger = build_hedger(requests_per_minute=1)
+    hedge = AsyncMock(return_value=["hedge"])
+
+    await hedger.run(respond_after(0.03, ["primary"]), hedge)
+    await hedger.run(respond_after(0.03, ["primary"]), hedge)
+
+    hedge.assert_called_once()
+    assert hedger.hedges_skipped == 1
+
+
+@pytest.mark.asyncio
+async def test_hedges_take_a_request_from_the_quota():
+    hedger = build_hedger()
+    quota = TokenBucket(1)
+    hedge = AsyncMock(return_value=["hedge"])
+
+    await hedger.run(respond_after(0.03, ["primary"]), hedge, quota=quota)
+    await hedger.run(respond_after(0.03, ["primary"]), hedge, quota=quota)
+
+    hedge.assert_called_once()
+    assert not quota.available()
+    assert hedger.hedges_skipped == 1
+    # The hedge budget isn't spent on a hedge the quota refused.
+    assert hedger.budget.available()
+
+
+def test_zero_hedges_per_minute_disables_hedging():
+    get_request_hedger.cache_clear()
+    try:
+        with patch.object(settings, "HEDGING_REQUESTS_PER_MINUTE", 0):
+            hedger = get_request_hedger()
+    finally:
+        get_request_hedger.cache_clear()
+
+    for _ in range(5):
+        hedger.latencies.record(0.01)
+    assert hedger.hedge_delay() is None
+
+
+@pytest.mark.asyncio
+async def test_cancelled_primary_latency_is_recorded():
+    hedger = build_hedger()
+
+    await hedger.run(respond_after(10, ["primary"]), respond_after(0.05, ["hedge"]))
+
+    # The hedge's latency, then the primary's wait until it was cancelled.
+    assert len(hedger.latencies.samples) == 7
+    assert hedger.latencies.samples[-1] > hedger.latencies.samples[-2] >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_service_hedges_through_the_hedge_session_and_key():
+    service = OpenWeatherAPIService(log_identifier="test_log")
+    hedger = build_hedger()
+    sent = []
+
+    async def request_city_list(build_url, batch_size, session_name="primary"):
+        sent.append((session_name, build_url()))
+        if session_name == HedgingConstants.PRIMARY_SESSION:
+            await asyncio.sleep(10)
+        return [{"city_id": 1, "temperature": 20, "humidity": 50}]
+
+    with patch.multiple(
+        settings, HEDGING_ENABLED=True, HEDGING_API_KEY="hedge-key"
+    ), patch.object(
+        open_weather_api_service, "get_request_hedger", return_value=hedger
+    ), patch.object(
+        service, "request_city_list", request_city_list
+    ):
+        results = await service.fetch_data_in_bulk(["1"])
+
+    assert results == [{"city_id": 1, "temperature": 20, "humidity": 50}]
+    assert sent[1][0] == HedgingConstants.HEDGE_SESSION
+    assert "appid=hedge-key" in sent[1][1]
+    assert "appid=hedge-key" not in sent[0][1]
+
+
+@pytest.mark.asyncio
+async def test_rounds_take_only_the_quota_left_by_hedges():
+    processor = CityWeatherDataProcesser(
+        lambda _: AsyncMock(fetch_data_in_bulk=AsyncMock(return_value=[])),
+        lambda: AsyncMock(),
+        CityWeatherProcessData(process_id=1),
+    )
+    processor.store_results = AsyncMock()
+    quota = TokenBucket(3, clock=lambda: 0.0)
+    processor.weather_API_service.hedge_quota = quota
+    # A hedge was sent on the primary key.
+    quota.try_acquire()
+
+    async def sleep(seconds):
+        # A minute later, the key's quota is whole again.
+        quota._tokens = quota.capacity
+
+    with patch.object(asyncio, "sleep", AsyncMock(side_effect=sleep)):
+        await processor.fetch_in_rounds([["1"], ["2"], ["3"]], [], 3)
+
+    # One round of the two requests left, then one of the last request.
+    assert processor.store_results.call_count == 1
+    assert processor.weather_API_service.fetch_data_in_bulk.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_rounds_use_the_whole_quota_without_hedges_on_the_primary_key():
+    processor = CityWeatherDataProcesser(
+        lambda _: AsyncMock(fetch_data_in_bulk=AsyncMock(return_value=[])),
+        lambda: AsyncMock(),
+        CityWeatherProcessData(process_id=1),
+    )
+    processor.store_results = AsyncMock()
+
+    with patch.multiple(
+        settings, HEDGING_ENABLED=True, HEDGING_API_KEY="hedge-key"
+    ), patch.object(asyncio, "sleep", AsyncMock()):
+        await processor.fetch_batches([["1"], ["2"], ["3"]], [], 3)
+
+    assert processor.weather_API_service.hedge_quota is None
+    assert processor.store_results.call_count == 0
+
+
+@pytest.mark.asyncio
+async def test_hedges_on_the_primary_key_take_from_the_injected_quota():
+    service = OpenWeatherAPIService(log_identifier="test_log")
+    service.hedge_quota = TokenBucket(1)
+    hedger = build_hedger()
+
+    async def request_city_list(build_url, batch_size, session_name="primary"):
+        if session_name == HedgingConstants.PRIMARY_SESSION:
+            await asyncio.sleep(10)
+        return [{"city_id": 1, "temperature": 20, "humidity": 50}]
+
+    with patch.multiple(
+        settings, HEDGING_ENABLED=True, HEDGING_API_KEY=""
+    ), patch.object(
+        open_weather_api_service, "get_request_hedger", return_value=hedger
+    ), patch.object(
+        service, "request_city_list", request_city_list
+    ):
+        await service.fetch_data_in_bulk(["1"])
+
+    assert hedger.hedges_sent == 1
+    assert not service.hedge_quota.available()
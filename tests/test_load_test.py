@@ -0,0 +1,45 @@
+import os
+import socket
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def test_load_test_runs_against_the_stand_in():
+    # A fresh interpreter with none of the service settings, so the harness
+    # sets up the environment itself.
+    environment = {
+        key: os.environ[key] for key in ("PATH", "HOME") if key in os.environ
+    }
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.load_test",
+            "--sessions",
+            "5",
+            "--concurrency",
+            "2",
+            "--upstream-latency-ms",
+            "0",
+            "--upstream-port",
+            str(free_port()),
+        ],
+        cwd=ROOT,
+        env=environment,
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=True,
+    ).stdout
+
+    assert "concurrency 2:" in output
+    assert "errors 0.00%" in output
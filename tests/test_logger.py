@@ -0,0 +1,86 @@
+import io
+import json
+import logging
+from unittest.mock import MagicMock, patch
+
+from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.constants import LoggingConstants
+from weather_data_fetcher_service.core.logger import JsonFormatter, StreamLogger
+
+
+def build_logger(name, **overrides):
+    with patch.multiple(settings, **overrides):
+        stream_logger = StreamLogger(name)
+
+    stream = io.StringIO()
+    for handler in stream_logger._listener.handlers if stream_logger._listener else []:
+        handler.setStream(stream)
+    for handler in stream_logger.logger.handlers:
+        if isinstance(handler, logging.StreamHandler):
+            handler.setStream(stream)
+    return stream_logger, stream
+
+
+def test_json_formatter_keeps_fields():
+    record = logging.makeLogRecord(
+        {
+            "name": "test",
+            "levelno": logging.INFO,
+            "levelname": "INFO",
+            "msg": "Processed %s cities.",
+            "args": (20,),
+            "process_id": 1,
+            "batch": 3,
+        }
+    )
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["message"] == "Processed 20 cities."
+    assert entry["level"] == "INFO"
+    assert entry["process_id"] == 1
+    assert entry["batch"] == 3
+
+
+def test_async_logger_writes_json_from_background_thread():
+    stream_logger, stream = build_logger(
+        "test_async_logger",
+        LOG_FORMAT=LoggingConstants.JSON_LOG_FORMAT,
+        LOG_ASYNC=True,
+    )
+
+    stream_logger.info("Processed %s cities.", 20, process_id=1)
+    stream_logger.stop()
+
+    entry = json.loads(stream.getvalue())
+    assert entry["message"] == "Processed 20 cities."
+    assert entry["process_id"] == 1
+
+
+def test_logger_skips_formatting_below_level():
+    stream_logger, stream = build_logger(
+        "test_level_logger", LOG_LEVEL="INFO", LOG_ASYNC=False
+    )
+    argument = MagicMock()
+
+    stream_logger.debug("Batch result: %s", argument)
+
+    argument.__str__.assert_not_called()
+    assert stream.getvalue() == ""
+
+
+def test_logger_samples_repetitive_messages():
+    stream_logger, stream = build_logger(
+        "test_sampled_logger", LOG_ASYNC=False, LOG_SAMPLE_EVERY=3
+    )
+
+    for batch in range(6):
+        stream_logger.info("Batch %s done.", batch, sample_key="batch_done")
+    stream_logger.info("Process finished.")
+
+    lines = stream.getvalue().splitlines()
+    assert [line.split(" - ")[-1] for line in lines] == [
+        "Batch 0 done.",
+        "Batch 3 done.",
+        "Process finished.",
+    ]
@@ -0,0 +1,36 @@
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.constants import ProfilingConstants
+from weather_data_fetcher_service.rest.middlewares import ProfilingMiddleware
+
+app = FastAPI()
+app.add_middleware(ProfilingMiddleware)
+
+
+@app.get("/ping")
+async def ping():
+    return {"message": "pong"}
+
+
+client = TestClient(app)
+
+
+def test_profiling_disabled_ignores_header():
+    response = client.get("/ping", headers={ProfilingConstants.PROFILE_HEADER: "1"})
+
+    assert response.json() == {"message": "pong"}
+
+
+def test_profiling_returns_report_for_flagged_request():
+    with patch.object(settings, "PROFILING_ENABLED", True):
+        profiled = client.get("/ping", headers={ProfilingConstants.PROFILE_HEADER: "1"})
+        unflagged = client.get("/ping")
+
+    assert profiled.status_code == 200
+    assert profiled.headers[ProfilingConstants.PROFILED_STATUS_HEADER] == "200"
+    assert "function calls" in profiled.text
+    assert unflagged.json() == {"message": "pong"}
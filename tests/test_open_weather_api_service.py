@@ -1,13 +1,27 @@
+import json
 import pytest
+from concurrent.futures import ProcessPoolExecutor
 from unittest.mock import AsyncMock, patch
 
 from weather_data_fetcher_service.services.open_weather_api_service import (
     OpenWeatherAPIService,
 )
+from weather_data_fetcher_service.services.http_client import (
+    close_client_session,
+    get_client_session,
+)
+from weather_data_fetcher_service.services.response_parsing import (
+    parse_group_response,
+    shutdown_parse_executor,
+)
 from weather_data_fetcher_service.core.constants import WeatherAPIConstants
 from weather_data_fetcher_service.core import settings
 
 
+def logged_messages(mock_logger):
+    return [call.args[0] % call.args[1:] for call in mock_logger.call_args_list]
+
+
 @pytest.fixture
 def open_weather_api_service():
     return OpenWeatherAPIService(log_identifier="test_log")
@@ -20,13 +34,6 @@ async def test_format_city_id_list(open_weather_api_service):
     assert formatted_city_ids == "123,456,789"
 
 
-@pytest.mark.asyncio
-async def test_filter_relevant_data(open_weather_api_service):
-    response = {"id": 123, "main": {"temp": 25, "humidity": 80}}
-    filtered_data = open_weather_api_service.filter_relevant_data(response)
-    assert filtered_data == {"city_id": 123, "temperature": 25, "humidity": 80}
-
-
 @pytest.mark.asyncio
 @patch("weather_data_fetcher_service.core.logger.StreamLogger.error")
 async def test_format_city_id_list_non_string_ids(
@@ -35,22 +42,9 @@ async def test_format_city_id_list_non_string_ids(
     city_ids = [123, 456, 789]
     with pytest.raises(TypeError):
         open_weather_api_service.format_city_id_list(city_ids)
-    mock_logger_error.assert_called_once_with(
+    assert logged_messages(mock_logger_error) == [
         "test_log - city_ids list must be string: [123, 456, 789]"
-    )
-
-
-@pytest.mark.asyncio
-@patch("weather_data_fetcher_service.core.logger.StreamLogger.error")
-async def test_filter_relevant_data_missing_fields(
-    mock_logger_error, open_weather_api_service
-):
-    response = {"id": 123, "main": {}}
-    with pytest.raises(KeyError):
-        open_weather_api_service.filter_relevant_data(response)
-    mock_logger_error.assert_called_once_with(
-        "test_log - Incorrect fields provided in response: {'id': 123, 'main': {}}"
-    )
+    ]
 
 
 @pytest.mark.asyncio
@@ -89,6 +83,27 @@ async def test_fetch_data_in_bulk_success(
         assert False, f"Test failed with exception: {e}"
 
 
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_fetch_data_in_bulk_keeps_well_formed_cities(
+    mock_client_session, open_weather_api_service
+):
+    mock_client_session.return_value.__aenter__.return_value.status = 200
+    mock_client_session.return_value.__aenter__.return_value.json = AsyncMock(
+        return_value={
+            "list": [
+                {"id": 123, "main": {"temp": 25, "humidity": 80}},
+                {"id": 456, "main": {"temp": 20}},
+            ]
+        }
+    )
+
+    response_data = await open_weather_api_service.fetch_data_in_bulk(["123", "456"])
+
+    assert response_data == [{"city_id": 123, "temperature": 25, "humidity": 80}]
+    assert open_weather_api_service.malformed_cities_ids == [456]
+
+
 @pytest.mark.asyncio
 @patch("aiohttp.ClientSession.get")
 @patch("weather_data_fetcher_service.core.logger.StreamLogger.error")
@@ -106,8 +121,9 @@ async def test_fetch_data_in_bulk_failure(
 
         assert response is False
         mock_client_session.assert_called_once()
-        mock_logger.assert_any_call(
+        assert (
             "test_log - request wasn't sucessful. Status code: 404 Message: Not Found"
+            in logged_messages(mock_logger)
         )
 
     except Exception as e:
@@ -130,7 +146,9 @@ async def test_fetch_data_in_bulk_timeout(
 
     assert response is False
     mock_client_session.assert_called_once()
-    mock_logger.assert_any_call("test_log - Timeout error occurred: TimeoutError")
+    assert "test_log - Timeout error occurred: TimeoutError" in logged_messages(
+        mock_logger
+    )
 
 
 @pytest.mark.asyncio
@@ -147,7 +165,7 @@ async def test_fetch_data_in_bulk_exception(
 
     assert response is False
     mock_client_session.assert_called_once()
-    mock_logger.assert_any_call("test_log - An error occurred: Error")
+    assert "test_log - An error occurred: Error" in logged_messages(mock_logger)
 
 
 @pytest.mark.asyncio
@@ -169,7 +187,7 @@ async def test_fetch_data_in_bulk_empty_api_key(
 
         assert response is False
         mock_client_session.assert_called_once()
-        mock_logger_error.assert_called_with(
+        assert logged_messages(mock_logger_error)[-1] == (
             "test_log - request wasn't sucessful. Status code: 401 Message: Unauthorized"
         )
 
@@ -191,7 +209,7 @@ async def test_fetch_data_in_bulk_misconfigured_base_url(
 
         assert response is False
         mock_client_session.assert_called_once()
-        mock_logger_error.assert_called_with(
+        assert logged_messages(mock_logger_error)[-1] == (
             "test_log - request wasn't sucessful. Status code: 404 Message: Not Found"
         )
 
@@ -212,7 +230,7 @@ async def test_fetch_data_in_bulk_missing_temp_unit(
 
         assert response is False
         mock_client_session.assert_called_once()
-        mock_logger_error.assert_called_with(
+        assert logged_messages(mock_logger_error)[-1] == (
             "test_log - request wasn't sucessful. Status code: 404 Message: Not Found"
         )
 
@@ -234,6 +252,65 @@ async def test_fetch_data_in_bulk_exceed_cities_per_request(
         response = await open_weather_api_service.fetch_data_in_bulk(city_ids)
 
         assert response is False
-        mock_logger_error.assert_called_with(
+        assert logged_messages(mock_logger_error)[-1] == (
             "test_log - request wasn't sucessful. Status code: 408 Message: Exceeded cities per request limit"
         )
+
+
+@pytest.mark.asyncio
+async def test_client_session_is_shared_until_closed():
+    session = get_client_session()
+    assert get_client_session() is session
+
+    await close_client_session()
+
+    assert session.closed
+    new_session = get_client_session()
+    assert new_session is not session
+    await close_client_session()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("min_bytes", [0, 1024 * 1024])
+@patch("aiohttp.ClientSession.get")
+async def test_fetch_data_in_bulk_parses_in_executor(
+    mock_client_session, min_bytes, open_weather_api_service
+):
+    body = json.dumps(
+        {
+            "list": [
+                {"id": 123, "name": "A", "main": {"temp": 25, "humidity": 80}},
+                {"id": 456, "name": "B", "main": {"temp": 20, "humidity": 75}},
+            ]
+        }
+    ).encode()
+    mock_client_session.return_value.__aenter__.return_value.status = 200
+    mock_client_session.return_value.__aenter__.return_value.read = AsyncMock(
+        return_value=body
+    )
+
+    with patch.multiple(
+        settings,
+        PARSE_EXECUTOR=WeatherAPIConstants.THREAD_PARSE_EXECUTOR,
+        PARSE_EXECUTOR_MIN_BYTES=min_bytes,
+    ):
+        shutdown_parse_executor()
+        response_data = await open_weather_api_service.fetch_data_in_bulk(
+            ["123", "456"]
+        )
+        shutdown_parse_executor()
+
+    assert response_data == [
+        {"city_id": 123, "temperature": 25, "humidity": 80},
+        {"city_id": 456, "temperature": 20, "humidity": 75},
+    ]
+
+
+def test_parse_group_response_in_process_pool():
+    body = json.dumps({"list": [{"id": 1, "main": {"temp": 3, "humidity": 4}}]})
+
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        assert executor.submit(parse_group_response, body.encode()).result() == (
+            [{"city_id": 1, "temperature": 3, "humidity": 4}],
+            [],
+        )
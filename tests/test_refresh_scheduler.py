@@ -0,0 +1,183 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from weather_data_fetcher_service.core.models.weather_data_models import (
+    CityWeatherProcessData,
+    ProcessRefreshJob,
+)
+from weather_data_fetcher_service.core.repositories.memory_repository import (
+    InMemoryRepository,
+)
+from weather_data_fetcher_service.services.base_weather_api_service import (
+    BaseWeatherAPIService,
+)
+from weather_data_fetcher_service.process.refresh_scheduler import RefreshScheduler
+
+
+@pytest.fixture
+def repository():
+    return InMemoryRepository()
+
+
+@pytest.fixture
+def mock_weather_api_service():
+    service = AsyncMock(spec=BaseWeatherAPIService)
+    service.cities_per_minute = 60
+    service.cities_per_request = 20
+
+    async def fetch_data_in_bulk(cities_ids):
+        return [
+            {"city_id": int(city_id), "temperature": 20.0, "humidity": 50}
+            for city_id in cities_ids
+        ]
+
+    service.fetch_data_in_bulk = AsyncMock(side_effect=fetch_data_in_bulk)
+    return service
+
+
+@pytest.fixture
+def scheduler(repository, mock_weather_api_service):
+    refresh_scheduler = RefreshScheduler(
+        weather_API_service=lambda _: mock_weather_api_service,
+        repository=lambda: repository,
+    )
+    refresh_scheduler.logger = MagicMock()
+    return refresh_scheduler
+
+
+def build_job(process_id, priority=0, next_run_at=0.0, interval_seconds=60):
+    return ProcessRefreshJob(
+        process_id=process_id,
+        interval_seconds=interval_seconds,
+        priority=priority,
+        next_run_at=next_run_at,
+    )
+
+
+def test_order_due_jobs_by_priority(scheduler):
+    now = 1000.0
+    jobs = [
+        build_job(1, priority=0, next_run_at=now),
+        build_job(2, priority=5, next_run_at=now),
+        build_job(3, priority=9, next_run_at=now + 1),
+    ]
+
+    assert [job.process_id for job in scheduler.order_due_jobs(jobs, now)] == [2, 1]
+
+
+def test_order_due_jobs_ages_overdue_jobs(scheduler):
+    now = 1000.0
+    jobs = [
+        build_job(1, priority=1, next_run_at=now),
+        build_job(2, priority=0, next_run_at=now - 120, interval_seconds=60),
+    ]
+
+    assert [job.process_id for job in scheduler.order_due_jobs(jobs, now)] == [2, 1]
+
+
+@pytest.mark.asyncio
+async def test_register_and_unregister(scheduler):
+    await scheduler.register(build_job(1))
+    assert [job.process_id for job in await scheduler.list_jobs()] == [1]
+
+    assert await scheduler.unregister(1)
+    assert not await scheduler.unregister(1)
+    assert await scheduler.list_jobs() == []
+
+
+@pytest.mark.asyncio
+async def test_claim_job_reschedules_once(scheduler):
+    await scheduler.register(build_job(1, next_run_at=1000.0))
+
+    claimed_job = await scheduler.claim_job(1, 1000.0)
+
+    assert claimed_job.next_run_at == 1060.0
+    assert await scheduler.claim_job(1, 1000.0) is None
+
+
+@pytest.mark.asyncio
+async def test_claim_job_skips_locked_job(scheduler, repository):
+    await scheduler.register(build_job(1, next_run_at=1000.0))
+    await repository.acquire_lock("refresh:1", 60)
+
+    assert await scheduler.claim_job(1, 1000.0) is None
+
+
+@pytest.mark.asyncio
+async def test_run_due_jobs_refetches_only_stale_cities(
+    scheduler, repository, mock_weather_api_service
+):
+    now = int(time.time())
+    await repository.save_json_data(
+        1,
+        CityWeatherProcessData(
+            process_id=1,
+            cities_ids=["1", "2", "3"],
+            total_cities=3,
+            results=[
+                {"city_id": 1, "temperature": 10.0, "humidity": 10, "fetched_at": now},
+                {
+                    "city_id": 2,
+                    "temperature": 10.0,
+                    "humidity": 10,
+                    "fetched_at": now - 120,
+                },
+            ],
+        ).to_json(),
+    )
+    await scheduler.register(build_job(1, next_run_at=now - 1))
+
+    await scheduler.run_due_jobs()
+
+    mock_weather_api_service.fetch_data_in_bulk.assert_called_once_with(["2", "3"])
+
+    stored_process_data = await repository.fetch_json_data(1)
+    assert {
+        result["city_id"]: result["temperature"]
+        for result in stored_process_data["results"]
+    } == {1: 10.0, 2: 20.0, 3: 20.0}
+
+    job = await scheduler.get_job(1)
+    assert job.last_status == 200
+    assert job.next_run_at > now
+
+
+@pytest.mark.asyncio
+async def test_run_due_jobs_ignores_jobs_not_due(
+    scheduler, repository, mock_weather_api_service
+):
+    await repository.save_json_data(
+        1, CityWeatherProcessData(process_id=1, cities_ids=["1"]).to_json()
+    )
+    await scheduler.register(build_job(1, next_run_at=time.time() + 60))
+
+    await scheduler.run_due_jobs()
+
+    mock_weather_api_service.fetch_data_in_bulk.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_run_due_jobs_runs_jobs_concurrently_weighted_by_priority(scheduler):
+    now = time.time()
+    await scheduler.register(build_job(1, priority=0, next_run_at=now))
+    await scheduler.register(build_job(2, priority=2, next_run_at=now))
+
+    started = asyncio.Event()
+    running_jobs = []
+    weights = {}
+
+    async def run_job(job, weight):
+        running_jobs.append(job.process_id)
+        weights[job.process_id] = weight
+        if len(running_jobs) == 2:
+            started.set()
+        await started.wait()
+
+    scheduler.run_job = run_job
+
+    await asyncio.wait_for(scheduler.run_due_jobs(), timeout=1)
+
+    assert running_jobs == [2, 1]
+    assert weights[2] / weights[1] == pytest.approx(4, rel=1e-3)
@@ -0,0 +1,444 @@
+import time
+import uuid
+import pytest
+from functools import lru_cache
+from unittest.mock import patch
+
+from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.constants import RepositoryConstants
+from weather_data_fetcher_service.core.repositories.memory_repository import (
+    InMemoryRepository,
+)
+from weather_data_fetcher_service.core.repositories.sqlite_repository import (
+    SQLiteRepository,
+)
+
+
+@lru_cache(maxsize=None)
+def redis_repository_or_none():
+    from weather_data_fetcher_service.core.repositories.redis_repository import (
+        RedisRepository,
+    )
+
+    repository = RedisRepository()
+    try:
+        repository._redis.ping()
+    except Exception:
+        return None
+    return repository
+
+
+def build_redis_repository(tmp_path):
+    repository = redis_repository_or_none()
+    if repository is None:
+        pytest.skip("Redis server is not reachable")
+    return repository
+
+
+REPOSITORY_BUILDERS = {
+    "memory": lambda tmp_path: InMemoryRepository(),
+    "sqlite": lambda tmp_path: SQLiteRepository(str(tmp_path / "weather_data.db")),
+    "redis": build_redis_repository,
+}
+
+
+@pytest.fixture(params=REPOSITORY_BUILDERS.keys())
+def repository(request, tmp_path):
+    return REPOSITORY_BUILDERS[request.param](tmp_path)
+
+
+@pytest.fixture
+def process_id():
+    # Random ids keep runs against a shared Redis server independent.
+    return uuid.uuid4().int % 10**12
+
+
+@pytest.mark.asyncio
+async def test_fetch_missing_json_data(repository, process_id):
+    assert await repository.fetch_json_data(process_id) is None
+
+
+@pytest.mark.asyncio
+async def test_save_and_fetch_json_string(repository, process_id):
+    await repository.save_json_data(process_id, '{"process_id": 1, "cities_ids": [1]}')
+    assert await repository.fetch_json_data(process_id) == {
+        "process_id": 1,
+        "cities_ids": [1],
+    }
+
+
+@pytest.mark.asyncio
+async def test_save_and_fetch_json_dict(repository, process_id):
+    await repository.save_json_data(process_id, {"process_id": 1})
+    assert await repository.fetch_json_data(process_id) == {"process_id": 1}
+
+
+@pytest.mark.asyncio
+async def test_save_json_data_overwrites(repository, process_id):
+    await repository.save_json_data(process_id, {"process_id": 1})
+    await repository.save_json_data(process_id, {"process_id": 2})
+    assert await repository.fetch_json_data(process_id) == {"process_id": 2}
+
+
+@pytest.mark.asyncio
+async def test_append_json_data_returns_length(repository, process_id):
+    assert await repository.append_json_data(process_id, "results", [1, 2]) == 2
+    assert await repository.append_json_data(process_id, "results", [3]) == 3
+    assert await repository.append_json_data(process_id, "results", []) == 3
+
+
+@pytest.mark.asyncio
+async def test_append_json_data_keeps_the_last_items(repository, process_id):
+    await repository.append_json_data(process_id, "results", [0, 1, 2], max_length=4)
+    assert (
+        await repository.append_json_data(process_id, "results", [3, 4], max_length=4)
+        == 4
+    )
+    assert await repository.fetch_json_range(process_id, "results") == [1, 2, 3, 4]
+    assert await repository.fetch_json_range(process_id, "results", 1, 2) == [2, 3]
+
+
+@pytest.mark.asyncio
+async def test_append_json_data_keys_are_independent(repository, process_id):
+    await repository.append_json_data(process_id, "results", [{"city_id": 1}])
+    await repository.append_json_data(process_id, "other", [{"city_id": 2}])
+    assert await repository.fetch_json_range(process_id, "results") == [{"city_id": 1}]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "start, end, expected",
+    [
+        (0, -1, [0, 1, 2, 3, 4]),
+        (1, 3, [1, 2, 3]),
+        (-2, -1, [3, 4]),
+        (3, 10, [3, 4]),
+        (-10, 1, [0, 1]),
+        (4, 2, []),
+        (0, -10, []),
+        (10, 20, []),
+    ],
+)
+async def test_fetch_json_range(repository, process_id, start, end, expected):
+    await repository.append_json_data(process_id, "results", [0, 1, 2, 3, 4])
+    assert (
+        await repository.fetch_json_range(process_id, "results", start, end) == expected
+    )
+
+
+@pytest.mark.asyncio
+async def test_fetch_json_range_missing_key(repository, process_id):
+    assert await repository.fetch_json_range(process_id, "results") == []
+
+
+@pytest.mark.asyncio
+async def test_save_and_fetch_segments(repository, process_id):
+    await repository.save_segment(process_id, "segments", 1, b"second")
+    await repository.save_segment(process_id, "segments", 0, b"first")
+    assert await repository.fetch_segments(process_id, "segments") == [
+        b"first",
+        b"second",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_save_segment_overwrites(repository, process_id):
+    await repository.save_segment(process_id, "segments", 0, b"partial")
+    await repository.save_segment(process_id, "segments", 0, b"full")
+    assert await repository.fetch_segments(process_id, "segments") == [b"full"]
+
+
+@pytest.mark.asyncio
+async def test_fetch_segments_missing_key(repository, process_id):
+    assert await repository.fetch_segments(process_id, "segments") == []
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    class Clock:
+        now = 1_000_000.0
+
+        def advance(self, seconds):
+            self.now += seconds
+
+    fake_clock = Clock()
+    monkeypatch.setattr(time, "time", lambda: fake_clock.now)
+    return fake_clock
+
+
+@pytest.fixture
+def local_repository(request, tmp_path):
+    return REPOSITORY_BUILDERS[request.param](tmp_path)
+
+
+@pytest.mark.asyncio
+async def test_delete_process(repository, process_id):
+    await repository.save_json_data(process_id, {"process_id": 1})
+    await repository.append_json_data(process_id, "results", [1])
+    await repository.save_segment(process_id, "segments", 0, b"segment")
+
+    await repository.delete_process(process_id)
+
+    assert await repository.fetch_json_data(process_id) is None
+    assert await repository.fetch_json_range(process_id, "results") == []
+    assert await repository.fetch_segments(process_id, "segments") == []
+
+
+@pytest.mark.asyncio
+async def test_documents_are_namespaced_by_key(repository, process_id):
+    await repository.save_json_data(process_id, {"kind": "meta"})
+    await repository.save_json_data(process_id, {"kind": "other"}, key="other")
+
+    assert await repository.fetch_json_data(process_id) == {"kind": "meta"}
+    assert await repository.fetch_json_data(process_id, key="other") == {
+        "kind": "other"
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("local_repository", ["memory", "sqlite"], indirect=True)
+async def test_process_expires_after_ttl(local_repository, clock):
+    with patch.object(settings, "PROCESS_TTL_IN_SECONDS", 60):
+        await local_repository.save_json_data(1, {"process_id": 1})
+        await local_repository.append_json_data(1, "results", [1])
+
+        clock.advance(59)
+        assert await local_repository.fetch_json_data(1) == {"process_id": 1}
+
+        clock.advance(1)
+        assert await local_repository.fetch_json_data(1) is None
+        assert await local_repository.fetch_json_range(1, "results") == []
+
+
+@pytest.mark.asyncio
+async def test_redis_drops_expired_processes_from_the_index(tmp_path, clock):
+    repository = build_redis_repository(tmp_path)
+    expired_id, live_id = [uuid.uuid4().int % 10**12 for _ in range(2)]
+
+    with patch.object(settings, "PROCESS_TTL_IN_SECONDS", 60):
+        await repository.save_json_data(expired_id, {"process_id": 1})
+        clock.advance(61)
+        await repository.save_json_data(live_id, {"process_id": 2})
+
+    for index_key in [
+        RepositoryConstants.PROCESS_INDEX_KEY,
+        RepositoryConstants.PROCESS_EXPIRY_INDEX_KEY,
+    ]:
+        assert repository._redis.zscore(index_key, str(expired_id)) is None
+        assert repository._redis.zscore(index_key, str(live_id)) is not None
+    await repository.delete_process(live_id)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("local_repository", ["memory", "sqlite"], indirect=True)
+async def test_writes_refresh_ttl(local_repository, clock):
+    with patch.object(settings, "PROCESS_TTL_IN_SECONDS", 60):
+        await local_repository.save_json_data(1, {"process_id": 1})
+        clock.advance(50)
+        await local_repository.append_json_data(1, "results", [1])
+        clock.advance(50)
+
+        assert await local_repository.fetch_json_data(1) == {"process_id": 1}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("local_repository", ["memory", "sqlite"], indirect=True)
+async def test_lru_eviction_keeps_recently_read_processes(local_repository, clock):
+    with patch.object(settings, "MAX_STORED_PROCESSES", 2), patch.object(
+        settings, "PROCESS_EVICTION_POLICY", RepositoryConstants.LRU_EVICTION_POLICY
+    ):
+        await local_repository.save_json_data(1, {"process_id": 1})
+        clock.advance(1)
+        await local_repository.save_json_data(2, {"process_id": 2})
+        clock.advance(1)
+        await local_repository.fetch_json_data(1)
+        clock.advance(1)
+        await local_repository.save_json_data(3, {"process_id": 3})
+
+        assert await local_repository.fetch_json_data(1) == {"process_id": 1}
+        assert await local_repository.fetch_json_data(2) is None
+        assert await local_repository.fetch_json_data(3) == {"process_id": 3}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("local_repository", ["memory", "sqlite"], indirect=True)
+async def test_age_eviction_removes_oldest_created_process(local_repository, clock):
+    with patch.object(settings, "MAX_STORED_PROCESSES", 2), patch.object(
+        settings, "PROCESS_EVICTION_POLICY", RepositoryConstants.AGE_EVICTION_POLICY
+    ):
+        await local_repository.save_json_data(1, {"process_id": 1})
+        clock.advance(1)
+        await local_repository.save_json_data(2, {"process_id": 2})
+        clock.advance(1)
+        await local_repository.save_json_data(1, {"process_id": 1, "updated": True})
+        clock.advance(1)
+        await local_repository.save_json_data(3, {"process_id": 3})
+
+        assert await local_repository.fetch_json_data(1) is None
+        assert await local_repository.fetch_json_data(2) == {"process_id": 2}
+        assert await local_repository.fetch_json_data(3) == {"process_id": 3}
+
+
+@pytest.mark.asyncio
+async def test_save_and_fetch_index_entry(repository, process_id):
+    index = f"test-{process_id}"
+    assert await repository.fetch_index_entry(index, "fingerprint") is None
+
+    await repository.save_index_entry(index, "fingerprint", process_id)
+    assert await repository.fetch_index_entry(index, "fingerprint") == process_id
+
+
+@pytest.mark.asyncio
+async def test_index_entries_survive_process_deletion(repository, process_id):
+    index = f"test-{process_id}"
+    await repository.save_json_data(process_id, {"process_id": process_id})
+    await repository.save_index_entry(index, "fingerprint", process_id)
+
+    await repository.delete_process(process_id)
+
+    assert await repository.fetch_index_entry(index, "fingerprint") == process_id
+
+
+@pytest.mark.asyncio
+async def test_process_index_entries_are_deleted_with_the_process(
+    repository, process_id
+):
+    index = f"test-{process_id}"
+    other_process_id = process_id + 1
+    await repository.save_json_data(process_id, {"process_id": process_id})
+    await repository.save_index_entry(index, "1", process_id, process_id=process_id)
+    await repository.save_index_entry(index, "2", process_id, process_id=process_id)
+    # Saved again by another process, the entry is no longer the process's.
+    await repository.save_index_entry(
+        index, "2", other_process_id, process_id=other_process_id
+    )
+
+    await repository.delete_process(process_id)
+
+    assert await repository.fetch_index(index) == {"2": other_process_id}
+    await repository.delete_index_entry(index, "2")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("local_repository", ["memory", "sqlite"], indirect=True)
+async def test_process_index_entries_expire_with_the_process(local_repository, clock):
+    with patch.object(settings, "PROCESS_TTL_IN_SECONDS", 60):
+        await local_repository.save_json_data(1, {"process_id": 1})
+        await local_repository.save_index_entry("test", "1", 1, process_id=1)
+
+        clock.advance(60)
+        assert await local_repository.fetch_json_data(1) is None
+        assert await local_repository.fetch_index_entry("test", "1") is None
+
+
+@pytest.mark.asyncio
+async def test_fetch_and_delete_index_entries(repository, process_id):
+    index = f"test-{process_id}"
+    assert await repository.fetch_index(index) == {}
+
+    await repository.save_index_entry(index, "1", {"interval": 60})
+    await repository.save_index_entry(index, "2", {"interval": 120})
+    await repository.delete_index_entry(index, "1")
+
+    assert await repository.fetch_index(index) == {"2": {"interval": 120}}
+
+
+@pytest.mark.asyncio
+async def test_lock_is_exclusive_until_released(repository, process_id):
+    name = f"test-{process_id}"
+    assert await repository.acquire_lock(name, 60)
+    assert not await repository.acquire_lock(name, 60)
+
+    await repository.release_lock(name)
+    assert await repository.acquire_lock(name, 60)
+    await repository.release_lock(name)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("local_repository", ["memory", "sqlite"], indirect=True)
+async def test_lock_expires_after_ttl(local_repository, clock):
+    assert await local_repository.acquire_lock("refresh", 60)
+    clock.advance(60)
+    assert await local_repository.acquire_lock("refresh", 60)
+
+
+@pytest.mark.asyncio
+async def test_append_and_fetch_samples(repository, process_id):
+    series = f"city:{process_id}:temperature"
+    now = int(time.time())
+    await repository.append_samples(
+        [(series, now - 120, 20.0), (series, now - 60, 21.5), (series, now, 23.0)]
+    )
+
+    assert await repository.fetch_samples(series, now - 90, now) == [
+        [now - 60, 21.5],
+        [now, 23.0],
+    ]
+    assert await repository.fetch_samples(f"{series}:missing", now - 90, now) == []
+
+
+@pytest.mark.asyncio
+async def test_fetch_samples_aggregated_in_buckets(repository, process_id):
+    series = f"city:{process_id}:humidity"
+    bucket = int(time.time()) // 3600 * 3600 - 3600
+    await repository.append_samples(
+        [(series, bucket, 50), (series, bucket + 600, 70), (series, bucket + 3600, 90)]
+    )
+
+    assert await repository.fetch_samples(
+        series, bucket, bucket + 3600, aggregation="avg", bucket_seconds=3600
+    ) == [[bucket, 60.0], [bucket + 3600, 90.0]]
+    assert await repository.fetch_samples(
+        series, bucket, bucket + 3600, aggregation="max", bucket_seconds=3600
+    ) == [[bucket, 70.0], [bucket + 3600, 90.0]]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("local_repository", ["memory", "sqlite"], indirect=True)
+async def test_old_ranges_are_served_from_downsampled_samples(local_repository, clock):
+    with patch.object(settings, "TIMESERIES_RETENTION_IN_SECONDS", 3600), patch.object(
+        settings, "TIMESERIES_DOWNSAMPLE_BUCKET_IN_SECONDS", 600
+    ):
+        start = int(clock.now) // 600 * 600
+        await local_repository.append_samples(
+            [
+                ("city:1:temperature", start, 10.0),
+                ("city:1:temperature", start + 60, 20.0),
+            ]
+        )
+        clock.advance(7200)
+        await local_repository.append_samples(
+            [("city:1:temperature", int(clock.now), 30.0)]
+        )
+
+        assert await local_repository.fetch_samples(
+            "city:1:temperature", start, start + 600
+        ) == [[start, 15.0]]
+        assert await local_repository.fetch_samples(
+            "city:1:temperature", int(clock.now) - 60, int(clock.now)
+        ) == [[int(clock.now), 30.0]]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("local_repository", ["memory", "sqlite"], indirect=True)
+async def test_replaced_samples_are_replaced_in_their_bucket(local_repository, clock):
+    with patch.object(settings, "TIMESERIES_RETENTION_IN_SECONDS", 3600), patch.object(
+        settings, "TIMESERIES_DOWNSAMPLE_BUCKET_IN_SECONDS", 600
+    ):
+        start = int(clock.now) // 600 * 600
+        await local_repository.append_samples([("city:1:temperature", start, 10.0)])
+        await local_repository.append_samples(
+            [
+                ("city:1:temperature", start, 15.0),
+                ("city:1:temperature", start, 20.0),
+                ("city:1:temperature", start + 1, 20.0),
+            ]
+        )
+        clock.advance(7200)
+        await local_repository.append_samples(
+            [("city:1:temperature", int(clock.now), 30.0)]
+        )
+
+        assert await local_repository.fetch_samples(
+            "city:1:temperature", start, start + 600
+        ) == [[start, 20.0]]
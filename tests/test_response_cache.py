@@ -0,0 +1,148 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from weather_data_fetcher_service.core.models.weather_data_models import (
+    CityWeatherProcessData,
+)
+from weather_data_fetcher_service.core.repositories.memory_repository import (
+    InMemoryRepository,
+)
+from weather_data_fetcher_service.process.weather_data_process import (
+    CityWeatherDataProcesser,
+)
+from weather_data_fetcher_service.rest import views
+from weather_data_fetcher_service.rest.response_cache import (
+    ResponseCache,
+    etag_matches,
+    negotiate_encoding,
+)
+from weather_data_fetcher_service.rest.routes import app1
+from weather_data_fetcher_service.services.base_weather_api_service import (
+    BaseWeatherAPIService,
+)
+
+
+def test_negotiate_encoding():
+    with patch("weather_data_fetcher_service.rest.response_cache.brotli", None):
+        assert negotiate_encoding("gzip, deflate, br") == "gzip"
+        assert negotiate_encoding("br") is None
+        assert negotiate_encoding("gzip;q=0, *") is None
+        assert negotiate_encoding("*") == "gzip"
+        assert negotiate_encoding(None) is None
+
+    with patch("weather_data_fetcher_service.rest.response_cache.brotli", MagicMock()):
+        assert negotiate_encoding("gzip, br") == "br"
+        assert negotiate_encoding("gzip, br;q=0") == "gzip"
+
+
+def test_etag_matches():
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"a"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"a"')
+
+
+def test_response_cache_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.put('"a"', None, (b"a", None))
+    cache.put('"b"', None, (b"b", None))
+    cache.get('"a"', None)
+    cache.put('"c"', None, (b"c", None))
+
+    assert cache.get('"a"', None) == (b"a", None)
+    assert cache.get('"b"', None) is None
+
+
+@pytest.fixture
+def repository():
+    return InMemoryRepository()
+
+
+@pytest.fixture
+def client(repository):
+    with patch.object(views, "get_repository", lambda: repository), patch.object(
+        views, "response_cache", ResponseCache(max_entries=8)
+    ):
+        yield TestClient(app1)
+
+
+async def process_cities(repository, total_cities):
+    await repository.save_json_data(
+        1,
+        CityWeatherProcessData(
+            process_id=1, cities_ids=[str(city_id) for city_id in range(total_cities)]
+        ).to_json(),
+    )
+
+    weather_api_service = AsyncMock(spec=BaseWeatherAPIService)
+    weather_api_service.cities_per_minute = 60
+    weather_api_service.cities_per_request = total_cities
+
+    async def fetch_data_in_bulk(cities_ids):
+        return [
+            {"city_id": int(city_id), "temperature": 20.5, "humidity": 50}
+            for city_id in cities_ids
+        ]
+
+    weather_api_service.fetch_data_in_bulk = AsyncMock(side_effect=fetch_data_in_bulk)
+
+    processor = CityWeatherDataProcesser(
+        lambda _: weather_api_service,
+        lambda: repository,
+        CityWeatherProcessData(process_id=1),
+    )
+    processor.logger = MagicMock()
+    await processor.execute()
+
+
+@pytest.mark.asyncio
+async def test_finished_process_is_cached_with_etag(client, repository):
+    await process_cities(repository, 50)
+
+    response = client.get(
+        "/get-city-data-process",
+        params={"process_id": 1},
+        headers={"Accept-Encoding": "gzip"},
+    )
+    etag = response.headers["ETag"]
+
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert len(response.json()["results"]) == 50
+    assert views.response_cache.get(etag, "gzip") is not None
+
+    not_modified = client.get(
+        "/get-city-data-process",
+        params={"process_id": 1},
+        headers={"If-None-Match": etag},
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+
+
+@pytest.mark.asyncio
+async def test_etag_changes_when_process_is_stored_again(client, repository):
+    await process_cities(repository, 2)
+    first_etag = client.get("/get-city-data-process", params={"process_id": 1}).headers[
+        "ETag"
+    ]
+
+    await process_cities(repository, 2)
+    response = client.get(
+        "/get-city-data-process",
+        params={"process_id": 1},
+        headers={"If-None-Match": first_etag},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != first_etag
+    assert "Content-Encoding" not in response.headers
+
+
+def test_missing_process_has_no_etag(client):
+    response = client.get("/get-city-data-process", params={"process_id": 404})
+
+    assert response.status_code == 404
+    assert "ETag" not in response.headers
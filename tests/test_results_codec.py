@@ -0,0 +1,86 @@
+import pytest
+from unittest.mock import patch
+
+from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.repositories.memory_repository import (
+    InMemoryRepository,
+)
+from weather_data_fetcher_service.core.repositories.results_codec import (
+    encode_results_segment,
+    decode_results_segment,
+    save_results_segments,
+    fetch_results_segments,
+    SEGMENTS_KEY,
+)
+
+
+def build_results(total):
+    return [
+        {"city_id": 3439525 + i, "temperature": i * 0.5, "humidity": i % 100}
+        for i in range(total)
+    ]
+
+
+def test_encode_decode_roundtrip():
+    results = build_results(50)
+    assert decode_results_segment(encode_results_segment(results)) == results
+
+
+def test_encode_decode_keeps_integer_and_float_types():
+    results = [
+        {"city_id": 1, "temperature": 25, "humidity": 80},
+        {"city_id": 2, "temperature": 20.5, "humidity": 75},
+    ]
+    decoded = decode_results_segment(encode_results_segment(results))
+    assert type(decoded[0]["city_id"]) is int
+    assert type(decoded[1]["temperature"]) is float
+    assert decoded[0]["temperature"] == 25
+
+
+def test_encode_decode_non_numeric_column():
+    results = [{"city_id": 1, "name": "Montevideo"}, {"city_id": 2, "name": None}]
+    assert decode_results_segment(encode_results_segment(results)) == results
+
+
+def test_encode_decode_empty_segment():
+    assert decode_results_segment(encode_results_segment([])) == []
+
+
+def test_encoded_segment_is_smaller_than_json():
+    import json
+
+    results = build_results(1000)
+    assert len(encode_results_segment(results)) < len(json.dumps(results)) / 3
+
+
+def test_decode_invalid_segment():
+    with pytest.raises(ValueError):
+        decode_results_segment(b"not a segment")
+
+
+@pytest.mark.asyncio
+async def test_save_results_segments_rewrites_only_from_start():
+    repository = InMemoryRepository()
+    results = build_results(25)
+
+    with patch.object(settings, "RESULTS_SEGMENT_SIZE", 10):
+        await save_results_segments(repository, 1, results[:15])
+        await repository.save_segment(1, SEGMENTS_KEY, 0, b"untouched")
+        await save_results_segments(repository, 1, results, start=15)
+
+    segments = await repository.fetch_segments(1, SEGMENTS_KEY)
+    assert len(segments) == 3
+    assert segments[0] == b"untouched"
+    assert decode_results_segment(segments[1]) == results[10:20]
+    assert decode_results_segment(segments[2]) == results[20:25]
+
+
+@pytest.mark.asyncio
+async def test_fetch_results_segments():
+    repository = InMemoryRepository()
+    results = build_results(25)
+
+    with patch.object(settings, "RESULTS_SEGMENT_SIZE", 10):
+        await save_results_segments(repository, 1, results)
+
+    assert await fetch_results_segments(repository, 1) == results
@@ -1,5 +1,7 @@
+import json
+import time
 import pytest
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock, MagicMock, call, patch
 
 from weather_data_fetcher_service.process.base_process import ProcessResponse
 from weather_data_fetcher_service.core.models.weather_data_models import (
@@ -11,18 +13,37 @@ from weather_data_fetcher_service.services.base_weather_api_service import (
 from weather_data_fetcher_service.core.repositories.base_repository import (
     BaseRepository,
 )
+from weather_data_fetcher_service.core.repositories.memory_repository import (
+    InMemoryRepository,
+)
+from weather_data_fetcher_service.core.constants import RepositoryConstants
+from weather_data_fetcher_service.core import settings
 from weather_data_fetcher_service.process.weather_data_process import (
     UploadCityListProcesser,
     CityWeatherDataProcesser,
     CityWeatherDataFetcher,
+    CityDataChangesFetcher,
 )  # Replace 'your_module' with the actual module name
+from weather_data_fetcher_service.rest import views
+from weather_data_fetcher_service.rest.parameters import ReprocessParameter
+
+
+def without_fetched_at(results):
+    return [
+        {key: value for key, value in result.items() if key != "fetched_at"}
+        for result in results
+    ]
 
 
 @pytest.fixture
 def mock_repository():
     repo = AsyncMock(spec=BaseRepository)
     repo.save_json_data = AsyncMock()
-    repo.fetch_json_data = AsyncMock()
+    repo.fetch_json_data = AsyncMock(return_value=None)
+    repo.delete_process = AsyncMock()
+    repo.fetch_index_entry = AsyncMock(return_value=None)
+    repo.save_index_entry = AsyncMock()
+    repo.fetch_index = AsyncMock(return_value={})
     return repo
 
 
@@ -73,7 +94,13 @@ async def test_upload_city_list_processor_execute_success(
     upload_city_list_processor, mock_repository
 ):
     response = await upload_city_list_processor.execute()
-    mock_repository.save_json_data.assert_called_once()
+    assert mock_repository.save_json_data.call_args_list == [
+        call(
+            id=1,
+            data=upload_city_list_processor.process_data.to_json(),
+        ),
+        call(1, {"total_cities": 3}, key=RepositoryConstants.SIZE_KEY),
+    ]
     upload_city_list_processor.logger.info.assert_called_with(
         f"{upload_city_list_processor.log_identifier} Data Uploaded successfully."
     )
@@ -235,3 +262,725 @@ async def test_city_weather_data_fetcher_execute_failure(
 
     assert response.status == 500
     assert response.message == "An internal error occurred."
+
+
+@pytest.mark.asyncio
+async def test_packed_results_are_decoded_by_fetcher(mock_weather_api_service):
+    repository = InMemoryRepository()
+    await repository.save_json_data(
+        1, CityWeatherProcessData(process_id=1, cities_ids=[1, 2, 3]).to_json()
+    )
+    mock_weather_api_service.cities_per_minute = 60
+    mock_weather_api_service.cities_per_request = 2
+    mock_weather_api_service.fetch_data_in_bulk.side_effect = [
+        [
+            {"city_id": 1, "temperature": 25.5, "humidity": 80},
+            {"city_id": 2, "temperature": 20.0, "humidity": 75},
+        ],
+        [{"city_id": 3, "temperature": 18.25, "humidity": 70}],
+    ]
+
+    with patch.object(
+        settings,
+        "RESULTS_STORAGE_FORMAT",
+        RepositoryConstants.PACKED_RESULTS_FORMAT,
+    ):
+        processor = CityWeatherDataProcesser(
+            lambda _: mock_weather_api_service,
+            lambda: repository,
+            CityWeatherProcessData(process_id=1),
+        )
+        processor.logger = MagicMock()
+        await processor.execute()
+
+    stored_process_data = await repository.fetch_json_data(1)
+    assert stored_process_data["results"] is None
+    assert stored_process_data["processed_cities"] == 3
+
+    fetcher = CityWeatherDataFetcher(
+        lambda: repository, CityWeatherProcessData(process_id=1)
+    )
+    fetcher.logger = MagicMock()
+    response = await fetcher.execute()
+
+    assert response.status == 200
+    assert response.data["progress_percent"] == "100.00%"
+    assert all("fetched_at" in result for result in response.data["results"])
+    assert without_fetched_at(response.data["results"]) == [
+        {"city_id": 1, "temperature": 25.5, "humidity": 80},
+        {"city_id": 2, "temperature": 20.0, "humidity": 75},
+        {"city_id": 3, "temperature": 18.25, "humidity": 70},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_upload_city_list_processor_rejects_existing_process_id(
+    upload_city_list_processor, mock_repository
+):
+    mock_repository.fetch_json_data.return_value = {"process_id": 1}
+
+    response = await upload_city_list_processor.execute()
+
+    mock_repository.save_json_data.assert_not_called()
+    assert response.status == 409
+    assert response.message == "Process ID already in use."
+
+
+@pytest.mark.asyncio
+async def test_upload_city_list_processor_overwrites_existing_process_id(
+    mock_repository,
+):
+    mock_repository.fetch_json_data.return_value = {"process_id": 1}
+    processor = UploadCityListProcesser(
+        CityWeatherProcessData(process_id=1, cities_ids=[1, 2, 3]),
+        lambda: mock_repository,
+        overwrite=True,
+    )
+    processor.logger = MagicMock()
+
+    response = await processor.execute()
+
+    mock_repository.delete_process.assert_called_once_with(1)
+    assert mock_repository.save_json_data.call_count == 2
+    assert response.status == 200
+
+
+def test_cities_fingerprint_ignores_order_duplicates_and_types():
+    fingerprint = CityWeatherProcessData(
+        process_id=1, cities_ids=["3", "1", "2"]
+    ).cities_fingerprint()
+
+    assert (
+        CityWeatherProcessData(
+            process_id=2, cities_ids=[1, 2, 3, 3]
+        ).cities_fingerprint()
+        == fingerprint
+    )
+    assert (
+        CityWeatherProcessData(process_id=3, cities_ids=[1, 2]).cities_fingerprint()
+        != fingerprint
+    )
+
+
+async def upload_and_process(
+    repository, weather_api_service, process_id, cities_ids, force_refresh=False
+):
+    uploader = UploadCityListProcesser(
+        CityWeatherProcessData(process_id=process_id, cities_ids=cities_ids),
+        lambda: repository,
+        force_refresh=force_refresh,
+    )
+    uploader.logger = MagicMock()
+    await uploader.execute()
+
+    processor = CityWeatherDataProcesser(
+        lambda _: weather_api_service,
+        lambda: repository,
+        CityWeatherProcessData(process_id=process_id),
+        force_refresh=force_refresh,
+    )
+    processor.logger = MagicMock()
+    return await processor.execute()
+
+
+@pytest.fixture
+def deduplication_weather_api_service(mock_weather_api_service):
+    mock_weather_api_service.cities_per_minute = 60
+    mock_weather_api_service.cities_per_request = 20
+    mock_weather_api_service.fetch_data_in_bulk.return_value = [
+        {"city_id": 1, "temperature": 25.5, "humidity": 80},
+        {"city_id": 2, "temperature": 20.0, "humidity": 75},
+    ]
+    return mock_weather_api_service
+
+
+@pytest.mark.asyncio
+async def test_identical_city_list_reuses_fresh_results(
+    deduplication_weather_api_service,
+):
+    repository = InMemoryRepository()
+    await upload_and_process(repository, deduplication_weather_api_service, 1, [1, 2])
+
+    response = await upload_and_process(
+        repository, deduplication_weather_api_service, 2, ["2", "1"]
+    )
+
+    assert response.status == 200
+    assert response.message == "Results reused from process 1."
+    deduplication_weather_api_service.fetch_data_in_bulk.assert_called_once()
+    assert (await repository.fetch_json_data(2))["source_process_id"] == 1
+
+    fetcher = CityWeatherDataFetcher(
+        lambda: repository, CityWeatherProcessData(process_id=2)
+    )
+    fetcher.logger = MagicMock()
+    fetched = await fetcher.execute()
+
+    assert fetched.status == 200
+    assert fetched.data["process_id"] == 2
+    assert fetched.data["progress_percent"] == "100.00%"
+    assert without_fetched_at(fetched.data["results"]) == [
+        {"city_id": 1, "temperature": 25.5, "humidity": 80},
+        {"city_id": 2, "temperature": 20.0, "humidity": 75},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_force_refresh_fetches_identical_city_list(
+    deduplication_weather_api_service,
+):
+    repository = InMemoryRepository()
+    await upload_and_process(repository, deduplication_weather_api_service, 1, [1, 2])
+
+    response = await upload_and_process(
+        repository, deduplication_weather_api_service, 2, [1, 2], force_refresh=True
+    )
+
+    assert response.message == "Process finished successfully."
+    assert deduplication_weather_api_service.fetch_data_in_bulk.call_count == 2
+    assert (await repository.fetch_json_data(2))["source_process_id"] is None
+
+
+@pytest.mark.asyncio
+async def test_stale_results_are_not_reused(deduplication_weather_api_service):
+    repository = InMemoryRepository()
+    await upload_and_process(repository, deduplication_weather_api_service, 1, [1, 2])
+
+    with patch.object(settings, "DEDUP_FRESHNESS_IN_SECONDS", 0):
+        response = await upload_and_process(
+            repository, deduplication_weather_api_service, 2, [1, 2]
+        )
+
+    assert response.message == "Process finished successfully."
+    assert deduplication_weather_api_service.fetch_data_in_bulk.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_overwritten_process_is_not_reused(deduplication_weather_api_service):
+    repository = InMemoryRepository()
+    await upload_and_process(repository, deduplication_weather_api_service, 1, [1, 2])
+
+    uploader = UploadCityListProcesser(
+        CityWeatherProcessData(process_id=1, cities_ids=[3, 4]),
+        lambda: repository,
+        overwrite=True,
+    )
+    uploader.logger = MagicMock()
+    await uploader.execute()
+
+    assert (
+        await repository.fetch_index_entry(
+            RepositoryConstants.FINGERPRINTS_INDEX,
+            CityWeatherProcessData(process_id=0, cities_ids=[1, 2]).cities_fingerprint(),
+        )
+        is None
+    )
+
+    await process_cities(repository, deduplication_weather_api_service, 1)
+    response = await upload_and_process(
+        repository, deduplication_weather_api_service, 2, [1, 2]
+    )
+
+    assert response.message == "Process finished successfully."
+    assert (await repository.fetch_json_data(2))["source_process_id"] is None
+
+
+@pytest.mark.asyncio
+async def test_stale_fingerprint_entry_is_dropped_on_lookup(
+    deduplication_weather_api_service,
+):
+    repository = InMemoryRepository()
+    fingerprint = CityWeatherProcessData(
+        process_id=0, cities_ids=[1, 2]
+    ).cities_fingerprint()
+    # Left behind by a process that no longer exists.
+    await repository.save_index_entry(
+        RepositoryConstants.FINGERPRINTS_INDEX, fingerprint, 9
+    )
+
+    uploader = UploadCityListProcesser(
+        CityWeatherProcessData(process_id=1, cities_ids=[1, 2]), lambda: repository
+    )
+    uploader.logger = MagicMock()
+    await uploader.execute()
+
+    assert (await repository.fetch_json_data(1))["source_process_id"] is None
+    assert (
+        await repository.fetch_index_entry(
+            RepositoryConstants.FINGERPRINTS_INDEX, fingerprint
+        )
+        is None
+    )
+
+
+@pytest.mark.asyncio
+async def test_source_overwritten_after_reuse_is_not_served(
+    deduplication_weather_api_service,
+):
+    repository = InMemoryRepository()
+    await upload_and_process(repository, deduplication_weather_api_service, 1, [1, 2])
+    await upload_and_process(repository, deduplication_weather_api_service, 2, [1, 2])
+
+    # Process 1 takes another city list after process 2 started reusing it.
+    await repository.save_json_data(
+        1,
+        {
+            **await repository.fetch_json_data(1),
+            "fingerprint": CityWeatherProcessData(
+                process_id=0, cities_ids=[3, 4]
+            ).cities_fingerprint(),
+        },
+    )
+
+    fetcher = CityWeatherDataFetcher(
+        lambda: repository, CityWeatherProcessData(process_id=2)
+    )
+    fetcher.logger = MagicMock()
+    assert (await fetcher.execute()).status == 404
+
+    response = await process_cities(repository, deduplication_weather_api_service, 2)
+    assert response.message == "Process finished successfully."
+
+
+@pytest.mark.asyncio
+async def test_process_timeline_is_stored(deduplication_weather_api_service):
+    repository = InMemoryRepository()
+
+    with patch.object(settings, "PROCESS_TIMELINE_ENABLED", True):
+        await upload_and_process(
+            repository, deduplication_weather_api_service, 1, [1, 2]
+        )
+
+    timeline = await repository.fetch_json_data(1, key=RepositoryConstants.TIMELINE_KEY)
+    assert [span["name"] for span in timeline["spans"]] == [
+        "fetch",
+        "filter",
+        "serialize",
+        "store",
+        "store",
+    ]
+    assert timeline["spans"][0]["cities"] == 2
+    assert set(timeline["totals"]) == {"fetch", "filter", "serialize", "store"}
+
+
+@pytest.mark.asyncio
+async def test_timeline_is_not_stored_for_unknown_process(
+    deduplication_weather_api_service,
+):
+    repository = InMemoryRepository()
+
+    with patch.object(settings, "PROCESS_TIMELINE_ENABLED", True):
+        response = await process_cities(
+            repository, deduplication_weather_api_service, 1
+        )
+
+    assert response.status == 404
+    assert await repository.fetch_json_data(1, key=RepositoryConstants.TIMELINE_KEY) is None
+
+
+async def process_cities(repository, weather_api_service, process_id, **kwargs):
+    processor = CityWeatherDataProcesser(
+        lambda _: weather_api_service,
+        lambda: repository,
+        CityWeatherProcessData(process_id=process_id),
+        **kwargs,
+    )
+    processor.logger = MagicMock()
+    return await processor.execute()
+
+
+@pytest.fixture
+def partial_failure_weather_api_service(mock_weather_api_service):
+    """
+    Answers for city 1, drops city 2, can't parse city 3 and fails the
+    requests for city 4.
+    """
+    mock_weather_api_service.cities_per_minute = 60
+    mock_weather_api_service.cities_per_request = 1
+    mock_weather_api_service.malformed_cities_ids = []
+
+    async def fetch_data_in_bulk(cities_ids):
+        if 4 in cities_ids:
+            return False
+        if 3 in cities_ids:
+            mock_weather_api_service.malformed_cities_ids.append(3)
+        return [
+            {"city_id": 1, "temperature": 25.5, "humidity": 80}
+            for city_id in cities_ids
+            if city_id == 1
+        ]
+
+    mock_weather_api_service.fetch_data_in_bulk.side_effect = fetch_data_in_bulk
+    return mock_weather_api_service
+
+
+@pytest.mark.asyncio
+async def test_city_outcomes_are_stored(partial_failure_weather_api_service):
+    repository = InMemoryRepository()
+    await upload_and_process(
+        repository, partial_failure_weather_api_service, 1, [1, 2, 3, 4]
+    )
+
+    assert await repository.fetch_json_data(
+        1, key=RepositoryConstants.OUTCOMES_KEY
+    ) == {
+        "ok": 1,
+        "missing": [2],
+        "malformed": [3],
+        "upstream_error": [4],
+        "invalid": [],
+    }
+    assert strike_counts(await fetch_city_strikes(repository)) == {"2": 1, "3": 1}
+
+
+@pytest.mark.asyncio
+async def test_reprocess_fetches_only_failed_cities(
+    partial_failure_weather_api_service,
+):
+    repository = InMemoryRepository()
+    await upload_and_process(
+        repository, partial_failure_weather_api_service, 1, [1, 2, 3, 4]
+    )
+    partial_failure_weather_api_service.fetch_data_in_bulk.reset_mock()
+    partial_failure_weather_api_service.fetch_data_in_bulk.side_effect = (
+        lambda cities_ids: [
+            {"city_id": city_id, "temperature": 20.0, "humidity": 75}
+            for city_id in cities_ids
+            if city_id in (2, 3)
+        ]
+    )
+    partial_failure_weather_api_service.cities_per_request = 2
+
+    with patch.object(settings, "RESULTS_STORAGE_FORMAT", "packed"):
+        response = await process_cities(
+            repository, partial_failure_weather_api_service, 1, failed_only=True
+        )
+
+    assert response.message == "Process finished successfully."
+    assert partial_failure_weather_api_service.fetch_data_in_bulk.call_args_list == [
+        call([2, 3]),
+        call([4]),
+    ]
+
+    fetcher = CityWeatherDataFetcher(
+        lambda: repository, CityWeatherProcessData(process_id=1)
+    )
+    fetcher.logger = MagicMock()
+    fetched = await fetcher.execute()
+    assert [result["city_id"] for result in fetched.data["results"]] == [1, 2, 3]
+
+    outcomes = await repository.fetch_json_data(1, key=RepositoryConstants.OUTCOMES_KEY)
+    assert outcomes["ok"] == 3
+    assert outcomes["missing"] == [4]
+    assert strike_counts(await fetch_city_strikes(repository)) == {"4": 1}
+
+
+@pytest.mark.asyncio
+async def test_reprocess_without_outcomes(partial_failure_weather_api_service):
+    repository = InMemoryRepository()
+    await repository.save_json_data(1, {"cities_ids": [1, 2]})
+
+    response = await process_cities(
+        repository, partial_failure_weather_api_service, 1, failed_only=True
+    )
+
+    assert response.status == 404
+    assert response.message == "No city outcomes found."
+    partial_failure_weather_api_service.fetch_data_in_bulk.assert_not_called()
+
+
+async def fetch_city_strikes(repository):
+    return await repository.fetch_index(RepositoryConstants.INVALID_CITIES_INDEX)
+
+
+def strike_counts(city_strikes: dict):
+    return {city_id: entry["strikes"] for city_id, entry in city_strikes.items()}
+
+
+async def save_city_strikes(repository, city_id, strikes, expires_at=None):
+    await repository.save_index_entry(
+        RepositoryConstants.INVALID_CITIES_INDEX,
+        city_id,
+        {"strikes": strikes, "expires_at": expires_at},
+    )
+
+
+@pytest.mark.asyncio
+async def test_invalid_cities_are_skipped(partial_failure_weather_api_service):
+    repository = InMemoryRepository()
+    await save_city_strikes(repository, "2", 3)
+    await save_city_strikes(repository, "1", 2)
+
+    with patch.object(settings, "INVALID_CITY_STRIKES", 3):
+        await upload_and_process(
+            repository, partial_failure_weather_api_service, 1, [1, 2, 3]
+        )
+
+    assert partial_failure_weather_api_service.fetch_data_in_bulk.call_args_list == [
+        call([1]),
+        call([3]),
+    ]
+    outcomes = await repository.fetch_json_data(1, key=RepositoryConstants.OUTCOMES_KEY)
+    assert outcomes["invalid"] == [2]
+    assert outcomes["malformed"] == [3]
+    assert strike_counts(await fetch_city_strikes(repository)) == {"2": 3, "3": 1}
+
+
+@pytest.mark.asyncio
+async def test_invalid_cities_are_retried_once_their_strike_expires(
+    partial_failure_weather_api_service,
+):
+    repository = InMemoryRepository()
+    await save_city_strikes(repository, "2", 3, expires_at=time.time() - 1)
+
+    with patch.multiple(
+        settings, INVALID_CITY_STRIKES=3, INVALID_CITY_TTL_IN_SECONDS=3600
+    ):
+        await upload_and_process(
+            repository, partial_failure_weather_api_service, 1, [2]
+        )
+
+    partial_failure_weather_api_service.fetch_data_in_bulk.assert_called_once_with([2])
+    city_strikes = await fetch_city_strikes(repository)
+    # Missing again, the city is invalid for another period.
+    assert city_strikes["2"]["strikes"] == 4
+    assert city_strikes["2"]["expires_at"] > time.time() + 3500
+
+
+@pytest.mark.asyncio
+async def test_reprocess_view_fetches_failed_cities_only():
+    with patch.object(views, "CityWeatherDataProcesser") as processor_class:
+        processor_class.return_value.execute = AsyncMock(
+            return_value=ProcessResponse(status=200, message="ok")
+        )
+        await views.reprocess_failed_cities_view(ReprocessParameter(process_id=1))
+
+    assert processor_class.call_args.kwargs["failed_only"] is True
+
+
+async def fetch_changes(repository, **kwargs):
+    fetcher = CityDataChangesFetcher(
+        lambda: repository, CityWeatherProcessData(process_id=1), **kwargs
+    )
+    fetcher.logger = MagicMock()
+    return await fetcher.execute()
+
+
+@pytest.mark.asyncio
+async def test_change_feed_records_changed_cities_only(
+    deduplication_weather_api_service,
+):
+    repository = InMemoryRepository()
+
+    with patch.object(settings, "CHANGE_FEED_ENABLED", True):
+        await upload_and_process(
+            repository, deduplication_weather_api_service, 1, [1, 2]
+        )
+        deduplication_weather_api_service.fetch_data_in_bulk.return_value = [
+            {"city_id": 1, "temperature": 25.5, "humidity": 80},
+            {"city_id": 2, "temperature": 21.0, "humidity": 75},
+        ]
+        await process_cities(repository, deduplication_weather_api_service, 1)
+
+    changes = await repository.fetch_json_range(1, RepositoryConstants.CHANGES_KEY)
+    assert [(change["seq"], change["city_id"]) for change in changes] == [
+        (1, 1),
+        (2, 2),
+        (3, 2),
+    ]
+    city_versions = await repository.fetch_json_data(
+        1, key=RepositoryConstants.CITY_VERSIONS_KEY
+    )
+    assert city_versions["last_seq"] == 3
+    assert city_versions["cities"]["2"] == [3, 21.0, 75]
+
+    response = await fetch_changes(repository, since=2)
+    assert response.data["next_seq"] == 3
+    assert without_fetched_at(response.data["changes"]) == [
+        {
+            "seq": 3,
+            "city_id": 2,
+            "temperature": 21.0,
+            "humidity": 75,
+            "temperature_change": 1.0,
+            "humidity_change": 0,
+        }
+    ]
+
+
+@pytest.mark.asyncio
+async def test_change_feed_coalesces_and_applies_thresholds():
+    repository = InMemoryRepository()
+    await repository.save_json_data(
+        1, {"last_seq": 4}, key=RepositoryConstants.CITY_VERSIONS_KEY
+    )
+    await repository.append_json_data(
+        1,
+        RepositoryConstants.CHANGES_KEY,
+        [
+            {
+                "seq": seq,
+                "city_id": city_id,
+                "temperature": temperature,
+                "humidity": 50,
+                "previous_temperature": previous_temperature,
+                "previous_humidity": 50,
+                "fetched_at": seq,
+            }
+            for seq, city_id, temperature, previous_temperature in [
+                (1, 1, 20.0, 19.0),
+                (2, 2, 10.2, 10.0),
+                (3, 1, 20.3, 20.0),
+                (4, 2, 10.4, 10.2),
+            ]
+        ],
+    )
+
+    response = await fetch_changes(repository, since=1, min_temperature_change=0.35)
+
+    assert response.data["next_seq"] == 4
+    assert response.data["changes"] == [
+        {
+            "seq": 4,
+            "city_id": 2,
+            "temperature": 10.4,
+            "humidity": 50,
+            "temperature_change": 0.4,
+            "humidity_change": 0,
+            "fetched_at": 4,
+        }
+    ]
+    assert (await fetch_changes(repository, since=1, limit=1)).data["next_seq"] == 2
+
+
+@pytest.mark.asyncio
+async def test_change_feed_reports_slow_drifts(deduplication_weather_api_service):
+    repository = InMemoryRepository()
+
+    with patch.object(settings, "CHANGE_FEED_ENABLED", True):
+        await upload_and_process(repository, deduplication_weather_api_service, 1, [1])
+        first_read = await fetch_changes(repository, min_temperature_change=1.0)
+
+        reads = []
+        for temperature in [25.9, 26.3, 26.7]:
+            deduplication_weather_api_service.fetch_data_in_bulk.return_value = [
+                {"city_id": 1, "temperature": temperature, "humidity": 80}
+            ]
+            await process_cities(repository, deduplication_weather_api_service, 1)
+            reads.append(
+                await fetch_changes(
+                    repository,
+                    since=(reads[-1] if reads else first_read).data["next_seq"],
+                    min_temperature_change=1.0,
+                )
+            )
+
+    # Each change is below the threshold, their sum isn't.
+    assert [len(read.data["changes"]) for read in reads] == [0, 0, 1]
+    assert reads[-1].data["changes"][0]["temperature"] == 26.7
+    assert reads[-1].data["changes"][0]["temperature_change"] == 1.2
+
+
+@pytest.mark.asyncio
+async def test_change_feed_keeps_the_last_changes(deduplication_weather_api_service):
+    repository = InMemoryRepository()
+
+    with patch.multiple(settings, CHANGE_FEED_ENABLED=True, CHANGE_FEED_MAX_CHANGES=3):
+        await upload_and_process(
+            repository, deduplication_weather_api_service, 1, [1, 2]
+        )
+        deduplication_weather_api_service.fetch_data_in_bulk.return_value = [
+            {"city_id": 1, "temperature": 26.0, "humidity": 80},
+            {"city_id": 2, "temperature": 21.0, "humidity": 75},
+        ]
+        await process_cities(repository, deduplication_weather_api_service, 1)
+
+    assert len(await repository.fetch_json_range(1, "changes")) == 3
+
+    response = await fetch_changes(repository, since=2)
+    assert response.data["first_seq"] == 2
+    assert response.data["next_seq"] == response.data["last_seq"] == 4
+    assert [change["seq"] for change in response.data["changes"]] == [3, 4]
+
+
+@pytest.mark.asyncio
+async def test_change_feed_not_found():
+    response = await fetch_changes(InMemoryRepository())
+
+    assert response.status == 404
+
+
+@pytest.mark.asyncio
+async def test_readings_are_recorded_and_served_as_history(
+    deduplication_weather_api_service,
+):
+    repository = InMemoryRepository()
+
+    with patch.object(settings, "TIMESERIES_ENABLED", True):
+        await upload_and_process(
+            repository, deduplication_weather_api_service, 1, [1, 2]
+        )
+
+    with patch.object(views, "get_repository", return_value=repository):
+        response = await views.get_process_history_view({"process_id": 1})
+        missing = await views.get_process_history_view({"process_id": 2})
+
+    history = json.loads(response.body)
+    assert [sample[1] for sample in history["cities"]["1"]["temperature"]] == [25.5]
+    assert [sample[1] for sample in history["cities"]["2"]["humidity"]] == [75]
+    assert history["end"] - history["start"] == 24 * 3600
+    assert missing.status_code == 404
+    deduplication_weather_api_service.fetch_data_in_bulk.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_process_history_is_paged(deduplication_weather_api_service):
+    repository = InMemoryRepository()
+
+    with patch.object(settings, "TIMESERIES_ENABLED", True):
+        await upload_and_process(
+            repository, deduplication_weather_api_service, 1, [1, 2]
+        )
+
+    with patch.object(views, "get_repository", return_value=repository):
+        first = json.loads(
+            (
+                await views.get_process_history_view(
+                    {"process_id": 1, "offset": 0, "limit": 1}
+                )
+            ).body
+        )
+        last = json.loads(
+            (
+                await views.get_process_history_view(
+                    {"process_id": 1, "offset": first["next_offset"], "limit": 1}
+                )
+            ).body
+        )
+
+    assert list(first["cities"]) == ["1"]
+    assert list(last["cities"]) == ["2"]
+    assert last["next_offset"] == last["total_cities"] == 2
+
+
+@pytest.mark.asyncio
+async def test_later_batches_wait_only_once_the_round_is_full(
+    deduplication_weather_api_service,
+):
+    processor = CityWeatherDataProcesser(
+        lambda _: deduplication_weather_api_service,
+        lambda: AsyncMock(),
+        CityWeatherProcessData(process_id=1),
+    )
+    processor.logger = MagicMock()
+    processor.store_results = AsyncMock()
+
+    with patch("asyncio.sleep", AsyncMock()) as sleep:
+        await processor.fetch_batches([["1"], ["2"]], [], 3)
+        sleep.assert_not_awaited()
+
+        await processor.fetch_batches([["3"], ["4"]], [], 3)
+
+    # The first batch completes the round, the second waits for the next one.
+    sleep.assert_awaited_once_with(60)
+    assert deduplication_weather_api_service.fetch_data_in_bulk.call_count == 4
@@ -1,3 +1,30 @@
-from weather_data_fetcher_service.core.settings import Settings
-
-settings = Settings()
+from weather_data_fetcher_service.core.settings import Settings
+
+
+class LazySettings:
+    """
+    Stand-in for the settings, built from the environment on first attribute
+    access rather than on import, so modules can bind `settings` at import
+    time without reading the environment.
+    """
+
+    def __init__(self):
+        object.__setattr__(self, "_settings", None)
+
+    def _load(self) -> Settings:
+        if self._settings is None:
+            object.__setattr__(self, "_settings", Settings())
+        return self._settings
+
+    def __getattr__(self, name: str):
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name: str, value):
+        setattr(self._load(), name, value)
+
+    def __delattr__(self, name: str):
+        delattr(self._load(), name)
+
+
+# Importing the submodule binds it as `settings`; rebind the name to the proxy.
+settings = LazySettings()
@@ -2,3 +2,84 @@ class WeatherAPIConstants:
     OPEN_WEATHER_METRIC_TEMP_UNITS = "metric"
     OPEN_WEATHER_CITIES_PER_MINUTE = 60
     OPEN_WEATHER_CITIES_PER_REQUEST = 20
+    INLINE_PARSE_EXECUTOR = "inline"
+    THREAD_PARSE_EXECUTOR = "thread"
+    PROCESS_PARSE_EXECUTOR = "process"
+
+
+class HedgingConstants:
+    PRIMARY_SESSION = "primary"
+    HEDGE_SESSION = "hedge"
+
+
+class ProcessConstants:
+    DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+    OK_OUTCOME = "ok"
+    MISSING_OUTCOME = "missing"
+    MALFORMED_OUTCOME = "malformed"
+    UPSTREAM_ERROR_OUTCOME = "upstream_error"
+    INVALID_OUTCOME = "invalid"
+    FAILED_OUTCOMES = (MISSING_OUTCOME, MALFORMED_OUTCOME, UPSTREAM_ERROR_OUTCOME)
+
+
+class LoggingConstants:
+    TEXT_LOG_FORMAT = "text"
+    JSON_LOG_FORMAT = "json"
+
+
+class ProfilingConstants:
+    PROFILE_HEADER = "X-Profile"
+    PROFILED_STATUS_HEADER = "X-Profiled-Status"
+    PROFILE_SORT_KEY = "cumulative"
+    PROFILE_LINES = 50
+
+
+class ResponseCacheConstants:
+    GZIP_ENCODING = "gzip"
+    BROTLI_ENCODING = "br"
+    MIN_COMPRESSED_BYTES = 1024
+
+
+class AdmissionConstants:
+    UPLOAD_GROUP = "upload"
+    PROCESS_GROUP = "process"
+    DURATION_SMOOTHING = 0.2
+    UPLOAD_BYTES_PER_CITY = 8
+
+
+class TimeSeriesConstants:
+    FIELDS = ("temperature", "humidity")
+    DOWNSAMPLED_SUFFIX = "downsampled"
+    DOWNSAMPLE_AGGREGATION = "avg"
+    DEFAULT_RANGE_IN_SECONDS = 24 * 3600
+    DEFAULT_PROCESS_HISTORY_CITIES = 100
+    MAX_PROCESS_HISTORY_CITIES = 1000
+    AGGREGATIONS = ("avg", "min", "max", "sum", "count", "first", "last")
+
+
+class RepositoryConstants:
+    REDIS_BACKEND = "redis"
+    SQLITE_BACKEND = "sqlite"
+    MEMORY_BACKEND = "memory"
+    JSON_RESULTS_FORMAT = "json"
+    PACKED_RESULTS_FORMAT = "packed"
+    PROCESS_KEY_PREFIX = "weather:process"
+    PROCESS_INDEX_KEY = "weather:processes"
+    PROCESS_EXPIRY_INDEX_KEY = "weather:processes:expiry"
+    PROCESS_KEYS_KEY = "keys"
+    INDEX_ENTRIES_KEY = "index_entries"
+    META_KEY = "meta"
+    TIMELINE_KEY = "timeline"
+    VERSION_KEY = "version"
+    OUTCOMES_KEY = "outcomes"
+    CHANGES_KEY = "changes"
+    CITY_VERSIONS_KEY = "city_versions"
+    SIZE_KEY = "size"
+    INDEX_KEY_PREFIX = "weather:index"
+    FINGERPRINTS_INDEX = "fingerprints"
+    REFRESH_JOBS_INDEX = "refresh_jobs"
+    INVALID_CITIES_INDEX = "invalid_cities"
+    LOCK_KEY_PREFIX = "weather:lock"
+    TIMESERIES_KEY_PREFIX = "weather:ts"
+    LRU_EVICTION_POLICY = "lru"
+    AGE_EVICTION_POLICY = "age"
@@ -0,0 +1,126 @@
+import gzip
+import json
+import math
+from functools import lru_cache
+
+from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.logger import logger
+
+
+class BoundingBox:
+    """
+    A box query covering a cluster of the requested cities, which stand in
+    for an ID batch in the process.
+    """
+
+    def __init__(
+        self,
+        lon_left: float,
+        lat_bottom: float,
+        lon_right: float,
+        lat_top: float,
+        cities_ids: list,
+    ):
+        self.lon_left = lon_left
+        self.lat_bottom = lat_bottom
+        self.lon_right = lon_right
+        self.lat_top = lat_top
+        self.cities_ids = cities_ids
+
+    def __len__(self):
+        return len(self.cities_ids)
+
+    def __repr__(self):
+        return (
+            f"BoundingBox({self.lon_left}, {self.lat_bottom}, {self.lon_right}, "
+            f"{self.lat_top}, {len(self.cities_ids)} cities)"
+        )
+
+
+class CityGeoIndex:
+    """
+    Coordinates of known cities, bucketed in a grid of `cell_size_in_degrees`
+    cells (a fixed precision geohash) to cluster the cities of an upload.
+    """
+
+    def __init__(self, coordinates: dict):
+        self.coordinates = coordinates
+
+    @classmethod
+    def from_file(cls, path: str) -> "CityGeoIndex":
+        """
+        Load an OpenWeather city list (`city.list.json`, optionally gzipped):
+        a JSON array of cities with an `id` and a `coord` holding `lon`/`lat`.
+        """
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as city_list_file:
+            return cls.from_file_data(json.load(city_list_file))
+
+    @classmethod
+    def from_file_data(cls, cities: list) -> "CityGeoIndex":
+        return cls(
+            {
+                str(city["id"]): (city["coord"]["lon"], city["coord"]["lat"])
+                for city in cities
+            }
+        )
+
+    def cell(self, city_id: str, cell_size_in_degrees: float):
+        lon, lat = self.coordinates[city_id]
+        return (
+            math.floor(lon / cell_size_in_degrees),
+            math.floor(lat / cell_size_in_degrees),
+        )
+
+    def plan_boxes(
+        self, cities_ids: list, cell_size_in_degrees: float, min_cities_per_box: int
+    ):
+        """
+        Cover the grid cells holding at least `min_cities_per_box` of the
+        requested cities with one box each, shrunk to the cities' extent.
+
+        Returns:
+            tuple: The boxes, and the stragglers to fetch by ID: cities of
+            sparser cells and cities missing from the index.
+        """
+        cells = {}
+        stragglers = []
+        for city_id in cities_ids:
+            if str(city_id) not in self.coordinates:
+                stragglers.append(city_id)
+                continue
+            cell = self.cell(str(city_id), cell_size_in_degrees)
+            cells.setdefault(cell, []).append(city_id)
+
+        boxes = []
+        for cell_cities_ids in cells.values():
+            if len(cell_cities_ids) < min_cities_per_box:
+                stragglers.extend(cell_cities_ids)
+                continue
+
+            lons, lats = zip(
+                *(self.coordinates[str(city_id)] for city_id in cell_cities_ids)
+            )
+            boxes.append(
+                BoundingBox(min(lons), min(lats), max(lons), max(lats), cell_cities_ids)
+            )
+
+        return boxes, stragglers
+
+
+@lru_cache(maxsize=None)
+def get_geo_index():
+    """
+    Return the worker's city index, loaded from `settings.GEO_CITY_LIST_PATH`,
+    or None if no city list is configured or it can't be read.
+    """
+    if not settings.GEO_CITY_LIST_PATH:
+        return None
+
+    try:
+        return CityGeoIndex.from_file(settings.GEO_CITY_LIST_PATH)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.error(
+            "Could not load the city list %s: %s", settings.GEO_CITY_LIST_PATH, e
+        )
+        return None
@@ -1,35 +1,135 @@
+import atexit
+import itertools
+import json
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.constants import LoggingConstants
+
+RECORD_ATTRIBUTES = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format records as one JSON object per line, keeping the fields passed to
+    the logger (process_id, batch...) as top level keys.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": self.formatTime(record),
+            "logger": record.name,
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        entry.update(
+            (key, value)
+            for key, value in record.__dict__.items()
+            if key not in RECORD_ATTRIBUTES
+        )
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, default=str)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queue handler leaving the formatting of the record to the writer thread,
+    so the event loop only pays for putting it in the queue.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
 
 
 class StreamLogger:
-    def __init__(self, name: str, level: int = logging.DEBUG):
+    def __init__(self, name: str, level=None):
         self.logger = logging.getLogger(name)
-        self.logger.setLevel(level)
+        self.logger.setLevel(level or settings.LOG_LEVEL.upper())
+        self.sample_every = max(settings.LOG_SAMPLE_EVERY, 1)
+        self._sample_counters = {}
+        self._listener = None
         self._setup_stream_handler()
 
     def _setup_stream_handler(self):
         stream_handler = logging.StreamHandler()
         stream_handler.setLevel(logging.DEBUG)
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-        )
+        if settings.LOG_FORMAT == LoggingConstants.JSON_LOG_FORMAT:
+            formatter = JsonFormatter()
+        else:
+            formatter = logging.Formatter(
+                "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+            )
         stream_handler.setFormatter(formatter)
-        self.logger.addHandler(stream_handler)
 
-    def debug(self, message: str):
-        self.logger.debug(message)
+        if not settings.LOG_ASYNC:
+            self.logger.addHandler(stream_handler)
+            return
+
+        log_queue = queue.SimpleQueue()
+        self._listener = QueueListener(log_queue, stream_handler)
+        self._listener.start()
+        atexit.register(self.stop)
+        self.logger.addHandler(DeferredQueueHandler(log_queue))
+
+    def stop(self):
+        """
+        Flush the queued records and stop the writer thread.
+        """
+        if self._listener:
+            self._listener.stop()
+            self._listener = None
+
+    def _should_log(self, sample_key: str) -> bool:
+        """
+        Let through only one out of every `sample_every` messages sharing a
+        sample key, e.g. the progress message logged after each batch.
+        """
+        if not sample_key or self.sample_every == 1:
+            return True
+
+        counter = self._sample_counters.setdefault(sample_key, itertools.count())
+        return next(counter) % self.sample_every == 0
+
+    def _log(self, level: int, message: str, args: tuple, sample_key, fields: dict):
+        if not self.logger.isEnabledFor(level) or not self._should_log(sample_key):
+            return
+
+        self.logger.log(level, message, *args, extra=fields or None, stacklevel=3)
+
+    def debug(self, message: str, *args, sample_key: str = None, **fields):
+        self._log(logging.DEBUG, message, args, sample_key, fields)
+
+    def info(self, message: str, *args, sample_key: str = None, **fields):
+        self._log(logging.INFO, message, args, sample_key, fields)
+
+    def warning(self, message: str, *args, sample_key: str = None, **fields):
+        self._log(logging.WARNING, message, args, sample_key, fields)
+
+    def error(self, message: str, *args, sample_key: str = None, **fields):
+        self._log(logging.ERROR, message, args, sample_key, fields)
+
+    def critical(self, message: str, *args, sample_key: str = None, **fields):
+        self._log(logging.CRITICAL, message, args, sample_key, fields)
 
-    def info(self, message: str):
-        self.logger.info(message)
 
-    def warning(self, message: str):
-        self.logger.warning(message)
+class LazyStreamLogger:
+    """
+    The service logger, set up on first use so importing a module doesn't
+    read the settings.
+    """
 
-    def error(self, message: str):
-        self.logger.error(message)
+    def __init__(self, name: str):
+        self.name = name
+        self._stream_logger = None
 
-    def critical(self, message: str):
-        self.logger.critical(message)
+    def __getattr__(self, name: str):
+        if self._stream_logger is None:
+            self._stream_logger = StreamLogger(self.name)
+        return getattr(self._stream_logger, name)
 
 
-logger = StreamLogger("weather_data_fetcher_service")
+logger = LazyStreamLogger("weather_data_fetcher_service")
@@ -1,3 +1,4 @@
+import hashlib
 from pydantic import BaseModel
 from typing import Optional
 
@@ -5,9 +6,31 @@ from typing import Optional
 class CityWeatherProcessData(BaseModel):
     process_id: int
     request_datetime: Optional[str] = None
+    finished_datetime: Optional[str] = None
     cities_ids: Optional[list] = None
     total_cities: Optional[int] = None
     results: Optional[list] = None
+    results_format: Optional[str] = None
+    processed_cities: Optional[int] = None
+    fingerprint: Optional[str] = None
+    source_process_id: Optional[int] = None
 
     def to_json(self):
         return self.model_dump_json()
+
+    def cities_fingerprint(self):
+        """
+        Hash of the normalized, sorted and deduplicated city ID set, so the same
+        list uploaded in any order or with ids as strings or ints matches.
+        """
+        normalized_ids = sorted({str(city_id).strip() for city_id in self.cities_ids})
+        return hashlib.sha256(",".join(normalized_ids).encode()).hexdigest()
+
+
+class ProcessRefreshJob(BaseModel):
+    process_id: int
+    interval_seconds: int
+    priority: int = 0
+    next_run_at: float
+    last_run_at: Optional[float] = None
+    last_status: Optional[int] = None
@@ -0,0 +1,38 @@
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket allowing `requests_per_minute` requests per minute, with
+    bursts of up to a full minute's worth of requests.
+    """
+
+    def __init__(self, requests_per_minute: int, clock=time.monotonic):
+        self.capacity = max(requests_per_minute, 1)
+        self.refill_per_second = self.capacity / 60
+        self._clock = clock
+        self._tokens = float(self.capacity)
+        self._last_refill = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(
+            self.capacity,
+            self._tokens + (now - self._last_refill) * self.refill_per_second,
+        )
+        self._last_refill = now
+
+    def available(self) -> bool:
+        self._refill()
+        return self._tokens >= 1
+
+    def try_acquire(self) -> bool:
+        if not self.available():
+            return False
+
+        self._tokens -= 1
+        return True
+
+    def time_until_available(self) -> float:
+        self._refill()
+        return max(0.0, (1 - self._tokens) / self.refill_per_second)
@@ -1,12 +1,149 @@
 from abc import ABC, abstractmethod
 
+from weather_data_fetcher_service.core.constants import RepositoryConstants
+
+
+def process_key(id: int, key: str) -> str:
+    """
+    Build the namespaced storage key of a process, e.g. `weather:process:1:meta`.
+    """
+    return f"{RepositoryConstants.PROCESS_KEY_PREFIX}:{id}:{key}"
+
 
 class BaseRepository(ABC):
+    """
+    Storage contract shared by every backend.
+
+    Data is namespaced per process: documents, lists and segments are stored
+    under a `key` of the process, and the whole process is the unit of
+    retention. Backends apply `settings.PROCESS_TTL_IN_SECONDS` from the last
+    write of a process and keep at most `settings.MAX_STORED_PROCESSES`
+    processes, evicting by `settings.PROCESS_EVICTION_POLICY` ("lru" orders by
+    last access, "age" by creation).
+    """
+
+    @abstractmethod
+    def fetch_json_data(self, id: int, key: str = RepositoryConstants.META_KEY):
+        raise NotImplementedError
+
+    @abstractmethod
+    def save_json_data(
+        self, id: int, data: dict, key: str = RepositoryConstants.META_KEY
+    ):
+        raise NotImplementedError
+
+    @abstractmethod
+    def append_json_data(self, id: int, key: str, items: list, max_length: int = 0):
+        """
+        Append items to the list stored under `key` for the given id, keeping
+        only its last `max_length` items when set, like a Redis LTRIM.
+
+        Returns:
+            int: The length of the list after the append.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def fetch_json_range(self, id: int, key: str, start: int = 0, end: int = -1):
+        """
+        Fetch the items of the list stored under `key` between `start` and `end`.
+
+        Both indexes are inclusive and negative values count from the end of the
+        list, following the Redis LRANGE semantics.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def save_segment(self, id: int, key: str, index: int, segment: bytes):
+        """
+        Store a binary segment at position `index` under `key`, replacing any
+        segment already stored there.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def fetch_segments(self, id: int, key: str):
+        """
+        Fetch every binary segment stored under `key`, ordered by index.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def save_index_entry(self, index: str, field: str, value, process_id: int = None):
+        """
+        Store a JSON value under `field` of a global, process-independent index.
+        Index entries are not subject to process retention, unless saved for a
+        `process_id`: the entry is then deleted along with that process, unless
+        saved again since.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def fetch_index_entry(self, index: str, field: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def fetch_index(self, index: str):
+        """
+        Fetch every entry of a global index as a `{field: value}` dict.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_index_entry(self, index: str, field: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def append_samples(self, samples: list):
+        """
+        Append `(series, timestamp, value)` samples, timestamped in seconds, to
+        their time series. A sample replaces any sample of its series with the
+        same timestamp.
+
+        Series keep their samples for `settings.TIMESERIES_RETENTION_IN_SECONDS`
+        and are downsampled to the average of each
+        `settings.TIMESERIES_DOWNSAMPLE_BUCKET_IN_SECONDS` bucket, kept for
+        `settings.TIMESERIES_DOWNSAMPLED_RETENTION_IN_SECONDS`. A retention of
+        `0` keeps samples forever.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def fetch_samples(
+        self,
+        series: str,
+        start: int,
+        end: int,
+        aggregation: str = None,
+        bucket_seconds: int = 0,
+    ):
+        """
+        Fetch the `[timestamp, value]` samples of a series between `start` and
+        `end`, both inclusive, optionally aggregated into buckets of
+        `bucket_seconds` with one of `TimeSeriesConstants.AGGREGATIONS`.
+
+        Ranges reaching back beyond the raw retention are read from the
+        downsampled series.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def acquire_lock(self, name: str, ttl_seconds: int):
+        """
+        Try to take a lock shared by every worker using this storage.
+
+        Returns:
+            bool: True if the lock was free and is now held for `ttl_seconds`.
+        """
+        raise NotImplementedError
 
     @abstractmethod
-    def fetch_json_data(self, id: int):
+    def release_lock(self, name: str):
         raise NotImplementedError
 
     @abstractmethod
-    def save_json_data(self, id: int, data: dict):
+    def delete_process(self, id: int):
+        """
+        Delete everything stored for the process.
+        """
         raise NotImplementedError
@@ -0,0 +1,252 @@
+import bisect
+import json
+import time
+from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.constants import RepositoryConstants
+from weather_data_fetcher_service.core.repositories.base_repository import (
+    BaseRepository,
+)
+from weather_data_fetcher_service.core.repositories.time_series import (
+    aggregate_samples,
+    bucket_start,
+    downsampled_series,
+    serves_from_downsampled,
+)
+
+
+class InMemoryRepository(BaseRepository):
+    """
+    Process-local repository, meant for tests, benchmarks and single-node runs
+    where losing the data on restart is acceptable.
+    """
+
+    def __init__(self):
+        self._processes = {}
+        self._scores = {}
+        self._expires_at = {}
+        self._indexes = {}
+        self._index_owners = {}
+        self._locks = {}
+        self._series = {}
+        self._open_buckets = {}
+
+    def _get_process(self, id: int) -> dict:
+        """
+        Return the live storage of a process, dropping it first if its TTL has
+        elapsed.
+        """
+        id = str(id)
+        expires_at = self._expires_at.get(id)
+        if expires_at is not None and expires_at <= time.time():
+            self._delete_process(id)
+
+        return self._processes.get(id)
+
+    def _get_or_create_process(self, id: int) -> dict:
+        return self._get_process(id) or self._processes.setdefault(
+            str(id), {"documents": {}, "lists": {}, "segments": {}}
+        )
+
+    def _touch(self, id: int):
+        id = str(id)
+        now = time.time()
+
+        if (
+            settings.PROCESS_EVICTION_POLICY != RepositoryConstants.AGE_EVICTION_POLICY
+            or id not in self._scores
+        ):
+            self._scores[id] = now
+
+        if settings.PROCESS_TTL_IN_SECONDS:
+            self._expires_at[id] = now + settings.PROCESS_TTL_IN_SECONDS
+        else:
+            self._expires_at.pop(id, None)
+
+        self._evict()
+
+    def _record_access(self, id: int):
+        if settings.PROCESS_EVICTION_POLICY == RepositoryConstants.LRU_EVICTION_POLICY:
+            self._scores[str(id)] = time.time()
+
+    def _evict(self):
+        if not settings.MAX_STORED_PROCESSES:
+            return
+
+        excess = len(self._scores) - settings.MAX_STORED_PROCESSES
+        for id in sorted(self._scores, key=self._scores.get)[: max(excess, 0)]:
+            self._delete_process(id)
+
+    def _delete_process(self, id: str):
+        self._processes.pop(id, None)
+        self._scores.pop(id, None)
+        self._expires_at.pop(id, None)
+
+        for index, field in [
+            entry for entry, owner in self._index_owners.items() if owner == id
+        ]:
+            self._indexes.get(index, {}).pop(field, None)
+            self._index_owners.pop((index, field))
+
+    async def fetch_json_data(self, id: int, key: str = RepositoryConstants.META_KEY):
+        process = self._get_process(id)
+        data = process["documents"].get(key) if process else None
+        if not data:
+            return None
+
+        self._record_access(id)
+        return json.loads(data)
+
+    async def save_json_data(
+        self, id: int, data: dict, key: str = RepositoryConstants.META_KEY
+    ):
+        process = self._get_or_create_process(id)
+        process["documents"][key] = data if isinstance(data, str) else json.dumps(data)
+        self._touch(id)
+
+    async def append_json_data(
+        self, id: int, key: str, items: list, max_length: int = 0
+    ) -> int:
+        process = self._get_or_create_process(id)
+        stored_items = process["lists"].setdefault(key, [])
+        stored_items.extend(json.dumps(item) for item in items)
+        if max_length and len(stored_items) > max_length:
+            del stored_items[:-max_length]
+        self._touch(id)
+        return len(stored_items)
+
+    async def fetch_json_range(
+        self, id: int, key: str, start: int = 0, end: int = -1
+    ) -> list:
+        process = self._get_process(id)
+        stored_items = process["lists"].get(key, []) if process else []
+        stop = max(len(stored_items) + end + 1, 0) if end < 0 else end + 1
+        return [json.loads(item) for item in stored_items[start:stop]]
+
+    async def save_segment(self, id: int, key: str, index: int, segment: bytes):
+        process = self._get_or_create_process(id)
+        process["segments"].setdefault(key, {})[index] = segment
+        self._touch(id)
+
+    async def fetch_segments(self, id: int, key: str) -> list:
+        process = self._get_process(id)
+        segments = process["segments"].get(key, {}) if process else {}
+        return [segments[index] for index in sorted(segments)]
+
+    async def save_index_entry(
+        self, index: str, field: str, value, process_id: int = None
+    ):
+        self._indexes.setdefault(index, {})[field] = json.dumps(value)
+        if process_id is None:
+            self._index_owners.pop((index, field), None)
+        else:
+            self._index_owners[(index, field)] = str(process_id)
+
+    async def fetch_index_entry(self, index: str, field: str):
+        value = self._indexes.get(index, {}).get(field)
+        return json.loads(value) if value is not None else None
+
+    async def fetch_index(self, index: str) -> dict:
+        return {
+            field: json.loads(value)
+            for field, value in self._indexes.get(index, {}).items()
+        }
+
+    async def delete_index_entry(self, index: str, field: str):
+        self._indexes.get(index, {}).pop(field, None)
+        self._index_owners.pop((index, field), None)
+
+    def _add_sample(self, series: str, timestamp: int, value: float, retention: int):
+        """
+        Returns:
+            float: The value of the sample replaced, or None.
+        """
+        replaced_value = None
+        samples = self._series.setdefault(series, [])
+        index = bisect.bisect_left(samples, [timestamp])
+        if index < len(samples) and samples[index][0] == timestamp:
+            replaced_value = samples[index][1]
+            samples[index][1] = value
+        else:
+            samples.insert(index, [timestamp, value])
+
+        if retention:
+            del samples[: bisect.bisect_left(samples, [samples[-1][0] - retention])]
+
+        return replaced_value
+
+    def _downsample(
+        self, series: str, timestamp: int, value: float, replaced_value: float = None
+    ):
+        """
+        Fold a sample into the average of its bucket, in place of the sample it
+        replaced if any. Like RedisTimeSeries compactions, only the latest
+        bucket of a series is kept open.
+        """
+        bucket = bucket_start(
+            timestamp, settings.TIMESERIES_DOWNSAMPLE_BUCKET_IN_SECONDS
+        )
+        open_bucket, total, count = self._open_buckets.get(series, (bucket, 0.0, 0))
+        if open_bucket != bucket:
+            total, count = 0.0, 0
+
+        if replaced_value is not None and count:
+            total, count = total - replaced_value, count - 1
+
+        self._open_buckets[series] = (bucket, total + value, count + 1)
+        self._add_sample(
+            downsampled_series(series),
+            bucket,
+            (total + value) / (count + 1),
+            settings.TIMESERIES_DOWNSAMPLED_RETENTION_IN_SECONDS,
+        )
+
+    async def append_samples(self, samples: list):
+        for series, timestamp, value in samples:
+            replaced_value = self._add_sample(
+                series,
+                int(timestamp),
+                float(value),
+                settings.TIMESERIES_RETENTION_IN_SECONDS,
+            )
+            if settings.TIMESERIES_DOWNSAMPLE_BUCKET_IN_SECONDS:
+                self._downsample(
+                    series, int(timestamp), float(value), replaced_value
+                )
+
+    async def fetch_samples(
+        self,
+        series: str,
+        start: int,
+        end: int,
+        aggregation: str = None,
+        bucket_seconds: int = 0,
+    ) -> list:
+        if serves_from_downsampled(start):
+            series = downsampled_series(series)
+
+        stored_samples = self._series.get(series, [])
+        samples = [
+            list(sample)
+            for sample in stored_samples[
+                bisect.bisect_left(stored_samples, [start]) : bisect.bisect_left(
+                    stored_samples, [end + 1]
+                )
+            ]
+        ]
+        if aggregation:
+            return aggregate_samples(samples, aggregation, bucket_seconds)
+        return samples
+
+    async def acquire_lock(self, name: str, ttl_seconds: int) -> bool:
+        now = time.time()
+        if self._locks.get(name, 0) > now:
+            return False
+
+        self._locks[name] = now + ttl_seconds
+        return True
+
+    async def release_lock(self, name: str):
+        self._locks.pop(name, None)
+
+    async def delete_process(self, id: int):
+        self._delete_process(str(id))
@@ -1,20 +1,295 @@
 import json
+import time
 import redis
 from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.constants import (
+    RepositoryConstants,
+    TimeSeriesConstants,
+)
 from weather_data_fetcher_service.core.repositories.base_repository import (
     BaseRepository,
+    process_key,
+)
+from weather_data_fetcher_service.core.repositories.time_series import (
+    downsampled_series,
+    serves_from_downsampled,
 )
 
 
+def index_key(index: str) -> str:
+    return f"{RepositoryConstants.INDEX_KEY_PREFIX}:{index}"
+
+
+def index_owners_key(index: str) -> str:
+    return f"{index_key(index)}:owners"
+
+
+def series_key(series: str) -> str:
+    return f"{RepositoryConstants.TIMESERIES_KEY_PREFIX}:{series}"
+
+
 class RedisRepository(BaseRepository):
+    """
+    Redis Stack repository.
+
+    Every key written for a process is registered in the `weather:process:{id}:keys`
+    set, so the process can be expired and evicted as a whole, and the process
+    is scored by last access (or creation) in the `weather:processes` sorted set.
+    With a TTL, processes are also scored by expiry in the
+    `weather:processes:expiry` sorted set, so the members of expired processes
+    are dropped from both sets on the next write.
+
+    Index entries saved for a process are listed in its
+    `weather:process:{id}:index_entries` set, which has no TTL so the entries
+    can still be found once the process expires, and their owner is kept in
+    the `weather:index:{index}:owners` hash.
+
+    Time series are RedisTimeSeries keys under `weather:ts`, each with a
+    compaction rule feeding its downsampled series.
+    """
+
     def __init__(self):
         self._redis = redis.Redis(
             host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=settings.REDIS_DB
         )
+        self._created_series = set()
+
+    def _touch(self, id: int, key: str):
+        keys_key = process_key(id, RepositoryConstants.PROCESS_KEYS_KEY)
+        by_age = (
+            settings.PROCESS_EVICTION_POLICY == RepositoryConstants.AGE_EVICTION_POLICY
+        )
+
+        self._redis.sadd(keys_key, process_key(id, key))
+        self._redis.zadd(
+            RepositoryConstants.PROCESS_INDEX_KEY, {str(id): time.time()}, nx=by_age
+        )
+
+        if settings.PROCESS_TTL_IN_SECONDS:
+            pipeline = self._redis.pipeline()
+            for stored_key in [*self._redis.smembers(keys_key), keys_key]:
+                pipeline.expire(stored_key, settings.PROCESS_TTL_IN_SECONDS)
+            pipeline.zadd(
+                RepositoryConstants.PROCESS_EXPIRY_INDEX_KEY,
+                {str(id): time.time() + settings.PROCESS_TTL_IN_SECONDS},
+            )
+            pipeline.execute()
+
+        self._drop_expired()
+        self._evict()
+
+    def _record_access(self, id: int):
+        if settings.PROCESS_EVICTION_POLICY == RepositoryConstants.LRU_EVICTION_POLICY:
+            self._redis.zadd(
+                RepositoryConstants.PROCESS_INDEX_KEY, {str(id): time.time()}, xx=True
+            )
+
+    def _drop_expired(self):
+        """
+        Drop the processes whose keys have expired from the sorted sets, so
+        they are neither kept forever nor counted by the eviction.
+        """
+        for id in self._redis.zrangebyscore(
+            RepositoryConstants.PROCESS_EXPIRY_INDEX_KEY, "-inf", time.time()
+        ):
+            self._delete_process(id.decode())
+
+    def _evict(self):
+        if not settings.MAX_STORED_PROCESSES:
+            return
+
+        excess = (
+            self._redis.zcard(RepositoryConstants.PROCESS_INDEX_KEY)
+            - settings.MAX_STORED_PROCESSES
+        )
+        if excess <= 0:
+            return
+
+        for id in self._redis.zrange(
+            RepositoryConstants.PROCESS_INDEX_KEY, 0, excess - 1
+        ):
+            self._delete_process(id.decode())
+
+    def _delete_process(self, id):
+        keys_key = process_key(id, RepositoryConstants.PROCESS_KEYS_KEY)
+        stored_keys = self._redis.smembers(keys_key)
+        index_entries_key = process_key(id, RepositoryConstants.INDEX_ENTRIES_KEY)
+
+        pipeline = self._redis.pipeline()
+        for entry in self._redis.smembers(index_entries_key):
+            index, field = json.loads(entry)
+            if self._redis.hget(index_owners_key(index), field) == str(id).encode():
+                pipeline.hdel(index_key(index), field)
+                pipeline.hdel(index_owners_key(index), field)
+        pipeline.delete(index_entries_key)
+        if stored_keys:
+            pipeline.delete(*stored_keys)
+        pipeline.delete(keys_key)
+        pipeline.zrem(RepositoryConstants.PROCESS_INDEX_KEY, str(id))
+        pipeline.zrem(RepositoryConstants.PROCESS_EXPIRY_INDEX_KEY, str(id))
+        pipeline.execute()
+
+    async def fetch_json_data(
+        self, id: int, key: str = RepositoryConstants.META_KEY
+    ) -> str:
+        data = self._redis.json().get(process_key(id, key))
+        if not data:
+            return None
+
+        self._record_access(id)
+        return json.loads(data) if isinstance(data, str) else data
+
+    async def save_json_data(
+        self,
+        id: int,
+        data: dict,
+        key: str = RepositoryConstants.META_KEY,
+        path: str = ".",
+    ):
+        self._redis.json().set(process_key(id, key), path=path, obj=data)
+        self._touch(id, key)
+
+    async def append_json_data(
+        self, id: int, key: str, items: list, max_length: int = 0
+    ) -> int:
+        list_key = process_key(id, key)
+        if not items:
+            return self._redis.llen(list_key)
+
+        length = self._redis.rpush(list_key, *[json.dumps(item) for item in items])
+        if max_length and length > max_length:
+            self._redis.ltrim(list_key, -max_length, -1)
+            length = max_length
+        self._touch(id, key)
+        return length
+
+    async def fetch_json_range(
+        self, id: int, key: str, start: int = 0, end: int = -1
+    ) -> list:
+        items = self._redis.lrange(process_key(id, key), start, end)
+        return [json.loads(item) for item in items]
+
+    async def save_segment(self, id: int, key: str, index: int, segment: bytes):
+        self._redis.hset(process_key(id, key), index, segment)
+        self._touch(id, key)
+
+    async def fetch_segments(self, id: int, key: str) -> list:
+        segments = self._redis.hgetall(process_key(id, key))
+        return [segments[index] for index in sorted(segments, key=int)]
+
+    async def save_index_entry(
+        self, index: str, field: str, value, process_id: int = None
+    ):
+        pipeline = self._redis.pipeline()
+        pipeline.hset(index_key(index), field, json.dumps(value))
+        if process_id is None:
+            pipeline.hdel(index_owners_key(index), field)
+        else:
+            pipeline.hset(index_owners_key(index), field, str(process_id))
+            pipeline.sadd(
+                process_key(process_id, RepositoryConstants.INDEX_ENTRIES_KEY),
+                json.dumps([index, field]),
+            )
+        pipeline.execute()
+
+    async def fetch_index_entry(self, index: str, field: str):
+        value = self._redis.hget(index_key(index), field)
+        return json.loads(value) if value is not None else None
+
+    async def fetch_index(self, index: str) -> dict:
+        entries = self._redis.hgetall(index_key(index))
+        return {field.decode(): json.loads(value) for field, value in entries.items()}
+
+    async def delete_index_entry(self, index: str, field: str):
+        pipeline = self._redis.pipeline()
+        pipeline.hdel(index_key(index), field)
+        pipeline.hdel(index_owners_key(index), field)
+        pipeline.execute()
+
+    def _create_series(self, series_names: set):
+        """
+        Create the series not created yet by this worker along with their
+        downsampled series and compaction rule. Series created meanwhile by
+        another worker make the commands fail, which is ignored.
+        """
+        new_series = series_names - self._created_series
+        if not new_series:
+            return
+
+        pipeline = self._redis.ts().pipeline(transaction=False)
+        for series in new_series:
+            pipeline.create(
+                series_key(series),
+                retention_msecs=settings.TIMESERIES_RETENTION_IN_SECONDS * 1000,
+                duplicate_policy="last",
+            )
+            if settings.TIMESERIES_DOWNSAMPLE_BUCKET_IN_SECONDS:
+                pipeline.create(
+                    series_key(downsampled_series(series)),
+                    retention_msecs=(
+                        settings.TIMESERIES_DOWNSAMPLED_RETENTION_IN_SECONDS * 1000
+                    ),
+                    duplicate_policy="last",
+                )
+                pipeline.createrule(
+                    series_key(series),
+                    series_key(downsampled_series(series)),
+                    TimeSeriesConstants.DOWNSAMPLE_AGGREGATION,
+                    settings.TIMESERIES_DOWNSAMPLE_BUCKET_IN_SECONDS * 1000,
+                )
+        pipeline.execute(raise_on_error=False)
+        self._created_series |= new_series
+
+    async def append_samples(self, samples: list):
+        if not samples:
+            return
+
+        self._create_series({series for series, _, _ in samples})
+        self._redis.ts().madd(
+            [
+                (series_key(series), int(timestamp) * 1000, value)
+                for series, timestamp, value in samples
+            ]
+        )
+
+    async def fetch_samples(
+        self,
+        series: str,
+        start: int,
+        end: int,
+        aggregation: str = None,
+        bucket_seconds: int = 0,
+    ) -> list:
+        if serves_from_downsampled(start):
+            series = downsampled_series(series)
+
+        aggregation_arguments = (
+            {"aggregation_type": aggregation, "bucket_size_msec": bucket_seconds * 1000}
+            if aggregation
+            else {}
+        )
+        try:
+            samples = self._redis.ts().range(
+                series_key(series), start * 1000, end * 1000, **aggregation_arguments
+            )
+        except redis.ResponseError:
+            # The series doesn't exist yet.
+            return []
+
+        return [[timestamp // 1000, float(value)] for timestamp, value in samples]
+
+    async def acquire_lock(self, name: str, ttl_seconds: int) -> bool:
+        return bool(
+            self._redis.set(
+                f"{RepositoryConstants.LOCK_KEY_PREFIX}:{name}",
+                1,
+                nx=True,
+                ex=ttl_seconds,
+            )
+        )
 
-    async def fetch_json_data(self, id: int) -> str:
-        data = self._redis.json().get(id)
-        return json.loads(data) if data else None
+    async def release_lock(self, name: str):
+        self._redis.delete(f"{RepositoryConstants.LOCK_KEY_PREFIX}:{name}")
 
-    async def save_json_data(self, id: int, data: dict, path: str = "."):
-        self._redis.json().set(id, path=path, obj=data)
+    async def delete_process(self, id: int):
+        self._delete_process(id)
@@ -0,0 +1,43 @@
+from functools import lru_cache
+
+from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.constants import RepositoryConstants
+from weather_data_fetcher_service.core.repositories.base_repository import (
+    BaseRepository,
+)
+
+
+@lru_cache(maxsize=None)
+def get_repository() -> BaseRepository:
+    """
+    Build the repository selected by `settings.REPOSITORY_BACKEND`.
+
+    The instance is cached, so every process in the worker shares the same
+    client and the in-memory backend keeps its data between requests.
+    Backends are imported lazily so an unused backend's dependencies are
+    never required.
+    """
+    backend = settings.REPOSITORY_BACKEND.lower()
+
+    if backend == RepositoryConstants.REDIS_BACKEND:
+        from weather_data_fetcher_service.core.repositories.redis_repository import (
+            RedisRepository,
+        )
+
+        return RedisRepository()
+
+    if backend == RepositoryConstants.SQLITE_BACKEND:
+        from weather_data_fetcher_service.core.repositories.sqlite_repository import (
+            SQLiteRepository,
+        )
+
+        return SQLiteRepository()
+
+    if backend == RepositoryConstants.MEMORY_BACKEND:
+        from weather_data_fetcher_service.core.repositories.memory_repository import (
+            InMemoryRepository,
+        )
+
+        return InMemoryRepository()
+
+    raise ValueError(f"Unknown repository backend: {settings.REPOSITORY_BACKEND}")
@@ -0,0 +1,124 @@
+import json
+import struct
+import zlib
+from array import array
+
+from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.constants import RepositoryConstants
+from weather_data_fetcher_service.core.repositories.base_repository import (
+    BaseRepository,
+)
+
+SEGMENT_MAGIC = b"WDS1"
+SEGMENTS_KEY = "results"
+
+INTEGER_TYPECODE = "q"
+FLOAT_TYPECODE = "d"
+JSON_TYPECODE = "j"
+
+
+def _column_typecode(values: list) -> str:
+    if all(type(value) is int for value in values):
+        return INTEGER_TYPECODE
+    if all(type(value) in (int, float) for value in values):
+        return FLOAT_TYPECODE
+    return JSON_TYPECODE
+
+
+def encode_results_segment(results: list) -> bytes:
+    """
+    Encode a list of result dicts as compressed, column-packed bytes.
+
+    Every key becomes a column stored as a packed int64/float64 array, so the
+    repeated keys of the JSON layout are written once per segment. Columns
+    holding anything other than numbers fall back to a JSON list.
+    """
+    columns = list(results[0].keys()) if results else []
+    header = {"count": len(results), "columns": []}
+    payloads = []
+
+    for column in columns:
+        values = [result.get(column) for result in results]
+        typecode = _column_typecode(values)
+
+        if typecode == JSON_TYPECODE:
+            payload = json.dumps(values).encode()
+        else:
+            payload = array(typecode, values).tobytes()
+
+        header["columns"].append([column, typecode, len(payload)])
+        payloads.append(payload)
+
+    encoded_header = json.dumps(header).encode()
+    raw = struct.pack(">I", len(encoded_header)) + encoded_header + b"".join(payloads)
+
+    return SEGMENT_MAGIC + zlib.compress(raw, level=3)
+
+
+def decode_results_segment(segment: bytes) -> list:
+    if not segment.startswith(SEGMENT_MAGIC):
+        raise ValueError("Invalid results segment")
+
+    raw = zlib.decompress(segment[len(SEGMENT_MAGIC) :])
+    (header_length,) = struct.unpack(">I", raw[:4])
+    header = json.loads(raw[4 : 4 + header_length])
+
+    offset = 4 + header_length
+    columns = {}
+    for column, typecode, length in header["columns"]:
+        payload = raw[offset : offset + length]
+        offset += length
+
+        if typecode == JSON_TYPECODE:
+            columns[column] = json.loads(payload)
+        else:
+            columns[column] = array(typecode, payload).tolist()
+
+    return [
+        {column: values[index] for column, values in columns.items()}
+        for index in range(header["count"])
+    ]
+
+
+async def save_results_segments(
+    repository: BaseRepository, id: int, results: list, start: int = 0
+):
+    """
+    Store `results` as fixed-size segments, rewriting only the segments that
+    contain items from index `start` onwards.
+    """
+    segment_size = settings.RESULTS_SEGMENT_SIZE
+    first_segment = start // segment_size
+
+    for index in range(first_segment * segment_size, len(results), segment_size):
+        await repository.save_segment(
+            id,
+            SEGMENTS_KEY,
+            index // segment_size,
+            encode_results_segment(results[index : index + segment_size]),
+        )
+
+
+async def fetch_results_segments(repository: BaseRepository, id: int) -> list:
+    results = []
+    for segment in await repository.fetch_segments(id, SEGMENTS_KEY):
+        results.extend(decode_results_segment(segment))
+    return results
+
+
+async def fetch_stored_results(
+    repository: BaseRepository, stored_process_data: dict
+) -> list:
+    """
+    Return the results of a stored process, whatever format they were stored in.
+    """
+    if (
+        stored_process_data.get("results_format")
+        == RepositoryConstants.PACKED_RESULTS_FORMAT
+    ):
+        results = await fetch_results_segments(
+            repository, stored_process_data.get("process_id")
+        )
+        return results[: stored_process_data.get("processed_cities")]
+
+    return stored_process_data.get("results")
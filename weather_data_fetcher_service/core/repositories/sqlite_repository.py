@@ -0,0 +1,424 @@
+import json
+import sqlite3
+import time
+from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.constants import RepositoryConstants
+from weather_data_fetcher_service.core.repositories.base_repository import (
+    BaseRepository,
+)
+from weather_data_fetcher_service.core.repositories.time_series import (
+    aggregate_samples,
+    bucket_start,
+    serves_from_downsampled,
+)
+
+PROCESS_TABLES = (
+    "documents",
+    "list_items",
+    "segments",
+    "processes",
+    "index_entry_owners",
+)
+
+
+class SQLiteRepository(BaseRepository):
+    """
+    Embedded, disk-backed repository for single-node deployments.
+
+    The database runs in WAL mode so the uvicorn workers can keep reading while
+    one of them writes.
+    """
+
+    def __init__(self, db_path: str = None):
+        self._connection = sqlite3.connect(
+            db_path or settings.SQLITE_DB_PATH,
+            timeout=settings.SQLITE_BUSY_TIMEOUT_IN_SECONDS,
+            check_same_thread=False,
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+
+    def _create_tables(self):
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "id TEXT NOT NULL, key TEXT NOT NULL, data TEXT NOT NULL, "
+                "PRIMARY KEY (id, key))"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS list_items ("
+                "id TEXT NOT NULL, key TEXT NOT NULL, position INTEGER NOT NULL, "
+                "data TEXT NOT NULL, PRIMARY KEY (id, key, position))"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS segments ("
+                "id TEXT NOT NULL, key TEXT NOT NULL, position INTEGER NOT NULL, "
+                "data BLOB NOT NULL, PRIMARY KEY (id, key, position))"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS processes ("
+                "id TEXT PRIMARY KEY, score REAL NOT NULL, expires_at REAL)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS index_entries ("
+                "name TEXT NOT NULL, field TEXT NOT NULL, data TEXT NOT NULL, "
+                "PRIMARY KEY (name, field))"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS index_entry_owners ("
+                "name TEXT NOT NULL, field TEXT NOT NULL, id TEXT NOT NULL, "
+                "PRIMARY KEY (name, field))"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS index_entry_owners_id "
+                "ON index_entry_owners (id)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS locks ("
+                "name TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS samples ("
+                "series TEXT NOT NULL, timestamp INTEGER NOT NULL, value REAL NOT NULL, "
+                "PRIMARY KEY (series, timestamp)) WITHOUT ROWID"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS samples_timestamp ON samples (timestamp)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS sample_buckets ("
+                "series TEXT NOT NULL, bucket INTEGER NOT NULL, total REAL NOT NULL, "
+                "count INTEGER NOT NULL, PRIMARY KEY (series, bucket)) WITHOUT ROWID"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS sample_buckets_bucket "
+                "ON sample_buckets (bucket)"
+            )
+
+    def _is_live(self, id: int) -> bool:
+        """
+        Check whether the process exists, dropping it first if its TTL has
+        elapsed.
+        """
+        row = self._connection.execute(
+            "SELECT expires_at FROM processes WHERE id = ?", (str(id),)
+        ).fetchone()
+        if not row:
+            return False
+
+        if row[0] is not None and row[0] <= time.time():
+            with self._connection:
+                self._delete_process(str(id))
+            return False
+
+        return True
+
+    def _touch(self, id: int):
+        now = time.time()
+        expires_at = (
+            now + settings.PROCESS_TTL_IN_SECONDS
+            if settings.PROCESS_TTL_IN_SECONDS
+            else None
+        )
+        score_update = (
+            "score"
+            if settings.PROCESS_EVICTION_POLICY
+            == RepositoryConstants.AGE_EVICTION_POLICY
+            else "excluded.score"
+        )
+
+        self._connection.execute(
+            "INSERT INTO processes (id, score, expires_at) VALUES (?, ?, ?) "
+            f"ON CONFLICT (id) DO UPDATE SET score = {score_update}, "
+            "expires_at = excluded.expires_at",
+            (str(id), now, expires_at),
+        )
+        self._evict()
+
+    def _record_access(self, id: int):
+        if settings.PROCESS_EVICTION_POLICY == RepositoryConstants.LRU_EVICTION_POLICY:
+            with self._connection:
+                self._connection.execute(
+                    "UPDATE processes SET score = ? WHERE id = ?",
+                    (time.time(), str(id)),
+                )
+
+    def _evict(self):
+        if not settings.MAX_STORED_PROCESSES:
+            return
+
+        rows = self._connection.execute(
+            "SELECT id FROM processes ORDER BY score DESC LIMIT -1 OFFSET ?",
+            (settings.MAX_STORED_PROCESSES,),
+        ).fetchall()
+        for (id,) in rows:
+            self._delete_process(id)
+
+    def _delete_process(self, id: str):
+        self._connection.execute(
+            "DELETE FROM index_entries WHERE (name, field) IN "
+            "(SELECT name, field FROM index_entry_owners WHERE id = ?)",
+            (id,),
+        )
+        for table in PROCESS_TABLES:
+            self._connection.execute(f"DELETE FROM {table} WHERE id = ?", (id,))
+
+    def _list_length(self, id: int, key: str) -> int:
+        row = self._connection.execute(
+            "SELECT COUNT(*) FROM list_items WHERE id = ? AND key = ?",
+            (str(id), key),
+        ).fetchone()
+        return row[0]
+
+    async def fetch_json_data(self, id: int, key: str = RepositoryConstants.META_KEY):
+        if not self._is_live(id):
+            return None
+
+        row = self._connection.execute(
+            "SELECT data FROM documents WHERE id = ? AND key = ?", (str(id), key)
+        ).fetchone()
+        if not row:
+            return None
+
+        self._record_access(id)
+        return json.loads(row[0])
+
+    async def save_json_data(
+        self, id: int, data: dict, key: str = RepositoryConstants.META_KEY
+    ):
+        self._is_live(id)
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO documents (id, key, data) VALUES (?, ?, ?)",
+                (str(id), key, data if isinstance(data, str) else json.dumps(data)),
+            )
+            self._touch(id)
+
+    async def append_json_data(
+        self, id: int, key: str, items: list, max_length: int = 0
+    ) -> int:
+        self._is_live(id)
+        with self._connection:
+            length = self._list_length(id, key)
+            self._connection.executemany(
+                "INSERT INTO list_items (id, key, position, data) VALUES (?, ?, ?, ?)",
+                [
+                    (str(id), key, length + offset, json.dumps(item))
+                    for offset, item in enumerate(items)
+                ],
+            )
+            length += len(items)
+            if max_length and length > max_length:
+                self._trim_list(id, key, length - max_length)
+                length = max_length
+            self._touch(id)
+        return length
+
+    def _trim_list(self, id: int, key: str, count: int):
+        """
+        Drop the first `count` items of a list and shift the others down. The
+        positions go through negative values so they never collide.
+        """
+        self._connection.execute(
+            "DELETE FROM list_items WHERE id = ? AND key = ? AND position < ?",
+            (str(id), key, count),
+        )
+        self._connection.execute(
+            "UPDATE list_items SET position = -1 - (position - ?) "
+            "WHERE id = ? AND key = ?",
+            (count, str(id), key),
+        )
+        self._connection.execute(
+            "UPDATE list_items SET position = -1 - position WHERE id = ? AND key = ?",
+            (str(id), key),
+        )
+
+    async def fetch_json_range(
+        self, id: int, key: str, start: int = 0, end: int = -1
+    ) -> list:
+        if not self._is_live(id):
+            return []
+
+        length = self._list_length(id, key)
+        start = max(length + start, 0) if start < 0 else start
+        end = length + end if end < 0 else min(end, length - 1)
+
+        rows = self._connection.execute(
+            "SELECT data FROM list_items WHERE id = ? AND key = ? "
+            "AND position BETWEEN ? AND ? ORDER BY position",
+            (str(id), key, start, end),
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    async def save_segment(self, id: int, key: str, index: int, segment: bytes):
+        self._is_live(id)
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO segments (id, key, position, data) "
+                "VALUES (?, ?, ?, ?)",
+                (str(id), key, index, segment),
+            )
+            self._touch(id)
+
+    async def fetch_segments(self, id: int, key: str) -> list:
+        if not self._is_live(id):
+            return []
+
+        rows = self._connection.execute(
+            "SELECT data FROM segments WHERE id = ? AND key = ? ORDER BY position",
+            (str(id), key),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    async def save_index_entry(
+        self, index: str, field: str, value, process_id: int = None
+    ):
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO index_entries (name, field, data) "
+                "VALUES (?, ?, ?)",
+                (index, field, json.dumps(value)),
+            )
+            self._connection.execute(
+                "DELETE FROM index_entry_owners WHERE name = ? AND field = ?",
+                (index, field),
+            )
+            if process_id is not None:
+                self._connection.execute(
+                    "INSERT INTO index_entry_owners (name, field, id) VALUES (?, ?, ?)",
+                    (index, field, str(process_id)),
+                )
+
+    async def fetch_index_entry(self, index: str, field: str):
+        row = self._connection.execute(
+            "SELECT data FROM index_entries WHERE name = ? AND field = ?",
+            (index, field),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    async def fetch_index(self, index: str) -> dict:
+        rows = self._connection.execute(
+            "SELECT field, data FROM index_entries WHERE name = ?", (index,)
+        ).fetchall()
+        return {field: json.loads(data) for field, data in rows}
+
+    async def delete_index_entry(self, index: str, field: str):
+        with self._connection:
+            for table in ("index_entries", "index_entry_owners"):
+                self._connection.execute(
+                    f"DELETE FROM {table} WHERE name = ? AND field = ?",
+                    (index, field),
+                )
+
+    async def append_samples(self, samples: list):
+        """
+        Downsampled series are kept as the running total and count of each
+        bucket, a replaced sample taking its value out of its bucket first.
+        Retention is applied from the newest appended sample.
+        """
+        if not samples:
+            return
+
+        bucket_seconds = settings.TIMESERIES_DOWNSAMPLE_BUCKET_IN_SECONDS
+        # The last sample of a batch for the same timestamp wins.
+        samples = [
+            (series, timestamp, value)
+            for (series, timestamp), value in {
+                (series, int(timestamp)): float(value)
+                for series, timestamp, value in samples
+            }.items()
+        ]
+        newest = max(timestamp for _, timestamp, _ in samples)
+
+        with self._connection:
+            if bucket_seconds:
+                self._connection.executemany(
+                    "UPDATE sample_buckets SET "
+                    "total = total - replaced.value, count = count - 1 "
+                    "FROM (SELECT value FROM samples "
+                    "WHERE series = ? AND timestamp = ?) AS replaced "
+                    "WHERE series = ? AND bucket = ?",
+                    [
+                        (
+                            series,
+                            timestamp,
+                            series,
+                            bucket_start(timestamp, bucket_seconds),
+                        )
+                        for series, timestamp, _ in samples
+                    ],
+                )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO samples (series, timestamp, value) "
+                "VALUES (?, ?, ?)",
+                samples,
+            )
+            if bucket_seconds:
+                self._connection.executemany(
+                    "INSERT INTO sample_buckets (series, bucket, total, count) "
+                    "VALUES (?, ?, ?, 1) ON CONFLICT (series, bucket) DO UPDATE SET "
+                    "total = total + excluded.total, count = count + 1",
+                    [
+                        (series, bucket_start(timestamp, bucket_seconds), value)
+                        for series, timestamp, value in samples
+                    ],
+                )
+
+            if settings.TIMESERIES_RETENTION_IN_SECONDS:
+                self._connection.execute(
+                    "DELETE FROM samples WHERE timestamp < ?",
+                    (newest - settings.TIMESERIES_RETENTION_IN_SECONDS,),
+                )
+            if settings.TIMESERIES_DOWNSAMPLED_RETENTION_IN_SECONDS:
+                self._connection.execute(
+                    "DELETE FROM sample_buckets WHERE bucket < ?",
+                    (newest - settings.TIMESERIES_DOWNSAMPLED_RETENTION_IN_SECONDS,),
+                )
+
+    async def fetch_samples(
+        self,
+        series: str,
+        start: int,
+        end: int,
+        aggregation: str = None,
+        bucket_seconds: int = 0,
+    ) -> list:
+        if serves_from_downsampled(start):
+            query = (
+                "SELECT bucket, total / count FROM sample_buckets "
+                "WHERE series = ? AND bucket BETWEEN ? AND ? ORDER BY bucket"
+            )
+        else:
+            query = (
+                "SELECT timestamp, value FROM samples "
+                "WHERE series = ? AND timestamp BETWEEN ? AND ? ORDER BY timestamp"
+            )
+
+        samples = [
+            list(row)
+            for row in self._connection.execute(query, (series, start, end)).fetchall()
+        ]
+        if aggregation:
+            return aggregate_samples(samples, aggregation, bucket_seconds)
+        return samples
+
+    async def acquire_lock(self, name: str, ttl_seconds: int) -> bool:
+        now = time.time()
+        with self._connection:
+            self._connection.execute(
+                "DELETE FROM locks WHERE name = ? AND expires_at <= ?", (name, now)
+            )
+            cursor = self._connection.execute(
+                "INSERT OR IGNORE INTO locks (name, expires_at) VALUES (?, ?)",
+                (name, now + ttl_seconds),
+            )
+        return cursor.rowcount == 1
+
+    async def release_lock(self, name: str):
+        with self._connection:
+            self._connection.execute("DELETE FROM locks WHERE name = ?", (name,))
+
+    async def delete_process(self, id: int):
+        with self._connection:
+            self._delete_process(str(id))
@@ -0,0 +1,83 @@
+import time
+
+from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.constants import TimeSeriesConstants
+
+AGGREGATE_FUNCTIONS = {
+    "avg": lambda values: sum(values) / len(values),
+    "min": min,
+    "max": max,
+    "sum": sum,
+    "count": len,
+    "first": lambda values: values[0],
+    "last": lambda values: values[-1],
+}
+
+
+def city_series(city_id, field: str) -> str:
+    return f"city:{city_id}:{field}"
+
+
+def downsampled_series(series: str) -> str:
+    return f"{series}:{TimeSeriesConstants.DOWNSAMPLED_SUFFIX}"
+
+
+def readings_samples(results: list) -> list:
+    """
+    Turn fetched results into `(series, timestamp, value)` samples, one per
+    reading of each city, timestamped with the time it was fetched.
+    """
+    return [
+        (city_series(result["city_id"], field), result["fetched_at"], result[field])
+        for result in results
+        for field in TimeSeriesConstants.FIELDS
+        if result.get(field) is not None and result.get("fetched_at")
+    ]
+
+
+def serves_from_downsampled(start: float) -> bool:
+    """
+    Check whether a range starting at `start` reaches back beyond the raw
+    retention, and has to be read from the downsampled series.
+    """
+    return bool(
+        settings.TIMESERIES_DOWNSAMPLE_BUCKET_IN_SECONDS
+        and settings.TIMESERIES_RETENTION_IN_SECONDS
+        and start < time.time() - settings.TIMESERIES_RETENTION_IN_SECONDS
+    )
+
+
+def bucket_start(timestamp: int, bucket_seconds: int) -> int:
+    return timestamp - timestamp % bucket_seconds
+
+
+def aggregate_samples(samples: list, aggregation: str, bucket_seconds: int) -> list:
+    """
+    Aggregate time ordered `[timestamp, value]` samples into buckets of
+    `bucket_seconds` aligned on the epoch, each timestamped with its start,
+    as RedisTimeSeries does.
+    """
+    buckets = {}
+    for timestamp, value in samples:
+        buckets.setdefault(bucket_start(timestamp, bucket_seconds), []).append(value)
+
+    return [
+        [timestamp, AGGREGATE_FUNCTIONS[aggregation](values)]
+        for timestamp, values in buckets.items()
+    ]
+
+
+async def fetch_city_history(
+    repository,
+    city_id,
+    start: int,
+    end: int,
+    aggregation: str = None,
+    bucket_seconds: int = 0,
+) -> dict:
+    return {
+        field: await repository.fetch_samples(
+            city_series(city_id, field), start, end, aggregation, bucket_seconds
+        )
+        for field in TimeSeriesConstants.FIELDS
+    }
@@ -9,10 +9,75 @@ class Settings(BaseSettings):
     )
     OPEN_WEATHER_API_KEY: str
 
+    PARSE_EXECUTOR: str = Field(default="inline")
+    PARSE_EXECUTOR_WORKERS: int = Field(default=0)
+    PARSE_EXECUTOR_MIN_BYTES: int = Field(default=65536)
+
+    HEDGING_ENABLED: bool = Field(default=False)
+    HEDGING_PERCENTILE: float = Field(default=0.95)
+    HEDGING_MIN_SAMPLES: int = Field(default=20)
+    HEDGING_LATENCY_WINDOW: int = Field(default=200)
+    HEDGING_REQUESTS_PER_MINUTE: int = Field(default=1)
+    HEDGING_API_KEY: str = Field(default="")
+
+    GEO_BATCHING_ENABLED: bool = Field(default=False)
+    GEO_CITY_LIST_PATH: str = Field(default="")
+    GEO_CELL_SIZE_IN_DEGREES: float = Field(default=1.0)
+    GEO_MIN_CITIES_PER_BOX: int = Field(default=20)
+    GEO_BOX_ZOOM: int = Field(default=10)
+
+    LOG_LEVEL: str = Field(default="DEBUG")
+    LOG_FORMAT: str = Field(default="text")
+    LOG_ASYNC: bool = Field(default=True)
+    LOG_SAMPLE_EVERY: int = Field(default=1)
+
+    REPOSITORY_BACKEND: str = Field(default="redis")
+
     REDIS_HOST: str = Field(default="localhost")
     REDIS_PORT: int = Field(default=6379)
     REDIS_DB: int = Field(default=0)
 
+    SQLITE_DB_PATH: str = Field(default="weather_data.db")
+    SQLITE_BUSY_TIMEOUT_IN_SECONDS: int = Field(default=5)
+
+    RESULTS_STORAGE_FORMAT: str = Field(default="json")
+    RESULTS_SEGMENT_SIZE: int = Field(default=1000)
+
+    PROCESS_TTL_IN_SECONDS: int = Field(default=0)
+    MAX_STORED_PROCESSES: int = Field(default=0)
+    PROCESS_EVICTION_POLICY: str = Field(default="lru")
+
+    DEDUP_FRESHNESS_IN_SECONDS: int = Field(default=600)
+    INVALID_CITY_STRIKES: int = Field(default=3)
+    INVALID_CITY_TTL_IN_SECONDS: int = Field(default=24 * 3600)
+    CHANGE_FEED_ENABLED: bool = Field(default=False)
+    CHANGE_FEED_MAX_CHANGES: int = Field(default=10000)
+
+    SCHEDULER_ENABLED: bool = Field(default=False)
+    SCHEDULER_TICK_IN_SECONDS: int = Field(default=30)
+
+    BATCH_SCHEDULER_ENABLED: bool = Field(default=False)
+    BATCH_SCHEDULER_REQUESTS_PER_MINUTE: int = Field(default=0)
+    BATCH_SCHEDULER_TENANT_REQUESTS_PER_MINUTE: int = Field(default=0)
+    BATCH_SCHEDULER_SMALL_JOB_CITIES: int = Field(default=100)
+
+    PROCESS_TIMELINE_ENABLED: bool = Field(default=False)
+    PROFILING_ENABLED: bool = Field(default=False)
+
+    RESPONSE_CACHE_MAX_ENTRIES: int = Field(default=256)
+
+    TIMESERIES_ENABLED: bool = Field(default=False)
+    TIMESERIES_RETENTION_IN_SECONDS: int = Field(default=7 * 24 * 3600)
+    TIMESERIES_DOWNSAMPLE_BUCKET_IN_SECONDS: int = Field(default=3600)
+    TIMESERIES_DOWNSAMPLED_RETENTION_IN_SECONDS: int = Field(default=365 * 24 * 3600)
+
+    ADMISSION_CONTROL_ENABLED: bool = Field(default=False)
+    ADMISSION_MAX_CONCURRENT_UPLOADS: int = Field(default=16)
+    ADMISSION_MAX_CONCURRENT_PROCESSES: int = Field(default=4)
+    ADMISSION_MAX_QUEUED_REQUESTS: int = Field(default=64)
+    ADMISSION_MAX_QUEUE_WAIT_IN_SECONDS: float = Field(default=30)
+    ADMISSION_MAX_INFLIGHT_CITIES: int = Field(default=50000)
+
     ROUTE_TIMEOUT_IN_SECONDS: int = Field(default=600)
 
     model_config = ConfigDict(env_file=".env", env_file_encoding="utf-8")
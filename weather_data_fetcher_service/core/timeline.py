@@ -0,0 +1,44 @@
+import time
+from contextlib import contextmanager
+
+
+class ProcessTimeline:
+    """
+    Timeline of the spans (fetch, filter, serialize, store, wait...) recorded
+    during one process execution, with their offsets from the start of it.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.spans = []
+
+    @contextmanager
+    def span(self, name: str, **fields):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.spans.append(
+                {
+                    "name": name,
+                    "start": round(start - self._start, 6),
+                    "duration": round(end - start, 6),
+                    **fields,
+                }
+            )
+
+    def to_dict(self) -> dict:
+        totals = {}
+        for span in self.spans:
+            totals[span["name"]] = round(
+                totals.get(span["name"], 0) + span["duration"], 6
+            )
+
+        return {
+            "started_at": self.started_at,
+            "total_seconds": round(time.perf_counter() - self._start, 6),
+            "totals": totals,
+            "spans": self.spans,
+        }
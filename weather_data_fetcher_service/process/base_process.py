@@ -1,5 +1,8 @@
+from contextlib import nullcontext
 from pydantic import BaseModel
+from weather_data_fetcher_service.core import settings
 from weather_data_fetcher_service.core.logger import logger
+from weather_data_fetcher_service.core.timeline import ProcessTimeline
 
 
 class BaseProcess:
@@ -8,6 +11,16 @@ class BaseProcess:
         self.process_data = process_data
         self.logger = logger
         self.log_identifier = f"[Process ID: {self.process_data.process_id}] -"
+        self.timeline = ProcessTimeline() if settings.PROCESS_TIMELINE_ENABLED else None
+
+    def span(self, name: str, **fields):
+        """
+        Time the enclosed block as a span of the process timeline, when
+        `settings.PROCESS_TIMELINE_ENABLED` is set.
+        """
+        if self.timeline is None:
+            return nullcontext()
+        return self.timeline.span(name, **fields)
 
     def execute(self):
         raise NotImplementedError("Method 'execute' must be implemented in subclass")
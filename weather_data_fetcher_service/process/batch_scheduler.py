@@ -0,0 +1,210 @@
+import asyncio
+import time
+from collections import deque
+from functools import lru_cache
+
+from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.logger import logger
+from weather_data_fetcher_service.core.rate_limiter import TokenBucket
+
+
+class BatchFlow:
+    """
+    The pending batches of one process, as seen by the scheduler.
+    """
+
+    def __init__(self, process_id: int, batches: list, fetch, weight: float, tenant):
+        self.process_id = process_id
+        self.pending = deque(batches)
+        self.remaining_cities = sum(len(batch) for batch in batches)
+        self.fetch = fetch
+        self.weight = weight
+        self.tenant = tenant
+        self.finish_tag = 0.0
+        self.last_finish_tag = 0.0
+        self.results = asyncio.Queue()
+
+
+class BatchScheduler:
+    """
+    Central scheduler interleaving the upstream requests of every active
+    process under one rate limit.
+
+    Batches are picked by self-clocked weighted fair queuing: the head batch
+    of each process gets a virtual finish tag of `max(virtual time, previous
+    tag) + cities / weight` and the smallest tag goes first, so concurrent
+    processes share the quota in proportion to their weight however big they
+    are. Processes with at most `small_job_cities` cities left are served
+    before any other (shortest job first), and a tenant can be capped to
+    `tenant_requests_per_minute`.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tenant_requests_per_minute: int = 0,
+        small_job_cities: int = 0,
+        clock=time.monotonic,
+    ):
+        self.rate_limiter = TokenBucket(requests_per_minute, clock=clock)
+        self.tenant_requests_per_minute = tenant_requests_per_minute
+        self.small_job_cities = small_job_cities
+        self.logger = logger
+        self._clock = clock
+        self._tenant_rate_limiters = {}
+        self._flows = []
+        self._virtual_time = 0.0
+        self._dispatcher = None
+        self._batch_tasks = set()
+
+    def _tenant_rate_limiter(self, tenant):
+        if not tenant or not self.tenant_requests_per_minute:
+            return None
+
+        if tenant not in self._tenant_rate_limiters:
+            self._tenant_rate_limiters[tenant] = TokenBucket(
+                self.tenant_requests_per_minute, clock=self._clock
+            )
+        return self._tenant_rate_limiters[tenant]
+
+    def _tag(self, flow: BatchFlow):
+        start_tag = max(self._virtual_time, flow.last_finish_tag)
+        flow.finish_tag = start_tag + len(flow.pending[0]) / flow.weight
+
+    def add_flow(self, flow: BatchFlow):
+        if flow.pending:
+            self._tag(flow)
+        self._flows.append(flow)
+
+    def remove_flow(self, flow: BatchFlow):
+        if flow in self._flows:
+            self._flows.remove(flow)
+
+    def has_pending_batches(self) -> bool:
+        return any(flow.pending for flow in self._flows)
+
+    def next_batch(self):
+        """
+        Pick the next batch to send, ignoring the global rate limit.
+
+        Returns:
+            tuple: The flow and its batch, or None if every flow with pending
+            batches belongs to a throttled tenant.
+        """
+        eligible_flows = []
+        for flow in self._flows:
+            if not flow.pending:
+                continue
+            tenant_rate_limiter = self._tenant_rate_limiter(flow.tenant)
+            if tenant_rate_limiter and not tenant_rate_limiter.available():
+                continue
+            eligible_flows.append(flow)
+
+        if not eligible_flows:
+            return None
+
+        flow = min(
+            eligible_flows,
+            key=lambda flow: (
+                flow.remaining_cities > self.small_job_cities,
+                flow.finish_tag,
+            ),
+        )
+
+        tenant_rate_limiter = self._tenant_rate_limiter(flow.tenant)
+        if tenant_rate_limiter:
+            tenant_rate_limiter.try_acquire()
+
+        batch = flow.pending.popleft()
+        flow.remaining_cities -= len(batch)
+        self._virtual_time = flow.finish_tag
+        flow.last_finish_tag = flow.finish_tag
+        if flow.pending:
+            self._tag(flow)
+
+        return flow, batch
+
+    def _time_until_tenant_available(self) -> float:
+        waits = [
+            self._tenant_rate_limiter(flow.tenant).time_until_available()
+            for flow in self._flows
+            if flow.pending and self._tenant_rate_limiter(flow.tenant)
+        ]
+        return min(waits, default=0.0)
+
+    async def _run_batch(self, flow: BatchFlow, batch: list):
+        try:
+            result = await flow.fetch(batch)
+        except Exception as e:
+            self.logger.error(
+                "[Process ID: %s] - Scheduled batch failed: %s",
+                flow.process_id,
+                e,
+                process_id=flow.process_id,
+                batch_size=len(batch),
+            )
+            result = False
+        flow.results.put_nowait(result)
+
+    async def _dispatch(self):
+        while self.has_pending_batches():
+            wait = self.rate_limiter.time_until_available()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+
+            selected = self.next_batch()
+            if selected is None:
+                await asyncio.sleep(self._time_until_tenant_available())
+                continue
+
+            self.rate_limiter.try_acquire()
+            flow, batch = selected
+            batch_task = asyncio.create_task(self._run_batch(flow, batch))
+            self._batch_tasks.add(batch_task)
+            batch_task.add_done_callback(self._batch_tasks.discard)
+
+    def _ensure_dispatcher(self):
+        if (
+            self._dispatcher is None
+            or self._dispatcher.done()
+            or self._dispatcher.get_loop() is not asyncio.get_running_loop()
+        ):
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def schedule(
+        self,
+        process_id: int,
+        batches: list,
+        fetch,
+        weight: float = 1.0,
+        tenant: str = None,
+    ):
+        """
+        Queue the batches of a process and yield each batch's result as it
+        completes. Pending batches are dropped if the caller stops iterating.
+        """
+        flow = BatchFlow(process_id, batches, fetch, weight, tenant)
+        self.add_flow(flow)
+        self._ensure_dispatcher()
+
+        try:
+            for _ in range(len(batches)):
+                yield await flow.results.get()
+        finally:
+            self.remove_flow(flow)
+
+
+@lru_cache(maxsize=None)
+def get_batch_scheduler(requests_per_minute: int) -> BatchScheduler:
+    """
+    Return the worker's batch scheduler for the given upstream rate.
+    `settings.BATCH_SCHEDULER_REQUESTS_PER_MINUTE` overrides the rate, e.g. to
+    split the API quota between workers.
+    """
+    return BatchScheduler(
+        requests_per_minute=settings.BATCH_SCHEDULER_REQUESTS_PER_MINUTE
+        or requests_per_minute,
+        tenant_requests_per_minute=settings.BATCH_SCHEDULER_TENANT_REQUESTS_PER_MINUTE,
+        small_job_cities=settings.BATCH_SCHEDULER_SMALL_JOB_CITIES,
+    )
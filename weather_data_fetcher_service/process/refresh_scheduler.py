@@ -0,0 +1,203 @@
+import asyncio
+import time
+import traceback
+from datetime import datetime
+
+from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.constants import (
+    ProcessConstants,
+    RepositoryConstants,
+)
+from weather_data_fetcher_service.core.logger import logger
+from weather_data_fetcher_service.core.models.weather_data_models import (
+    CityWeatherProcessData,
+    ProcessRefreshJob,
+)
+from weather_data_fetcher_service.core.repositories.base_repository import (
+    BaseRepository,
+)
+from weather_data_fetcher_service.process.weather_data_process import (
+    CityWeatherDataProcesser,
+)
+from weather_data_fetcher_service.services.base_weather_api_service import (
+    BaseWeatherAPIService,
+)
+
+
+class RefreshScheduler:
+    """
+    Periodically refreshes the processes registered for recurring updates.
+
+    Jobs are stored in the repository, so every worker shares them; a
+    repository lock makes sure a due job is claimed by a single worker. Due
+    jobs are claimed highest priority first and run concurrently through the
+    worker's batch scheduler, which shares the upstream quota between them
+    in proportion to their weight: each priority level doubles a job's share,
+    so a large refresh doesn't hold up the others. A job's priority grows
+    with how overdue it is, so low-priority jobs are not starved by a steady
+    stream of high-priority ones. Each run only refetches the cities older
+    than the job interval.
+    """
+
+    def __init__(
+        self,
+        weather_API_service: BaseWeatherAPIService,
+        repository: BaseRepository,
+    ):
+        self.weather_API_service = weather_API_service
+        self.repository = repository
+        self.logger = logger
+        self._task = None
+        self._job_tasks = {}
+
+    async def register(self, job: ProcessRefreshJob):
+        await self.repository().save_index_entry(
+            RepositoryConstants.REFRESH_JOBS_INDEX,
+            str(job.process_id),
+            job.model_dump(),
+        )
+
+    async def unregister(self, process_id: int) -> bool:
+        job = await self.get_job(process_id)
+        if job:
+            await self.repository().delete_index_entry(
+                RepositoryConstants.REFRESH_JOBS_INDEX, str(process_id)
+            )
+        return job is not None
+
+    async def get_job(self, process_id: int):
+        job = await self.repository().fetch_index_entry(
+            RepositoryConstants.REFRESH_JOBS_INDEX, str(process_id)
+        )
+        return ProcessRefreshJob(**job) if job else None
+
+    async def list_jobs(self) -> list:
+        jobs = await self.repository().fetch_index(
+            RepositoryConstants.REFRESH_JOBS_INDEX
+        )
+        return [ProcessRefreshJob(**job) for job in jobs.values()]
+
+    def job_score(self, job: ProcessRefreshJob, now: float) -> float:
+        return job.priority + (now - job.next_run_at) / job.interval_seconds
+
+    def job_weight(self, job: ProcessRefreshJob, now: float) -> float:
+        return 2 ** self.job_score(job, now)
+
+    def order_due_jobs(self, jobs: list, now: float) -> list:
+        due_jobs = [job for job in jobs if job.next_run_at <= now]
+        return sorted(
+            due_jobs, key=lambda job: self.job_score(job, now), reverse=True
+        )
+
+    async def claim_job(self, process_id: int, now: float):
+        """
+        Reschedule a due job under a lock, so no other worker runs it too.
+
+        Returns:
+            ProcessRefreshJob: The claimed job, or None if it is no longer due.
+        """
+        lock_name = f"refresh:{process_id}"
+        if not await self.repository().acquire_lock(
+            lock_name, settings.SCHEDULER_TICK_IN_SECONDS
+        ):
+            return None
+
+        try:
+            job = await self.get_job(process_id)
+            if not job or job.next_run_at > now:
+                return None
+
+            job.last_run_at = now
+            job.next_run_at = now + job.interval_seconds
+            await self.register(job)
+            return job
+
+        finally:
+            await self.repository().release_lock(lock_name)
+
+    async def run_job(self, job: ProcessRefreshJob, weight: float = 1.0):
+        process = CityWeatherDataProcesser(
+            weather_API_service=self.weather_API_service,
+            repository=self.repository,
+            process_data=CityWeatherProcessData(
+                process_id=job.process_id,
+                request_datetime=datetime.now().strftime(
+                    ProcessConstants.DATETIME_FORMAT
+                ),
+            ),
+            refresh_interval_seconds=job.interval_seconds,
+            weight=weight,
+            use_batch_scheduler=True,
+        )
+        response = await process.execute()
+
+        stored_job = await self.get_job(job.process_id)
+        if stored_job:
+            stored_job.last_status = response.status
+            await self.register(stored_job)
+
+        return response
+
+    async def start_due_jobs(self) -> list:
+        """
+        Claim the due jobs not already running in this worker and start them.
+
+        Returns:
+            list: The tasks of the started jobs.
+        """
+        now = time.time()
+        started_tasks = []
+        for job in self.order_due_jobs(await self.list_jobs(), now):
+            if job.process_id in self._job_tasks:
+                continue
+
+            claimed_job = await self.claim_job(job.process_id, now)
+            if claimed_job:
+                self.logger.info(
+                    f"[Process ID: {job.process_id}] - Running scheduled refresh."
+                )
+                job_task = asyncio.create_task(
+                    self.run_job(claimed_job, self.job_weight(job, now))
+                )
+                self._job_tasks[job.process_id] = job_task
+                job_task.add_done_callback(
+                    lambda _, process_id=job.process_id: self._job_tasks.pop(
+                        process_id, None
+                    )
+                )
+                started_tasks.append(job_task)
+
+        return started_tasks
+
+    async def run_due_jobs(self):
+        await asyncio.gather(*await self.start_due_jobs())
+
+    async def run_forever(self):
+        while True:
+            try:
+                # Running jobs carry on across ticks, only new due jobs start.
+                await self.start_due_jobs()
+            except Exception as e:
+                self.logger.error(f"Refresh scheduler - An error occurred: {e}")
+                self.logger.error(
+                    f"Refresh scheduler - Traceback: {traceback.format_exc()}"
+                )
+            await asyncio.sleep(settings.SCHEDULER_TICK_IN_SECONDS)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        job_tasks = list(self._job_tasks.values())
+        for job_task in job_tasks:
+            job_task.cancel()
+        await asyncio.gather(*job_tasks, return_exceptions=True)
@@ -1,28 +1,115 @@
 import asyncio
+import hashlib
+import time
 import traceback
+from datetime import datetime, timedelta
 
 from weather_data_fetcher_service.process.base_process import (
     BaseProcess,
     ProcessResponse,
 )
+from weather_data_fetcher_service.process.batch_scheduler import get_batch_scheduler
 from weather_data_fetcher_service.services.base_weather_api_service import (
     BaseWeatherAPIService,
 )
 from weather_data_fetcher_service.core.repositories.base_repository import (
     BaseRepository,
 )
+from weather_data_fetcher_service.core.repositories.results_codec import (
+    save_results_segments,
+    fetch_stored_results,
+)
+from weather_data_fetcher_service.core.repositories.time_series import (
+    readings_samples,
+)
 from weather_data_fetcher_service.core.models.weather_data_models import (
     CityWeatherProcessData,
 )
+from weather_data_fetcher_service.core.constants import (
+    ProcessConstants,
+    RepositoryConstants,
+)
+from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.geo_index import BoundingBox, get_geo_index
+
+
+def finished_within(stored_process_data: dict, seconds: int) -> bool:
+    """
+    Check whether a stored process finished less than `seconds` ago.
+    """
+    finished_datetime = stored_process_data.get("finished_datetime")
+    if not finished_datetime:
+        return False
+
+    finished_at = datetime.strptime(finished_datetime, ProcessConstants.DATETIME_FORMAT)
+    return datetime.now() - finished_at <= timedelta(seconds=seconds)
+
+
+def is_fresh_source(stored_process_data: dict, fingerprint: str) -> bool:
+    """
+    Check whether a stored process still holds the city set of `fingerprint`
+    and finished within `settings.DEDUP_FRESHNESS_IN_SECONDS`.
+    """
+    return (
+        bool(stored_process_data)
+        and stored_process_data.get("fingerprint") == fingerprint
+        and finished_within(stored_process_data, settings.DEDUP_FRESHNESS_IN_SECONDS)
+    )
+
+
+def process_etag(process_id: int, results_process_id: int, version: dict) -> str:
+    """
+    Strong ETag of a process response, changing whenever the process holding
+    its results is stored again.
+    """
+    tag = f"{process_id}:{results_process_id}:{version['version']}:{version['updated_at']}"
+    return f'"{hashlib.sha1(tag.encode()).hexdigest()}"'
 
 
 class UploadCityListProcesser(BaseProcess):
 
     def __init__(
-        self, process_data: CityWeatherProcessData, repository: BaseRepository
+        self,
+        process_data: CityWeatherProcessData,
+        repository: BaseRepository,
+        overwrite: bool = False,
+        force_refresh: bool = False,
     ):
         super().__init__(process_data)
         self.repository = repository()
+        self.overwrite = overwrite
+        self.force_refresh = force_refresh
+
+    async def find_reusable_process(self):
+        """
+        Find a process that already holds fresh results for the same city set,
+        dropping the entry of the city set if its process is gone or now holds
+        another city set.
+        """
+        if self.force_refresh or not settings.DEDUP_FRESHNESS_IN_SECONDS:
+            return None
+
+        source_process_id = await self.repository.fetch_index_entry(
+            RepositoryConstants.FINGERPRINTS_INDEX, self.process_data.fingerprint
+        )
+        if source_process_id is None or (
+            source_process_id == self.process_data.process_id
+        ):
+            return None
+
+        source_process_data = await self.repository.fetch_json_data(source_process_id)
+        if (source_process_data or {}).get("fingerprint") != (
+            self.process_data.fingerprint
+        ):
+            await self.repository.delete_index_entry(
+                RepositoryConstants.FINGERPRINTS_INDEX, self.process_data.fingerprint
+            )
+            return None
+
+        if not is_fresh_source(source_process_data, self.process_data.fingerprint):
+            return None
+
+        return source_process_id
 
     async def save_city_list(self):
         return await self.repository.save_json_data(
@@ -33,7 +120,42 @@ class UploadCityListProcesser(BaseProcess):
     async def execute(self):
 
         try:
+            stored_process_data = await self.repository.fetch_json_data(
+                self.process_data.process_id
+            )
+
+            if stored_process_data and not self.overwrite:
+                self.logger.error(f"{self.log_identifier} Process ID already in use.")
+                return ProcessResponse(status=409, message="Process ID already in use.")
+
+            if stored_process_data:
+                self.logger.warning(
+                    f"{self.log_identifier} Overwriting previously stored process."
+                )
+                await self.repository.delete_process(self.process_data.process_id)
+
+            self.process_data.fingerprint = self.process_data.cities_fingerprint()
+            self.process_data.source_process_id = await self.find_reusable_process()
+
+            if self.process_data.source_process_id:
+                self.logger.info(
+                    f"{self.log_identifier} Same city list as process "
+                    f"{self.process_data.source_process_id}, reusing its results."
+                )
+
             await self.save_city_list()
+            await self.repository.save_json_data(
+                self.process_data.process_id,
+                {"total_cities": len(self.process_data.cities_ids)},
+                key=RepositoryConstants.SIZE_KEY,
+            )
+
+            if self.process_data.source_process_id:
+                await self.repository.save_json_data(
+                    self.process_data.process_id,
+                    {"source_process_id": self.process_data.source_process_id},
+                    key=RepositoryConstants.VERSION_KEY,
+                )
 
             self.logger.info(f"{self.log_identifier} Data Uploaded successfully.")
 
@@ -54,10 +176,35 @@ class CityWeatherDataProcesser(BaseProcess):
         weather_API_service: BaseWeatherAPIService,
         repository: BaseRepository,
         process_data: CityWeatherProcessData,
+        force_refresh: bool = False,
+        refresh_interval_seconds: int = None,
+        weight: float = 1.0,
+        tenant: str = None,
+        failed_only: bool = False,
+        use_batch_scheduler: bool = False,
     ):
         super().__init__(process_data)
         self.weather_API_service = weather_API_service(self.log_identifier)
         self.repository = repository()
+        self.force_refresh = force_refresh
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.weight = weight
+        self.tenant = tenant
+        self.failed_only = failed_only
+        self.use_batch_scheduler = use_batch_scheduler
+        self.missed_cities_ids = []
+        self.upstream_error_cities_ids = []
+        self.city_strikes = {}
+        self.round_requests = 0
+        self.round_number = 0
+
+    @property
+    def uses_batch_scheduler(self) -> bool:
+        """
+        Whether batches go through the worker's batch scheduler, either for
+        every process (`settings.BATCH_SCHEDULER_ENABLED`) or for this one.
+        """
+        return self.use_batch_scheduler or settings.BATCH_SCHEDULER_ENABLED
 
     def prepare_batches(self, cities_ids: list):
         return [
@@ -73,11 +220,564 @@ class CityWeatherDataProcesser(BaseProcess):
     async def store_data(self, id: int, data: dict):
         return await self.repository.save_json_data(id, data)
 
+    async def store_results(self, results: list, start: int = 0):
+        """
+        Store the process document along with its results, using the format
+        selected by `settings.RESULTS_STORAGE_FORMAT`.
+
+        In the packed format only the segments holding results from `start`
+        onwards are rewritten, and the document keeps just the result count.
+        """
+        if settings.RESULTS_STORAGE_FORMAT == RepositoryConstants.PACKED_RESULTS_FORMAT:
+            with self.span("store", results=len(results) - start):
+                await save_results_segments(
+                    self.repository, self.process_data.process_id, results, start
+                )
+            self.process_data.results_format = RepositoryConstants.PACKED_RESULTS_FORMAT
+            self.process_data.processed_cities = len(results)
+        else:
+            self.process_data.results = results
+
+        with self.span("serialize"):
+            data = self.process_data.to_json()
+
+        with self.span("store"):
+            await self.store_data(self.process_data.process_id, data)
+            await self.store_version()
+
+    async def store_version(self):
+        """
+        Bump the version counter of the process, from which its response
+        ETag is derived.
+        """
+        stored_version = await self.repository.fetch_json_data(
+            self.process_data.process_id, key=RepositoryConstants.VERSION_KEY
+        )
+        await self.repository.save_json_data(
+            self.process_data.process_id,
+            {
+                "version": (stored_version or {}).get("version", 0) + 1,
+                "finished": bool(self.process_data.finished_datetime),
+                "updated_at": time.time(),
+            },
+            key=RepositoryConstants.VERSION_KEY,
+        )
+
+    async def store_timeline(self):
+        if self.timeline is None:
+            return
+
+        try:
+            await self.repository.save_json_data(
+                self.process_data.process_id,
+                self.timeline.to_dict(),
+                key=RepositoryConstants.TIMELINE_KEY,
+            )
+        except Exception as e:
+            self.logger.error(f"{self.log_identifier} Could not store timeline: {e}")
+
+    def plan_batches(self, cities_ids: list):
+        """
+        With `settings.GEO_BATCHING_ENABLED`, cover the clusters of nearby
+        cities with one box query each and batch the remaining cities by ID.
+        """
+        geo_index = (
+            get_geo_index()
+            if settings.GEO_BATCHING_ENABLED
+            and self.weather_API_service.supports_box_queries
+            else None
+        )
+        if geo_index is None:
+            return self.prepare_batches(cities_ids)
+
+        boxes, stragglers = geo_index.plan_boxes(
+            cities_ids,
+            settings.GEO_CELL_SIZE_IN_DEGREES,
+            settings.GEO_MIN_CITIES_PER_BOX,
+        )
+        self.logger.info(
+            f"{self.log_identifier} {len(cities_ids) - len(stragglers)} cities "
+            f"covered by {len(boxes)} box queries."
+        )
+
+        return boxes + self.prepare_batches(stragglers)
+
     async def get_weather_data(self, cities_ids: list):
-        return await self.weather_API_service.fetch_data_in_bulk(cities_ids)
+        with self.span("fetch", cities=len(cities_ids)):
+            results = await self.weather_API_service.fetch_data_in_bulk(cities_ids)
+
+        if results is False:
+            self.upstream_error_cities_ids.extend(cities_ids)
+
+        return results
+
+    async def get_weather_data_in_box(self, box: BoundingBox):
+        """
+        Fetch a box and keep the requested cities. Those the provider left out
+        of the box response are queued to be fetched by ID.
+        """
+        with self.span("fetch", cities=len(box), box=True):
+            box_results = await self.weather_API_service.fetch_data_in_box(box)
+
+        requested_cities_ids = {str(city_id) for city_id in box.cities_ids}
+        results = [
+            result
+            for result in box_results or []
+            if str(result.get("city_id")) in requested_cities_ids
+        ]
+
+        found_cities_ids = {str(result.get("city_id")) for result in results}
+        self.missed_cities_ids.extend(
+            city_id
+            for city_id in box.cities_ids
+            if str(city_id) not in found_cities_ids
+        )
+
+        return results
+
+    async def get_batch_data(self, batch):
+        if isinstance(batch, BoundingBox):
+            return await self.get_weather_data_in_box(batch)
+        return await self.get_weather_data(batch)
+
+    def hedge_quota(self, max_requests_per_minute: int):
+        """
+        The worker's rate limiter of the primary API key, when hedges are sent
+        on that key and so must take their share of its quota.
+        """
+        if not settings.HEDGING_ENABLED or settings.HEDGING_API_KEY:
+            return None
+
+        return get_batch_scheduler(max_requests_per_minute).rate_limiter
+
+    async def fetch_batches(
+        self,
+        batches: list,
+        results: list,
+        max_requests_per_minute: int,
+        stored_results_count: int = 0,
+    ):
+        self.weather_API_service.hedge_quota = self.hedge_quota(
+            max_requests_per_minute
+        )
+
+        if self.uses_batch_scheduler:
+            return await self.fetch_with_scheduler(
+                batches, results, max_requests_per_minute, stored_results_count
+            )
+
+        return await self.fetch_in_rounds(
+            batches, results, max_requests_per_minute, stored_results_count
+        )
+
+    async def has_fresh_source(self, source_process_id: int, fingerprint: str):
+        if self.force_refresh or not source_process_id:
+            return False
+
+        source_process_data = await self.get_stored_process_data(source_process_id)
+        return is_fresh_source(source_process_data, fingerprint)
+
+    async def get_fresh_results(self, stored_process_data: dict):
+        """
+        On a refresh, keep the stored results fetched less than
+        `refresh_interval_seconds` ago so only older cities are fetched again.
+        """
+        if not self.refresh_interval_seconds:
+            return []
+
+        cities_ids = {str(city_id) for city_id in self.process_data.cities_ids}
+        fresh_after = time.time() - self.refresh_interval_seconds
+        stored_results = await fetch_stored_results(
+            self.repository, stored_process_data
+        )
+
+        return [
+            result
+            for result in stored_results or []
+            if str(result.get("city_id")) in cities_ids
+            and result.get("fetched_at", 0) > fresh_after
+        ]
+
+    async def load_city_strikes(self):
+        """
+        Load how many times in a row each city came back missing or malformed,
+        along with when its last strike expires.
+        """
+        if settings.INVALID_CITY_STRIKES:
+            self.city_strikes = await self.repository.fetch_index(
+                RepositoryConstants.INVALID_CITIES_INDEX
+            )
+
+    def count_strikes(self, city_id) -> int:
+        return self.city_strikes.get(str(city_id), {}).get("strikes", 0)
+
+    def is_invalid_city(self, city_id) -> bool:
+        """
+        A city is invalid once it reaches `settings.INVALID_CITY_STRIKES`,
+        until its last strike expires and the city is tried again.
+        """
+        if not settings.INVALID_CITY_STRIKES:
+            return False
+
+        expires_at = self.city_strikes.get(str(city_id), {}).get("expires_at")
+        return self.count_strikes(city_id) >= settings.INVALID_CITY_STRIKES and (
+            expires_at is None or expires_at > time.time()
+        )
+
+    def skip_invalid_cities(self, cities_ids: list):
+        """
+        Leave out the cities that came back missing or malformed
+        `settings.INVALID_CITY_STRIKES` times in a row, so they stop
+        consuming quota.
+        """
+        valid_cities_ids = [
+            city_id for city_id in cities_ids if not self.is_invalid_city(city_id)
+        ]
+        if len(valid_cities_ids) < len(cities_ids):
+            self.logger.info(
+                f"{self.log_identifier} Skipping "
+                f"{len(cities_ids) - len(valid_cities_ids)} invalid cities."
+            )
+
+        return valid_cities_ids
+
+    async def get_failed_cities(self, stored_process_data: dict):
+        """
+        Keep the stored results and list the cities whose last fetch failed.
+
+        Returns:
+            tuple: The stored results and the failed cities, or None if the
+            process has no recorded outcomes.
+        """
+        outcomes = await self.repository.fetch_json_data(
+            self.process_data.process_id, key=RepositoryConstants.OUTCOMES_KEY
+        )
+        if not outcomes:
+            return None
+
+        results = await fetch_stored_results(self.repository, stored_process_data)
+        failed_cities_ids = [
+            city_id
+            for outcome in ProcessConstants.FAILED_OUTCOMES
+            for city_id in outcomes.get(outcome, [])
+        ]
+
+        return results or [], failed_cities_ids
+
+    def classify_cities(self, results: list):
+        """
+        Sort the cities of the process by the outcome of their last fetch. Only
+        the failed cities are listed; succeeded ones are just counted.
+        """
+        found_cities_ids = {str(result.get("city_id")) for result in results}
+        malformed_cities_ids = {
+            str(city_id) for city_id in self.weather_API_service.malformed_cities_ids
+        }
+        upstream_error_cities_ids = {
+            str(city_id) for city_id in self.upstream_error_cities_ids
+        }
+
+        outcomes = {
+            ProcessConstants.OK_OUTCOME: 0,
+            ProcessConstants.MISSING_OUTCOME: [],
+            ProcessConstants.MALFORMED_OUTCOME: [],
+            ProcessConstants.UPSTREAM_ERROR_OUTCOME: [],
+            ProcessConstants.INVALID_OUTCOME: [],
+        }
+        for city_id in self.process_data.cities_ids:
+            if str(city_id) in found_cities_ids:
+                outcomes[ProcessConstants.OK_OUTCOME] += 1
+            elif self.is_invalid_city(city_id):
+                outcomes[ProcessConstants.INVALID_OUTCOME].append(city_id)
+            elif str(city_id) in upstream_error_cities_ids:
+                outcomes[ProcessConstants.UPSTREAM_ERROR_OUTCOME].append(city_id)
+            elif str(city_id) in malformed_cities_ids:
+                outcomes[ProcessConstants.MALFORMED_OUTCOME].append(city_id)
+            else:
+                outcomes[ProcessConstants.MISSING_OUTCOME].append(city_id)
+
+        return outcomes
+
+    async def store_outcomes(self, outcomes: dict):
+        """
+        Store the outcome of each city, and count a strike against the cities
+        the provider answered for without usable data, expiring after
+        `settings.INVALID_CITY_TTL_IN_SECONDS`. A city that is fetched again
+        clears its strikes.
+        """
+        await self.repository.save_json_data(
+            self.process_data.process_id,
+            outcomes,
+            key=RepositoryConstants.OUTCOMES_KEY,
+        )
+
+        if not settings.INVALID_CITY_STRIKES:
+            return
+
+        expires_at = (
+            time.time() + settings.INVALID_CITY_TTL_IN_SECONDS
+            if settings.INVALID_CITY_TTL_IN_SECONDS
+            else None
+        )
+        for city_id in (
+            outcomes[ProcessConstants.MISSING_OUTCOME]
+            + outcomes[ProcessConstants.MALFORMED_OUTCOME]
+        ):
+            await self.repository.save_index_entry(
+                RepositoryConstants.INVALID_CITIES_INDEX,
+                str(city_id),
+                {"strikes": self.count_strikes(city_id) + 1, "expires_at": expires_at},
+            )
+
+        failed_cities_ids = {
+            str(city_id)
+            for outcome in ProcessConstants.FAILED_OUTCOMES
+            + (ProcessConstants.INVALID_OUTCOME,)
+            for city_id in outcomes[outcome]
+        }
+        for city_id in self.process_data.cities_ids:
+            if str(city_id) in self.city_strikes and (
+                str(city_id) not in failed_cities_ids
+            ):
+                await self.repository.delete_index_entry(
+                    RepositoryConstants.INVALID_CITIES_INDEX, str(city_id)
+                )
+
+    async def record_changes(self, results: list):
+        """
+        With `settings.CHANGE_FEED_ENABLED`, append the cities whose reading
+        differs from the last one recorded to the change feed of the process,
+        each change numbered with the next sequence number of the process. The
+        feed keeps its last `settings.CHANGE_FEED_MAX_CHANGES` changes.
+        """
+        if not settings.CHANGE_FEED_ENABLED:
+            return
+
+        process_id = self.process_data.process_id
+        city_versions = await self.repository.fetch_json_data(
+            process_id, key=RepositoryConstants.CITY_VERSIONS_KEY
+        )
+        last_seq = (city_versions or {}).get("last_seq", 0)
+        cities = (city_versions or {}).get("cities", {})
+
+        changes = []
+        for result in results:
+            reading = [result.get("temperature"), result.get("humidity")]
+            recorded = cities.get(str(result.get("city_id")))
+            if recorded and recorded[1:] == reading:
+                continue
+
+            seq = last_seq + len(changes) + 1
+            changes.append(
+                {
+                    "seq": seq,
+                    "city_id": result.get("city_id"),
+                    "temperature": reading[0],
+                    "humidity": reading[1],
+                    "previous_temperature": recorded[1] if recorded else None,
+                    "previous_humidity": recorded[2] if recorded else None,
+                    "fetched_at": result.get("fetched_at"),
+                }
+            )
+            cities[str(result.get("city_id"))] = [seq] + reading
+
+        if not changes:
+            return
+
+        with self.span("store", changes=len(changes)):
+            length = await self.repository.append_json_data(
+                process_id,
+                RepositoryConstants.CHANGES_KEY,
+                changes,
+                max_length=settings.CHANGE_FEED_MAX_CHANGES,
+            )
+            last_seq += len(changes)
+            await self.repository.save_json_data(
+                process_id,
+                {
+                    "last_seq": last_seq,
+                    "first_seq": last_seq - length + 1,
+                    "cities": cities,
+                },
+                key=RepositoryConstants.CITY_VERSIONS_KEY,
+            )
+
+    async def record_readings(self, results: list):
+        """
+        With `settings.TIMESERIES_ENABLED`, append the readings fetched by this
+        run to the time series of their cities.
+        """
+        if not settings.TIMESERIES_ENABLED:
+            return
+
+        samples = readings_samples(results)
+        with self.span("store", samples=len(samples)):
+            await self.repository.append_samples(samples)
+
+    def get_cities_to_fetch(self, fresh_results: list):
+        fresh_cities_ids = {str(result.get("city_id")) for result in fresh_results}
+        return [
+            city_id
+            for city_id in self.process_data.cities_ids
+            if str(city_id) not in fresh_cities_ids
+        ]
+
+    async def finish(self, results: list, start: int = 0):
+        """
+        Store the last results, mark the process as finished and make it the
+        reusable source of results for its city set.
+        """
+        self.process_data.finished_datetime = datetime.now().strftime(
+            ProcessConstants.DATETIME_FORMAT
+        )
+        await self.store_results(results, start)
+
+        if self.process_data.fingerprint:
+            with self.span("store"):
+                # Deleted along with the process, whether overwritten or expired.
+                await self.repository.save_index_entry(
+                    RepositoryConstants.FINGERPRINTS_INDEX,
+                    self.process_data.fingerprint,
+                    self.process_data.process_id,
+                    process_id=self.process_data.process_id,
+                )
+
+    def collect_results(self, results: list, batch_results: list):
+        with self.span("filter"):
+            fetched_at = int(time.time())
+            for raw_results in batch_results:
+                for result in raw_results or []:
+                    result["fetched_at"] = fetched_at
+                    results.append(result)
+
+    async def fetch_in_rounds(
+        self,
+        batches: list,
+        results: list,
+        max_requests_per_minute: int,
+        stored_results_count: int = 0,
+    ):
+        """
+        Fetch the batches in rounds of `max_requests_per_minute` requests, one
+        round per minute, storing the progress after each round. The current
+        round carries over from the previous call, so later batches only wait
+        once it's full. When hedges are sent on the primary API key, each round
+        only takes the requests left in that key's rate limiter, so the hedges
+        already sent shrink it.
+
+        Returns:
+            int: The number of results already stored.
+        """
+        quota = self.weather_API_service.hedge_quota
+        i = 0
+
+        while i < len(batches):
+
+            if self.round_requests >= max_requests_per_minute:
+                await self.store_results(results, stored_results_count)
+                stored_results_count = len(results)
+
+                self.logger.info(
+                    "%s Processed %s cities out of %s.",
+                    self.log_identifier,
+                    len(results),
+                    self.process_data.total_cities,
+                    sample_key="processed_cities",
+                    process_id=self.process_data.process_id,
+                    batch=self.round_number,
+                )
+
+                self.logger.info(
+                    "%s Waiting a minute before next batch...",
+                    self.log_identifier,
+                    sample_key="batch_wait",
+                    process_id=self.process_data.process_id,
+                )
+                with self.span("wait"):
+                    await asyncio.sleep(60)
+                self.round_requests = 0
+                self.round_number += 1
+
+            round_size = min(
+                max_requests_per_minute - self.round_requests, len(batches) - i
+            )
+            if quota:
+                reserved = self.reserve_requests(quota, round_size)
+                if not reserved:
+                    with self.span("wait"):
+                        await asyncio.sleep(quota.time_until_available())
+                    continue
+                if reserved < round_size:
+                    # The hedges took the rest of the round.
+                    self.round_requests = max_requests_per_minute - reserved
+                    round_size = reserved
+
+            current_batches = batches[i : i + round_size]
+            tasks = [self.get_batch_data(batch) for batch in current_batches]
+
+            self.collect_results(results, await asyncio.gather(*tasks))
+
+            self.round_requests += round_size
+            i += round_size
+
+        return stored_results_count
+
+    def reserve_requests(self, quota, max_requests: int) -> int:
+        reserved = 0
+        while reserved < max_requests and quota.try_acquire():
+            reserved += 1
+        return reserved
+
+    async def fetch_with_scheduler(
+        self,
+        batches: list,
+        results: list,
+        max_requests_per_minute: int,
+        stored_results_count: int = 0,
+    ):
+        """
+        Hand the batches to the worker's batch scheduler, which shares the
+        upstream rate limit fairly with the other running processes, storing
+        the progress every `max_requests_per_minute` completed batches.
+
+        Returns:
+            int: The number of results already stored.
+        """
+        batch_scheduler = get_batch_scheduler(max_requests_per_minute)
+
+        completed_batches = 0
+        async for batch_result in batch_scheduler.schedule(
+            self.process_data.process_id,
+            batches,
+            self.get_batch_data,
+            weight=self.weight,
+            tenant=self.tenant,
+        ):
+            self.collect_results(results, [batch_result])
+            completed_batches += 1
+
+            if (
+                completed_batches < len(batches)
+                and completed_batches % max_requests_per_minute == 0
+            ):
+                await self.store_results(results, stored_results_count)
+                stored_results_count = len(results)
+
+                self.logger.info(
+                    "%s Processed %s cities out of %s.",
+                    self.log_identifier,
+                    len(results),
+                    self.process_data.total_cities,
+                    sample_key="processed_cities",
+                    process_id=self.process_data.process_id,
+                    batch=completed_batches,
+                )
+
+        return stored_results_count
 
     async def execute(self):
 
+        stored_process_data = None
         try:
 
             self.logger.info(f"{self.log_identifier} Starting process.")
@@ -90,6 +790,21 @@ class CityWeatherDataProcesser(BaseProcess):
                 self.logger.error(f"{self.log_identifier} No stored city list found ")
                 return ProcessResponse(status=404, message="No data found.")
 
+            source_process_id = stored_process_data.get("source_process_id")
+            if not self.failed_only and await self.has_fresh_source(
+                source_process_id, stored_process_data.get("fingerprint")
+            ):
+                self.logger.info(
+                    f"{self.log_identifier} Results of process {source_process_id} "
+                    "are still fresh, skipping fetch."
+                )
+                return ProcessResponse(
+                    status=200,
+                    message=f"Results reused from process {source_process_id}.",
+                )
+
+            self.process_data.fingerprint = stored_process_data.get("fingerprint")
+
             max_requests_per_minute = (
                 self.weather_API_service.cities_per_minute
                 // self.weather_API_service.cities_per_request
@@ -98,42 +813,65 @@ class CityWeatherDataProcesser(BaseProcess):
             self.process_data.cities_ids = stored_process_data.get("cities_ids")
             self.process_data.total_cities = len(self.process_data.cities_ids)
 
-            self.logger.info(
-                f"{self.log_identifier} {self.process_data.total_cities} cities found to process."
-            )
-
-            self.logger.info(f"{self.log_identifier} processing batches...")
+            await self.load_city_strikes()
 
-            batches = self.prepare_batches(self.process_data.cities_ids)
-
-            results = []
-            for i in range(0, len(batches), max_requests_per_minute):
+            if self.failed_only:
+                failed_cities = await self.get_failed_cities(stored_process_data)
+                if failed_cities is None:
+                    self.logger.error(f"{self.log_identifier} No city outcomes found.")
+                    return ProcessResponse(
+                        status=404, message="No city outcomes found."
+                    )
 
-                current_batches = batches[i : i + max_requests_per_minute]
-                tasks = [self.get_weather_data(batch) for batch in current_batches]
+                results, cities_ids = failed_cities
+                cities_ids = self.skip_invalid_cities(cities_ids)
+                if not cities_ids:
+                    return ProcessResponse(
+                        status=200, message="No failed cities to reprocess."
+                    )
+            else:
+                results = await self.get_fresh_results(stored_process_data)
+                cities_ids = self.skip_invalid_cities(self.get_cities_to_fetch(results))
 
-                batch_results = await asyncio.gather(*tasks)
+            self.logger.info(
+                f"{self.log_identifier} {len(cities_ids)} cities found to process."
+            )
 
-                for raw_results in batch_results:
-                    for result in raw_results:
-                        results.append(result)
+            self.logger.info(f"{self.log_identifier} processing batches...")
 
-                self.process_data.results = results
+            batches = self.plan_batches(cities_ids)
+            fetched_from = len(results)
 
-                await self.store_data(
-                    self.process_data.process_id, self.process_data.to_json()
-                )
+            # Only the reprocessed cities are appended to the stored results.
+            stored_results_count = await self.fetch_batches(
+                batches,
+                results,
+                max_requests_per_minute,
+                len(results) if self.failed_only else 0,
+            )
 
+            if self.missed_cities_ids:
                 self.logger.info(
-                    f"{self.log_identifier} Processed {len(results)} "
-                    f"cities out of {self.process_data.total_cities}."
+                    f"{self.log_identifier} {len(self.missed_cities_ids)} cities "
+                    "missing from box queries, fetching them by ID."
+                )
+                # Fetched in the rest of the current round, if it isn't full.
+                stored_results_count = await self.fetch_batches(
+                    self.prepare_batches(self.missed_cities_ids),
+                    results,
+                    max_requests_per_minute,
+                    stored_results_count,
                 )
 
-                if i + max_requests_per_minute < len(batches):
-                    self.logger.info(
-                        f"{self.log_identifier} Waiting a minute before next batch..."
-                    )
-                    await asyncio.sleep(60)
+            await self.finish(results, stored_results_count)
+            await self.store_outcomes(self.classify_cities(results))
+            await self.record_changes(results)
+            await self.record_readings(results[fetched_from:])
+
+            self.logger.info(
+                f"{self.log_identifier} Processed {len(results)} "
+                f"cities out of {self.process_data.total_cities}."
+            )
 
             self.logger.info(f"{self.log_identifier} Process finished successfully.")
 
@@ -146,6 +884,11 @@ class CityWeatherDataProcesser(BaseProcess):
             )
             return ProcessResponse(status=500, message="An internal error occurred.")
 
+        finally:
+            # Storing a timeline for an unknown process would create it.
+            if stored_process_data:
+                await self.store_timeline()
+
 
 class CityWeatherDataFetcher(BaseProcess):
 
@@ -158,6 +901,38 @@ class CityWeatherDataFetcher(BaseProcess):
     async def fetch_data(self, process_id: int):
         return await self.repository.fetch_json_data(process_id)
 
+    async def fetch_results(self, stored_process_data: dict):
+        return await fetch_stored_results(self.repository, stored_process_data)
+
+    async def fetch_etag(self):
+        """
+        Build the ETag of the process response from the version counters
+        alone, following reused results to their source process.
+
+        Returns:
+            tuple: The ETag, or None if the process was never stored, and
+            whether its results are final.
+        """
+        process_id = self.process_data.process_id
+        version = await self.repository.fetch_json_data(
+            process_id, key=RepositoryConstants.VERSION_KEY
+        )
+
+        results_process_id = process_id
+        if version and version.get("source_process_id"):
+            results_process_id = version.get("source_process_id")
+            version = await self.repository.fetch_json_data(
+                results_process_id, key=RepositoryConstants.VERSION_KEY
+            )
+
+        if not version or "version" not in version:
+            return None, False
+
+        return (
+            process_etag(process_id, results_process_id, version),
+            version.get("finished", False),
+        )
+
     def format_response(self, data: dict):
 
         progress_percent = (len(data.get("results")) / data.get("total_cities")) * 100
@@ -176,10 +951,37 @@ class CityWeatherDataFetcher(BaseProcess):
 
             stored_process_data = await self.fetch_data(self.process_data.process_id)
 
-            if not stored_process_data or not stored_process_data.get("results"):
+            results_process_data = stored_process_data
+            if stored_process_data and stored_process_data.get("source_process_id"):
+                # Served by reference until the process fetches its own results.
+                results_process_data = await self.fetch_data(
+                    stored_process_data.get("source_process_id")
+                )
+                if results_process_data and results_process_data.get(
+                    "fingerprint"
+                ) != stored_process_data.get("fingerprint"):
+                    # The source was overwritten with another city list.
+                    results_process_data = None
+                if results_process_data:
+                    stored_process_data["request_datetime"] = results_process_data.get(
+                        "request_datetime"
+                    )
+                    stored_process_data["total_cities"] = results_process_data.get(
+                        "total_cities"
+                    )
+
+            results = (
+                await self.fetch_results(results_process_data)
+                if results_process_data
+                else None
+            )
+
+            if not results:
                 self.logger.error(f"{self.log_identifier} No processed data found.")
                 return ProcessResponse(status=404, message="No processed data found.")
 
+            stored_process_data["results"] = results
+
             self.logger.info(f"{self.log_identifier} Data fetched successfully.")
 
             return ProcessResponse(
@@ -194,3 +996,163 @@ class CityWeatherDataFetcher(BaseProcess):
                 f"{self.log_identifier} - Traceback: {traceback.format_exc()}"
             )
             return ProcessResponse(status=500, message="An internal error occurred.")
+
+
+class CityDataChangesFetcher(BaseProcess):
+
+    def __init__(
+        self,
+        repository: BaseRepository,
+        process_data: CityWeatherProcessData,
+        since: int = 0,
+        limit: int = 1000,
+        min_temperature_change: float = 0.0,
+        min_humidity_change: float = 0.0,
+    ):
+        super().__init__(process_data)
+        self.repository = repository()
+        self.since = since
+        self.limit = limit
+        self.min_temperature_change = min_temperature_change
+        self.min_humidity_change = min_humidity_change
+
+    @property
+    def has_thresholds(self) -> bool:
+        return bool(self.min_temperature_change or self.min_humidity_change)
+
+    async def fetch_changes(self, first_seq: int):
+        # Sequence numbers are consecutive and the oldest kept change is at index 0.
+        start = max(self.since - first_seq + 1, 0)
+        return await self.repository.fetch_json_range(
+            self.process_data.process_id,
+            RepositoryConstants.CHANGES_KEY,
+            start,
+            start + self.limit - 1,
+        )
+
+    async def fetch_reported_readings(self, first_seq: int) -> dict:
+        """
+        The reading last reported to the consumer for each city, replaying the
+        kept changes up to `since` with the thresholds. Without thresholds,
+        every change is reported, so the reading before the first change of a
+        city after `since` already is the last one reported.
+        """
+        reported_readings = {}
+        if self.has_thresholds and self.since >= first_seq:
+            self.report_changes(
+                await self.repository.fetch_json_range(
+                    self.process_data.process_id,
+                    RepositoryConstants.CHANGES_KEY,
+                    0,
+                    self.since - first_seq,
+                ),
+                reported_readings,
+            )
+
+        return reported_readings
+
+    def report_changes(self, changes: list, reported_readings: dict):
+        """
+        Report the changes where a reading moved by at least its threshold
+        since the reading last reported for the city, updating
+        `reported_readings`. Changes below the thresholds add up until they
+        get reported, so slow drifts are reported too.
+
+        Returns:
+            list: The last change reported for each city, going from the
+                reading reported before these changes, ordered by change.
+        """
+        previous_readings = {}
+        reported_changes = {}
+        for change in changes:
+            city_id = str(change["city_id"])
+            # A city not reported yet goes from the reading before its first change.
+            reading = reported_readings.setdefault(
+                city_id, [change["previous_temperature"], change["previous_humidity"]]
+            )
+            previous_readings.setdefault(city_id, reading)
+            if not self.is_significant(change, reading):
+                continue
+
+            reported_readings[city_id] = [change["temperature"], change["humidity"]]
+            reported_changes.pop(city_id, None)
+            reported_changes[city_id] = {
+                **change,
+                "previous_temperature": previous_readings[city_id][0],
+                "previous_humidity": previous_readings[city_id][1],
+            }
+
+        return list(reported_changes.values())
+
+    def is_significant(self, change: dict, reading: list) -> bool:
+        """
+        Keep new cities and cities where a reading moved by at least its
+        threshold since the given reading.
+        """
+        previous_temperature, previous_humidity = reading
+        if previous_temperature is None:
+            return True
+
+        temperature_change = abs(change["temperature"] - previous_temperature)
+        humidity_change = abs(change["humidity"] - previous_humidity)
+
+        return (
+            temperature_change > 0 and temperature_change >= self.min_temperature_change
+        ) or (humidity_change > 0 and humidity_change >= self.min_humidity_change)
+
+    def format_change(self, change: dict):
+        def difference(value, previous_value):
+            return None if previous_value is None else round(value - previous_value, 2)
+
+        return {
+            "seq": change["seq"],
+            "city_id": change["city_id"],
+            "temperature": change["temperature"],
+            "humidity": change["humidity"],
+            "temperature_change": difference(
+                change["temperature"], change["previous_temperature"]
+            ),
+            "humidity_change": difference(
+                change["humidity"], change["previous_humidity"]
+            ),
+            "fetched_at": change["fetched_at"],
+        }
+
+    async def execute(self):
+
+        try:
+
+            city_versions = await self.repository.fetch_json_data(
+                self.process_data.process_id,
+                key=RepositoryConstants.CITY_VERSIONS_KEY,
+            )
+            if not city_versions:
+                self.logger.error(f"{self.log_identifier} No change feed found.")
+                return ProcessResponse(status=404, message="No change feed found.")
+
+            first_seq = city_versions.get("first_seq", 1)
+            reported_readings = await self.fetch_reported_readings(first_seq)
+            changes = await self.fetch_changes(first_seq)
+
+            return ProcessResponse(
+                status=200,
+                message="Changes fetched successfully.",
+                data={
+                    "process_id": self.process_data.process_id,
+                    "since": self.since,
+                    "next_seq": changes[-1]["seq"] if changes else self.since,
+                    "first_seq": first_seq,
+                    "last_seq": city_versions.get("last_seq"),
+                    "changes": [
+                        self.format_change(change)
+                        for change in self.report_changes(changes, reported_readings)
+                    ],
+                },
+            )
+
+        except Exception as e:
+            self.logger.error(f"{self.log_identifier} - An error occurred: {e}")
+            self.logger.error(
+                f"{self.log_identifier} - Traceback: {traceback.format_exc()}"
+            )
+            return ProcessResponse(status=500, message="An internal error occurred.")
@@ -0,0 +1,183 @@
+import asyncio
+import math
+from collections import deque
+from functools import lru_cache
+
+from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.constants import AdmissionConstants
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, retry_after: int):
+        super().__init__(f"Request rejected with status {status_code}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AdmissionGroup:
+    """
+    The requests of the routes sharing a concurrency limit, e.g. every route
+    running a bulk process.
+    """
+
+    def __init__(self, name: str, max_concurrent: int):
+        self.name = name
+        self.max_concurrent = max(max_concurrent, 1)
+        self.active = 0
+        self.queued = 0
+        self.average_seconds = None
+
+    def record_duration(self, seconds: float):
+        if self.average_seconds is None:
+            self.average_seconds = seconds
+            return
+
+        self.average_seconds += AdmissionConstants.DURATION_SMOOTHING * (
+            seconds - self.average_seconds
+        )
+
+
+class AdmissionController:
+    """
+    Admit requests while their group is under its concurrency limit and the
+    cities held by the admitted requests fit in `max_inflight_cities`, the
+    memory budget of the worker. Other requests wait in a bounded FIFO queue
+    for up to `max_queue_wait_seconds`.
+
+    A request larger than the whole budget is still admitted once nothing
+    else holds any city, so it runs alone instead of never.
+    """
+
+    def __init__(
+        self,
+        groups: dict,
+        max_inflight_cities: int,
+        max_queued_requests: int,
+        max_queue_wait_seconds: float,
+    ):
+        self.groups = {
+            name: AdmissionGroup(name, max_concurrent)
+            for name, max_concurrent in groups.items()
+        }
+        self.max_inflight_cities = max_inflight_cities
+        self.max_queued_requests = max_queued_requests
+        self.max_queue_wait_seconds = max_queue_wait_seconds
+        self.inflight_cities = 0
+        self._waiters = deque()
+
+    def fits_budget(self, cost: int) -> bool:
+        return (
+            not self.max_inflight_cities
+            or not self.inflight_cities
+            or self.inflight_cities + cost <= self.max_inflight_cities
+        )
+
+    def retry_after(self, group: AdmissionGroup) -> int:
+        """
+        Estimate in how many seconds the queue of the group has drained, from
+        the average time its requests take.
+        """
+        average_seconds = group.average_seconds or 1
+        return max(
+            math.ceil(average_seconds * (group.queued + 1) / group.max_concurrent), 1
+        )
+
+    def _admit(self, group: AdmissionGroup, cost: int):
+        group.active += 1
+        self.inflight_cities += cost
+
+    def _wake(self):
+        """
+        Admit the queued requests in order. A group at its limit doesn't hold
+        up the other groups, but a request waiting for city budget holds up
+        everything behind it, so large requests aren't starved by small ones.
+        """
+        full_groups = set()
+        for waiter in list(self._waiters):
+            group, cost, admitted = waiter
+            if admitted.done():
+                # Timed out or cancelled, its request is about to remove it.
+                self._waiters.remove(waiter)
+                continue
+            if group.name in full_groups:
+                continue
+            if group.active >= group.max_concurrent:
+                full_groups.add(group.name)
+                continue
+            if not self.fits_budget(cost):
+                break
+
+            self._waiters.remove(waiter)
+            self._admit(group, cost)
+            admitted.set_result(None)
+
+    async def acquire(self, group: AdmissionGroup, cost: int):
+        """
+        Wait for the request to be admitted.
+
+        Raises:
+            AdmissionRejected: With a 429 status when the queue is full, or a
+            503 status when the request waited too long.
+        """
+        waiter = (group, cost, asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        self._wake()
+        if waiter[2].done():
+            return
+
+        if len(self._waiters) > self.max_queued_requests:
+            self._waiters.remove(waiter)
+            raise AdmissionRejected(429, self.retry_after(group))
+
+        group.queued += 1
+        try:
+            await asyncio.wait_for(waiter[2], self.max_queue_wait_seconds)
+        except asyncio.TimeoutError:
+            raise AdmissionRejected(503, self.retry_after(group))
+        finally:
+            group.queued -= 1
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self, group: AdmissionGroup, cost: int, seconds: float):
+        group.active -= 1
+        group.record_duration(seconds)
+        self.inflight_cities -= cost
+        self._wake()
+
+    def snapshot(self) -> dict:
+        return {
+            "max_inflight_cities": self.max_inflight_cities,
+            "inflight_cities": self.inflight_cities,
+            "max_queued_requests": self.max_queued_requests,
+            "queued_requests": len(self._waiters),
+            "max_queue_wait_in_seconds": self.max_queue_wait_seconds,
+            "groups": {
+                name: {
+                    "max_concurrent": group.max_concurrent,
+                    "active": group.active,
+                    "queued": group.queued,
+                    "average_seconds": group.average_seconds,
+                    "retry_after": self.retry_after(group),
+                }
+                for name, group in self.groups.items()
+            },
+        }
+
+
+@lru_cache(maxsize=None)
+def get_admission_controller() -> AdmissionController:
+    """
+    Return the worker's admission controller, shared by the mounted apps.
+    """
+    return AdmissionController(
+        groups={
+            AdmissionConstants.UPLOAD_GROUP: settings.ADMISSION_MAX_CONCURRENT_UPLOADS,
+            AdmissionConstants.PROCESS_GROUP: (
+                settings.ADMISSION_MAX_CONCURRENT_PROCESSES
+            ),
+        },
+        max_inflight_cities=settings.ADMISSION_MAX_INFLIGHT_CITIES,
+        max_queued_requests=settings.ADMISSION_MAX_QUEUED_REQUESTS,
+        max_queue_wait_seconds=settings.ADMISSION_MAX_QUEUE_WAIT_IN_SECONDS,
+    )
@@ -1,9 +1,21 @@
 import asyncio
+import cProfile
+import io
+import pstats
+import time
 from async_timeout import timeout
 from fastapi import Request, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
 
+from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.constants import ProfilingConstants
+from weather_data_fetcher_service.rest.admission_control import (
+    AdmissionRejected,
+    get_admission_controller,
+)
+
 
 class TimeoutMiddleware(BaseHTTPMiddleware):
     def __init__(self, app: ASGIApp, timeout_seconds: int):
@@ -17,3 +29,90 @@ class TimeoutMiddleware(BaseHTTPMiddleware):
             return response
         except asyncio.TimeoutError:
             raise HTTPException(status_code=408, detail="Request timeout")
+
+
+class AdmissionControlMiddleware(BaseHTTPMiddleware):
+    """
+    Hold the requests to `routes` back with the worker's admission controller
+    when `settings.ADMISSION_CONTROL_ENABLED` is set, answering 429 or 503
+    with a `Retry-After` header when it is saturated.
+
+    `routes` maps each path, relative to the app, to the name of its admission
+    group and a coroutine estimating the number of cities the request holds.
+    """
+
+    def __init__(self, app: ASGIApp, routes: dict):
+        super().__init__(app)
+        self.routes = routes
+
+    async def dispatch(self, request: Request, call_next):
+        path = request.scope["path"].removeprefix(request.scope.get("root_path", ""))
+        route = self.routes.get(path)
+        if not settings.ADMISSION_CONTROL_ENABLED or route is None:
+            return await call_next(request)
+
+        group_name, estimate_cost = route
+        admission_controller = get_admission_controller()
+        group = admission_controller.groups[group_name]
+        cost = await estimate_cost(request)
+
+        try:
+            await admission_controller.acquire(group, cost)
+        except AdmissionRejected as e:
+            return JSONResponse(
+                status_code=e.status_code,
+                content={"message": "Too many requests in progress, retry later."},
+                headers={"Retry-After": str(e.retry_after)},
+            )
+
+        start = time.monotonic()
+        try:
+            return await call_next(request)
+        finally:
+            admission_controller.release(group, cost, time.monotonic() - start)
+
+
+class ProfilingMiddleware(BaseHTTPMiddleware):
+    """
+    Profile a single request with cProfile when it carries the `X-Profile`
+    header and `settings.PROFILING_ENABLED` is set, answering with the
+    profile report instead of the response.
+
+    Only one request is profiled at a time, and everything running on the
+    event loop meanwhile shows up in its report.
+    """
+
+    def __init__(self, app: ASGIApp):
+        super().__init__(app)
+        self._profiling = False
+
+    async def dispatch(self, request: Request, call_next):
+        if (
+            not settings.PROFILING_ENABLED
+            or self._profiling
+            or ProfilingConstants.PROFILE_HEADER not in request.headers
+        ):
+            return await call_next(request)
+
+        self._profiling = True
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            response = await call_next(request)
+            async for _ in response.body_iterator:
+                pass
+        finally:
+            profiler.disable()
+            self._profiling = False
+
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats(
+            ProfilingConstants.PROFILE_SORT_KEY
+        ).print_stats(ProfilingConstants.PROFILE_LINES)
+
+        return PlainTextResponse(
+            report.getvalue(),
+            headers={
+                ProfilingConstants.PROFILED_STATUS_HEADER: str(response.status_code)
+            },
+        )
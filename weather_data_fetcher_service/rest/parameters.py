@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseModel, Field
 
 
@@ -6,7 +7,51 @@ class UploadParameter(BaseModel):
     cities_ids: list = Field(
         ..., description="A list of city IDs to be uploaded for processing."
     )
+    overwrite: bool = Field(
+        default=False,
+        description="Replace a stored process with the same ID and discard its results.",
+    )
+    force_refresh: bool = Field(
+        default=False,
+        description="Don't reuse fresh results of a process with the same city list.",
+    )
 
 
 class ProcessParameter(BaseModel):
     process_id: int = Field(..., description="The process ID.")
+    force_refresh: bool = Field(
+        default=False,
+        description="Fetch the weather data even if reused results are still fresh.",
+    )
+    tenant: Optional[str] = Field(
+        default=None,
+        description="Tenant whose request quota the process counts against.",
+    )
+    weight: float = Field(
+        default=1.0,
+        gt=0,
+        description="Share of the request quota relative to concurrent processes.",
+    )
+
+
+class ReprocessParameter(BaseModel):
+    process_id: int = Field(..., description="The process ID.")
+    tenant: Optional[str] = Field(
+        default=None,
+        description="Tenant whose request quota the process counts against.",
+    )
+    weight: float = Field(
+        default=1.0,
+        gt=0,
+        description="Share of the request quota relative to concurrent processes.",
+    )
+
+
+class ScheduleParameter(BaseModel):
+    process_id: int = Field(..., description="The process ID.")
+    interval_seconds: int = Field(
+        ..., gt=0, description="How often the process data is refreshed, in seconds."
+    )
+    priority: int = Field(
+        default=0, description="Processes with higher priority are refreshed first."
+    )
@@ -0,0 +1,100 @@
+import gzip
+from collections import OrderedDict
+
+from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.constants import ResponseCacheConstants
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def supported_encodings() -> tuple:
+    if brotli is None:
+        return (ResponseCacheConstants.GZIP_ENCODING,)
+    return (
+        ResponseCacheConstants.BROTLI_ENCODING,
+        ResponseCacheConstants.GZIP_ENCODING,
+    )
+
+
+def negotiate_encoding(accept_encoding: str) -> str:
+    """
+    Pick the content encoding to answer with, preferring brotli (when the
+    `brotli` package is installed) over gzip over none, and skipping the
+    encodings the client refused with `q=0`.
+
+    Returns:
+        str: The encoding, or None for an uncompressed body.
+    """
+    accepted = {}
+    for item in (accept_encoding or "").split(","):
+        coding, _, parameters = item.strip().partition(";")
+        quality = 1.0
+        if parameters.strip().startswith("q="):
+            try:
+                quality = float(parameters.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    for encoding in supported_encodings():
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+
+    return None
+
+
+def encode_body(body: bytes, encoding: str) -> bytes:
+    if encoding == ResponseCacheConstants.BROTLI_ENCODING:
+        return brotli.compress(body)
+    if encoding == ResponseCacheConstants.GZIP_ENCODING:
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Weak comparison of the `If-None-Match` header against an ETag, as
+    conditional GETs use.
+    """
+    if not if_none_match or not etag:
+        return False
+
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in [
+        candidate.removeprefix("W/") for candidate in candidates
+    ]
+
+
+class ResponseCache:
+    """
+    LRU cache of the serialized, and possibly compressed, bodies of finished
+    process responses, keyed by ETag and negotiated encoding. Each entry holds
+    the body along with the content encoding it was actually stored with.
+
+    The ETag changes whenever the process is stored again, so entries never
+    need to be invalidated: stale ones just fall out of the cache.
+    """
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries = (
+            settings.RESPONSE_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        )
+        self._entries = OrderedDict()
+
+    def get(self, etag: str, encoding: str):
+        entry = self._entries.get((etag, encoding))
+        if entry is not None:
+            self._entries.move_to_end((etag, encoding))
+        return entry
+
+    def put(self, etag: str, encoding: str, entry: tuple):
+        if not self.max_entries:
+            return
+
+        self._entries[(etag, encoding)] = entry
+        self._entries.move_to_end((etag, encoding))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -1,15 +1,38 @@
-from fastapi import FastAPI
+from typing import Optional
+from fastapi import FastAPI, Query, Request
 
 from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.constants import (
+    AdmissionConstants,
+    TimeSeriesConstants,
+)
 from weather_data_fetcher_service.rest.views import (
     upload_city_list_view,
     process_city_data_view,
+    reprocess_failed_cities_view,
+    get_city_outcomes_view,
     get_city_data_view,
+    get_city_data_changes_view,
+    get_city_history_view,
+    get_process_history_view,
+    get_process_timeline_view,
+    schedule_process_refresh_view,
+    unschedule_process_refresh_view,
+    get_scheduled_refreshes_view,
+    get_admission_limits_view,
+    get_hedging_metrics_view,
+    estimate_upload_cost,
+    estimate_process_cost,
+)
+from weather_data_fetcher_service.rest.middlewares import (
+    AdmissionControlMiddleware,
+    TimeoutMiddleware,
 )
-from weather_data_fetcher_service.rest.middlewares import TimeoutMiddleware
 from weather_data_fetcher_service.rest.parameters import (
     UploadParameter,
     ProcessParameter,
+    ReprocessParameter,
+    ScheduleParameter,
 )
 
 app1 = FastAPI(root_path="/api/v1")
@@ -17,6 +40,25 @@ app2 = FastAPI(root_path="/api/v2")
 app2.add_middleware(
     TimeoutMiddleware, timeout_seconds=settings.ROUTE_TIMEOUT_IN_SECONDS
 )
+app1.add_middleware(
+    AdmissionControlMiddleware,
+    routes={
+        "/upload-city-list": (AdmissionConstants.UPLOAD_GROUP, estimate_upload_cost),
+    },
+)
+app2.add_middleware(
+    AdmissionControlMiddleware,
+    routes={
+        "/process-city-data-in-bulk": (
+            AdmissionConstants.PROCESS_GROUP,
+            estimate_process_cost,
+        ),
+        "/reprocess-failed-cities": (
+            AdmissionConstants.PROCESS_GROUP,
+            estimate_process_cost,
+        ),
+    },
+)
 
 
 @app1.post(
@@ -37,10 +79,168 @@ async def process_city_data_route(parameters: ProcessParameter):
     return await process_city_data_view(parameters)
 
 
+@app2.post(
+    "/reprocess-failed-cities",
+    summary="Reprocess Failed Cities",
+    description="Fetch again only the cities of a process whose last fetch failed.",
+)
+async def reprocess_failed_cities_route(parameters: ReprocessParameter):
+    return await reprocess_failed_cities_view(parameters)
+
+
+@app1.get(
+    "/get-city-outcomes",
+    summary="Get City Outcomes",
+    description="Fetch the outcome of the last fetch of each city of a process.",
+)
+async def get_city_outcomes_route(process_id: int):
+    return await get_city_outcomes_view(parameters={"process_id": process_id})
+
+
 @app1.get(
     "/get-city-data-process",
     summary="Get City Data Process",
     description="Fetch the processed weather data for a specific process ID.",
 )
-async def get_city_data_fetch_route(process_id: int):
-    return await get_city_data_view(parameters={"process_id": process_id})
+async def get_city_data_fetch_route(process_id: int, request: Request):
+    return await get_city_data_view(
+        parameters={
+            "process_id": process_id,
+            "if_none_match": request.headers.get("if-none-match"),
+            "accept_encoding": request.headers.get("accept-encoding"),
+        }
+    )
+
+
+@app1.get(
+    "/get-city-data-changes",
+    summary="Get City Data Changes",
+    description="Fetch the cities whose weather data changed since a sequence number.",
+)
+async def get_city_data_changes_route(
+    process_id: int,
+    since: int = Query(default=0, ge=0),
+    limit: int = Query(default=1000, gt=0, le=10000),
+    min_temperature_change: float = Query(default=0.0, ge=0),
+    min_humidity_change: float = Query(default=0.0, ge=0),
+):
+    return await get_city_data_changes_view(
+        parameters={
+            "process_id": process_id,
+            "since": since,
+            "limit": limit,
+            "min_temperature_change": min_temperature_change,
+            "min_humidity_change": min_humidity_change,
+        }
+    )
+
+
+AGGREGATION_PATTERN = f"^({'|'.join(TimeSeriesConstants.AGGREGATIONS)})$"
+
+
+@app1.get(
+    "/get-city-history",
+    summary="Get City History",
+    description="Fetch the stored weather readings of a city over a time range.",
+)
+async def get_city_history_route(
+    city_id: int,
+    start: Optional[int] = Query(default=None, ge=0),
+    end: Optional[int] = Query(default=None, ge=0),
+    aggregation: Optional[str] = Query(default=None, pattern=AGGREGATION_PATTERN),
+    bucket_seconds: int = Query(default=3600, gt=0),
+):
+    return await get_city_history_view(
+        parameters={
+            "city_id": city_id,
+            "start": start,
+            "end": end,
+            "aggregation": aggregation,
+            "bucket_seconds": bucket_seconds,
+        }
+    )
+
+
+@app1.get(
+    "/get-process-history",
+    summary="Get Process History",
+    description="Fetch the stored weather readings of a page of the cities of a process.",
+)
+async def get_process_history_route(
+    process_id: int,
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(
+        default=TimeSeriesConstants.DEFAULT_PROCESS_HISTORY_CITIES,
+        gt=0,
+        le=TimeSeriesConstants.MAX_PROCESS_HISTORY_CITIES,
+    ),
+    start: Optional[int] = Query(default=None, ge=0),
+    end: Optional[int] = Query(default=None, ge=0),
+    aggregation: Optional[str] = Query(default=None, pattern=AGGREGATION_PATTERN),
+    bucket_seconds: int = Query(default=3600, gt=0),
+):
+    return await get_process_history_view(
+        parameters={
+            "process_id": process_id,
+            "offset": offset,
+            "limit": limit,
+            "start": start,
+            "end": end,
+            "aggregation": aggregation,
+            "bucket_seconds": bucket_seconds,
+        }
+    )
+
+
+@app1.get(
+    "/get-process-timeline",
+    summary="Get Process Timeline",
+    description="Fetch the timing breakdown of the last execution of a process.",
+)
+async def get_process_timeline_route(process_id: int):
+    return await get_process_timeline_view(parameters={"process_id": process_id})
+
+
+@app1.post(
+    "/schedule-process-refresh",
+    summary="Schedule Process Refresh",
+    description="Refresh the weather data of a process periodically.",
+)
+async def schedule_process_refresh_route(parameters: ScheduleParameter):
+    return await schedule_process_refresh_view(parameters)
+
+
+@app1.delete(
+    "/schedule-process-refresh",
+    summary="Unschedule Process Refresh",
+    description="Stop refreshing the weather data of a process periodically.",
+)
+async def unschedule_process_refresh_route(process_id: int):
+    return await unschedule_process_refresh_view(parameters={"process_id": process_id})
+
+
+@app1.get(
+    "/get-scheduled-refreshes",
+    summary="Get Scheduled Refreshes",
+    description="List the processes whose weather data is refreshed periodically.",
+)
+async def get_scheduled_refreshes_route():
+    return await get_scheduled_refreshes_view()
+
+
+@app1.get(
+    "/get-admission-limits",
+    summary="Get Admission Limits",
+    description="Report the admission control limits of the worker and their use.",
+)
+async def get_admission_limits_route():
+    return await get_admission_limits_view()
+
+
+@app1.get(
+    "/get-hedging-metrics",
+    summary="Get Hedging Metrics",
+    description="Report the hedged upstream requests of the worker and their wins.",
+)
+async def get_hedging_metrics_route():
+    return await get_hedging_metrics_view()
@@ -1,28 +1,100 @@
+import json
+import math
+import time
 from datetime import datetime
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 
+from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.constants import (
+    AdmissionConstants,
+    ProcessConstants,
+    RepositoryConstants,
+    ResponseCacheConstants,
+    TimeSeriesConstants,
+)
 from weather_data_fetcher_service.core.models.weather_data_models import (
     CityWeatherProcessData,
+    ProcessRefreshJob,
 )
 from weather_data_fetcher_service.process.weather_data_process import (
     UploadCityListProcesser,
     CityWeatherDataProcesser,
     CityWeatherDataFetcher,
+    CityDataChangesFetcher,
+)
+from weather_data_fetcher_service.process.refresh_scheduler import (
+    RefreshScheduler,
 )
 from weather_data_fetcher_service.services.open_weather_api_service import (
     OpenWeatherAPIService,
 )
-from weather_data_fetcher_service.core.repositories.redis_repository import (
-    RedisRepository,
+from weather_data_fetcher_service.services.hedging import get_request_hedger
+from weather_data_fetcher_service.core.repositories.repository_factory import (
+    get_repository,
+)
+from weather_data_fetcher_service.core.repositories.time_series import (
+    fetch_city_history,
+)
+from weather_data_fetcher_service.rest.admission_control import (
+    get_admission_controller,
+)
+from weather_data_fetcher_service.rest.response_cache import (
+    ResponseCache,
+    encode_body,
+    etag_matches,
+    negotiate_encoding,
 )
 
+refresh_scheduler = RefreshScheduler(
+    weather_API_service=OpenWeatherAPIService, repository=get_repository
+)
+response_cache = ResponseCache()
+
+
+def read_json_body(body: bytes) -> dict:
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+async def estimate_upload_cost(request) -> int:
+    """
+    Number of cities held by an upload request, for admission control,
+    estimated from its `Content-Length` so the body is only read once
+    admitted. A request without one is counted as the whole budget.
+    """
+    content_length = request.headers.get("content-length", "")
+    if not content_length.isdigit():
+        return settings.ADMISSION_MAX_INFLIGHT_CITIES
+
+    return math.ceil(int(content_length) / AdmissionConstants.UPLOAD_BYTES_PER_CITY)
+
+
+async def estimate_process_cost(request) -> int:
+    """
+    Number of cities a process request will load, from the size recorded on
+    upload, so the process document is only read once admitted.
+    """
+    process_id = read_json_body(await request.body()).get("process_id")
+    if process_id is None:
+        return 0
+
+    size = await get_repository().fetch_json_data(
+        process_id, key=RepositoryConstants.SIZE_KEY
+    )
+    return (size or {}).get("total_cities", 0)
+
 
 async def upload_city_list_view(parameters):
     """
     Upload a list of city IDs for weather data processing.
 
     Args:
-        parameters (UploadParameter): The parameters containing process_id and list of city IDs.
+        parameters (UploadParameter): The parameters containing process_id, list of city IDs,
+            whether an existing process with the same ID may be overwritten and whether
+            fresh results of an identical city list may be reused.
 
     Returns:
         JSONResponse: A JSON response with the status and message.
@@ -34,7 +106,10 @@ async def upload_city_list_view(parameters):
     )
 
     process = UploadCityListProcesser(
-        process_data=process_data, repository=RedisRepository
+        process_data=process_data,
+        repository=get_repository,
+        overwrite=parameters.overwrite,
+        force_refresh=parameters.force_refresh,
     )
 
     response = await process.execute()
@@ -49,13 +124,50 @@ async def process_city_data_view(parameters):
     Process weather data for a list of cities in bulk.
 
     Args:
-        parameters (ProcessParameter): The parameters containing the process_id.
+        parameters (ProcessParameter): The parameters containing the process_id,
+            whether reused results should be refreshed and the tenant and weight
+            used to share the request quota.
+
+    Returns:
+        JSONResponse: A JSON response with the status and message.
+    """
+
+    request_datetime = datetime.now().strftime(ProcessConstants.DATETIME_FORMAT)
+    process_data = CityWeatherProcessData(
+        request_datetime=request_datetime,
+        process_id=parameters.process_id,
+    )
+
+    process = CityWeatherDataProcesser(
+        weather_API_service=OpenWeatherAPIService,
+        repository=get_repository,
+        process_data=process_data,
+        force_refresh=parameters.force_refresh,
+        weight=parameters.weight,
+        tenant=parameters.tenant,
+    )
+
+    response = await process.execute()
+
+    return JSONResponse(
+        status_code=response.status, content={"message": response.message}
+    )
+
+
+async def reprocess_failed_cities_view(parameters):
+    """
+    Fetch again only the cities whose last fetch failed for a process, adding
+    their results to the stored ones.
+
+    Args:
+        parameters (ReprocessParameter): The parameters containing the process_id
+            and the tenant and weight used to share the request quota.
 
     Returns:
         JSONResponse: A JSON response with the status and message.
     """
 
-    request_datetime = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    request_datetime = datetime.now().strftime(ProcessConstants.DATETIME_FORMAT)
     process_data = CityWeatherProcessData(
         request_datetime=request_datetime,
         process_id=parameters.process_id,
@@ -63,8 +175,11 @@ async def process_city_data_view(parameters):
 
     process = CityWeatherDataProcesser(
         weather_API_service=OpenWeatherAPIService,
-        repository=RedisRepository,
+        repository=get_repository,
         process_data=process_data,
+        weight=parameters.weight,
+        tenant=parameters.tenant,
+        failed_only=True,
     )
 
     response = await process.execute()
@@ -74,23 +189,306 @@ async def process_city_data_view(parameters):
     )
 
 
+async def get_city_outcomes_view(parameters):
+    """
+    Fetch the outcome of the last fetch of each city of a process.
+
+    Args:
+        parameters (dict): The parameters containing the process_id.
+
+    Returns:
+        JSONResponse: A JSON response with the outcomes or a message.
+    """
+    outcomes = await get_repository().fetch_json_data(
+        parameters.get("process_id"), key=RepositoryConstants.OUTCOMES_KEY
+    )
+    if not outcomes:
+        return JSONResponse(
+            status_code=404, content={"message": "No city outcomes found."}
+        )
+
+    return JSONResponse(status_code=200, content=outcomes)
+
+
 async def get_city_data_view(parameters):
     """
     Fetch the processed weather data for a specific process ID.
 
+    Responses carry an ETag derived from the process version, so a request
+    with a matching `If-None-Match` gets a 304 without reading the results.
+    Finished processes are served from the response cache, compressed as
+    negotiated through `Accept-Encoding`.
+
     Args:
-        parameters (dict): The parameters containing the process_id.
+        parameters (dict): The parameters containing the process_id and the
+            If-None-Match and Accept-Encoding request headers.
 
     Returns:
-        JSONResponse: A JSON response with the status and the data or message.
+        Response: A response with the status and the data or message.
     """
     process_data = CityWeatherProcessData(process_id=parameters.get("process_id"))
 
     process = CityWeatherDataFetcher(
-        repository=RedisRepository, process_data=process_data
+        repository=get_repository, process_data=process_data
+    )
+
+    etag, finished = await process.fetch_etag()
+    if etag_matches(parameters.get("if_none_match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    encoding = negotiate_encoding(parameters.get("accept_encoding"))
+    cached = response_cache.get(etag, encoding) if finished else None
+
+    if cached:
+        body, content_encoding = cached
+    else:
+        response = await process.execute()
+        if not response.data:
+            return JSONResponse(
+                status_code=response.status, content={"message": response.message}
+            )
+
+        body = json.dumps(response.data, separators=(",", ":")).encode()
+        content_encoding = (
+            encoding
+            if len(body) >= ResponseCacheConstants.MIN_COMPRESSED_BYTES
+            else None
+        )
+        body = encode_body(body, content_encoding)
+
+        if finished:
+            response_cache.put(etag, encoding, (body, content_encoding))
+
+    headers = {"ETag": etag, "Vary": "Accept-Encoding"} if etag else {}
+    if content_encoding:
+        headers["Content-Encoding"] = content_encoding
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def get_city_data_changes_view(parameters):
+    """
+    Fetch the cities whose weather data changed after a sequence number of a
+    process, one entry per city with its latest reading.
+
+    Args:
+        parameters (dict): The parameters containing the process_id, the
+            sequence number to read after, the maximum number of changes to
+            read and the minimum temperature and humidity changes to report.
+
+    Returns:
+        JSONResponse: A JSON response with the changes or a message.
+    """
+    process_data = CityWeatherProcessData(process_id=parameters.get("process_id"))
+
+    process = CityDataChangesFetcher(
+        repository=get_repository,
+        process_data=process_data,
+        since=parameters.get("since"),
+        limit=parameters.get("limit"),
+        min_temperature_change=parameters.get("min_temperature_change"),
+        min_humidity_change=parameters.get("min_humidity_change"),
     )
 
     response = await process.execute()
-    content = response.data if response.data else {"message": response.message}
+    if not response.data:
+        return JSONResponse(
+            status_code=response.status, content={"message": response.message}
+        )
+
+    return JSONResponse(status_code=response.status, content=response.data)
+
+
+def history_query(parameters: dict) -> dict:
+    """
+    Resolve the range and aggregation of a history query, defaulting to the
+    last `TimeSeriesConstants.DEFAULT_RANGE_IN_SECONDS` of raw samples.
+    """
+    end = parameters.get("end") or int(time.time())
+    start = parameters.get("start")
+    aggregation = parameters.get("aggregation")
+
+    return {
+        "start": (
+            end - TimeSeriesConstants.DEFAULT_RANGE_IN_SECONDS
+            if start is None
+            else start
+        ),
+        "end": end,
+        "aggregation": aggregation,
+        "bucket_seconds": parameters.get("bucket_seconds") if aggregation else 0,
+    }
 
-    return JSONResponse(status_code=response.status, content=content)
+
+async def get_city_history_view(parameters):
+    """
+    Fetch the stored temperature and humidity readings of a city, without
+    calling the weather API.
+
+    Args:
+        parameters (dict): The parameters containing the city_id, the start and
+            end of the range, and optionally the aggregation and bucket size.
+
+    Returns:
+        JSONResponse: A JSON response with the samples of each reading.
+    """
+    query = history_query(parameters)
+    history = await fetch_city_history(
+        get_repository(), parameters.get("city_id"), **query
+    )
+
+    return JSONResponse(
+        status_code=200,
+        content={"city_id": parameters.get("city_id"), **query, **history},
+    )
+
+
+async def get_process_history_view(parameters):
+    """
+    Fetch the stored temperature and humidity readings of a page of the
+    cities of a process, without calling the weather API.
+
+    Args:
+        parameters (dict): The parameters containing the process_id, the offset
+            and number of cities of the page, the start and end of the range,
+            and optionally the aggregation and bucket size.
+
+    Returns:
+        JSONResponse: A JSON response with the samples of each city or a message.
+    """
+    repository = get_repository()
+    stored_process_data = await repository.fetch_json_data(parameters.get("process_id"))
+    if not stored_process_data or not stored_process_data.get("cities_ids"):
+        return JSONResponse(status_code=404, content={"message": "No data found."})
+
+    cities_ids = stored_process_data.get("cities_ids")
+    offset = parameters.get("offset", 0)
+    limit = parameters.get("limit", TimeSeriesConstants.DEFAULT_PROCESS_HISTORY_CITIES)
+
+    query = history_query(parameters)
+    cities = {
+        str(city_id): await fetch_city_history(repository, city_id, **query)
+        for city_id in cities_ids[offset : offset + limit]
+    }
+
+    return JSONResponse(
+        status_code=200,
+        content={
+            "process_id": parameters.get("process_id"),
+            **query,
+            "offset": offset,
+            "next_offset": min(offset + limit, len(cities_ids)),
+            "total_cities": len(cities_ids),
+            "cities": cities,
+        },
+    )
+
+
+async def get_process_timeline_view(parameters):
+    """
+    Fetch the span timeline recorded during the last execution of a process.
+
+    Args:
+        parameters (dict): The parameters containing the process_id.
+
+    Returns:
+        JSONResponse: A JSON response with the timeline or a message.
+    """
+    timeline = await get_repository().fetch_json_data(
+        parameters.get("process_id"), key=RepositoryConstants.TIMELINE_KEY
+    )
+    if not timeline:
+        return JSONResponse(status_code=404, content={"message": "No timeline found."})
+
+    return JSONResponse(status_code=200, content=timeline)
+
+
+async def schedule_process_refresh_view(parameters):
+    """
+    Register a process to have its weather data refreshed periodically.
+
+    Args:
+        parameters (ScheduleParameter): The parameters containing the process_id, the
+            refresh interval and the priority.
+
+    Returns:
+        JSONResponse: A JSON response with the status and message.
+    """
+    if not await get_repository().fetch_json_data(parameters.process_id):
+        return JSONResponse(status_code=404, content={"message": "No data found."})
+
+    await refresh_scheduler.register(
+        ProcessRefreshJob(
+            process_id=parameters.process_id,
+            interval_seconds=parameters.interval_seconds,
+            priority=parameters.priority,
+            next_run_at=time.time(),
+        )
+    )
+
+    return JSONResponse(status_code=200, content={"message": "Refresh scheduled."})
+
+
+async def unschedule_process_refresh_view(parameters):
+    """
+    Stop refreshing a process periodically.
+
+    Args:
+        parameters (dict): The parameters containing the process_id.
+
+    Returns:
+        JSONResponse: A JSON response with the status and message.
+    """
+    if not await refresh_scheduler.unregister(parameters.get("process_id")):
+        return JSONResponse(
+            status_code=404, content={"message": "No scheduled refresh found."}
+        )
+
+    return JSONResponse(status_code=200, content={"message": "Refresh unscheduled."})
+
+
+async def get_scheduled_refreshes_view():
+    """
+    List the processes registered for periodic refresh.
+
+    Returns:
+        JSONResponse: A JSON response with the scheduled refresh jobs.
+    """
+    jobs = await refresh_scheduler.list_jobs()
+
+    return JSONResponse(
+        status_code=200, content={"jobs": [job.model_dump() for job in jobs]}
+    )
+
+
+async def get_admission_limits_view():
+    """
+    Report the admission control limits of the worker and their current use.
+
+    Returns:
+        JSONResponse: A JSON response with the limits.
+    """
+    return JSONResponse(
+        status_code=200,
+        content={
+            "enabled": settings.ADMISSION_CONTROL_ENABLED,
+            **get_admission_controller().snapshot(),
+        },
+    )
+
+
+async def get_hedging_metrics_view():
+    """
+    Report how many upstream requests of the worker were hedged, and how many
+    hedges answered first.
+
+    Returns:
+        JSONResponse: A JSON response with the metrics.
+    """
+    return JSONResponse(
+        status_code=200,
+        content={
+            "enabled": settings.HEDGING_ENABLED,
+            **get_request_hedger().snapshot(),
+        },
+    )
@@ -3,6 +3,13 @@ from abc import ABC, abstractmethod
 
 class BaseWeatherAPIService(ABC):
 
+    supports_box_queries = False
+    # IDs of the requested cities whose payload couldn't be used.
+    malformed_cities_ids = ()
+    # Rate limiter of the primary API key, set by the caller; hedges sent on
+    # that key take a token from it.
+    hedge_quota = None
+
     def __init__(self, log_identifier: str):
         self.log_identifier
         self.base_url
@@ -12,9 +19,8 @@ class BaseWeatherAPIService(ABC):
         self.cities_per_request
 
     @abstractmethod
-    def filter_relevant_data(self, response: dict):
+    async def fetch_data_in_bulk(self, id_list: str):
         raise NotImplementedError
 
-    @abstractmethod
-    async def fetch_data_in_bulk(self, id_list: str):
+    async def fetch_data_in_box(self, box):
         raise NotImplementedError
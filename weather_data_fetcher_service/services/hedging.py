@@ -0,0 +1,151 @@
+import asyncio
+import time
+from collections import deque
+from functools import lru_cache
+
+from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.rate_limiter import TokenBucket
+
+
+class LatencyTracker:
+    """
+    The latencies of the last `window` successful upstream requests.
+    """
+
+    def __init__(self, window: int):
+        self.samples = deque(maxlen=max(window, 1))
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, fraction: float) -> float:
+        ordered = sorted(self.samples)
+        return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class RequestHedger:
+    """
+    Send a duplicate of a request that is still pending after the observed
+    `percentile` latency, and keep whichever answers first. The other request
+    is cancelled.
+
+    Hedges are only sent once `min_samples` latencies are known and while
+    the `budget` token bucket has tokens, so they take a bounded share of the
+    upstream quota. Without a `budget` no hedge is sent. A hedge sent on the
+    same API key as the primary also takes a token from the `quota` given to
+    `run`, the rate limiter of that key.
+    """
+
+    def __init__(
+        self,
+        percentile: float,
+        min_samples: int,
+        latency_window: int,
+        budget: TokenBucket,
+    ):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.latencies = LatencyTracker(latency_window)
+        self.budget = budget
+        self.requests = 0
+        self.hedges_sent = 0
+        self.hedge_wins = 0
+        self.hedges_skipped = 0
+
+    def hedge_delay(self):
+        if self.budget is None:
+            return None
+        if len(self.latencies.samples) < max(self.min_samples, 1):
+            return None
+        return self.latencies.percentile(self.percentile)
+
+    async def timed(self, send):
+        started_at = time.monotonic()
+        result = await send()
+        if result is not False:
+            self.latencies.record(time.monotonic() - started_at)
+        return result
+
+    def try_acquire(self, quota: TokenBucket = None) -> bool:
+        if not self.budget.available() or (quota and not quota.available()):
+            return False
+
+        self.budget.try_acquire()
+        if quota:
+            quota.try_acquire()
+        return True
+
+    async def run(self, send, send_hedge, quota: TokenBucket = None):
+        """
+        Run `send`, hedged with `send_hedge` if it's slow. Both return False
+        when they fail, in which case the other request is awaited.
+        """
+        self.requests += 1
+        delay = self.hedge_delay()
+        started_at = time.monotonic()
+        primary = asyncio.ensure_future(self.timed(send))
+        tasks = [primary]
+
+        try:
+            if delay is None:
+                return await primary
+
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+
+            if not self.try_acquire(quota):
+                self.hedges_skipped += 1
+                return await primary
+
+            self.hedges_sent += 1
+            hedge = asyncio.ensure_future(self.timed(send_hedge))
+            tasks.append(hedge)
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in tasks:
+                    if task in done and task.result() is not False:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        if not primary.done():
+                            # The primary is cancelled, keep its wait so far
+                            # so slow requests still weigh on the percentile.
+                            self.latencies.record(time.monotonic() - started_at)
+                        return task.result()
+
+            return False
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def snapshot(self) -> dict:
+        return {
+            "requests": self.requests,
+            "hedges_sent": self.hedges_sent,
+            "hedge_wins": self.hedge_wins,
+            "hedges_skipped": self.hedges_skipped,
+            "latency_samples": len(self.latencies.samples),
+            "hedge_after_seconds": self.hedge_delay(),
+        }
+
+
+@lru_cache(maxsize=None)
+def get_request_hedger() -> RequestHedger:
+    """
+    Return the worker's request hedger, shared by every process so latencies
+    and the hedge budget are tracked for the worker as a whole.
+    """
+    return RequestHedger(
+        percentile=settings.HEDGING_PERCENTILE,
+        min_samples=settings.HEDGING_MIN_SAMPLES,
+        latency_window=settings.HEDGING_LATENCY_WINDOW,
+        budget=(
+            TokenBucket(settings.HEDGING_REQUESTS_PER_MINUTE)
+            if settings.HEDGING_REQUESTS_PER_MINUTE > 0
+            else None
+        ),
+    )
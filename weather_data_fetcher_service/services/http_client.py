@@ -0,0 +1,34 @@
+import asyncio
+
+from weather_data_fetcher_service.core.constants import HedgingConstants
+
+_sessions = {}
+
+
+def get_client_session(name: str = HedgingConstants.PRIMARY_SESSION):
+    """
+    Return the worker's shared aiohttp session, so every upstream request
+    reuses its connection pool instead of opening a new one. Hedged requests
+    use their own named session, so they don't queue behind the requests
+    they duplicate.
+
+    aiohttp is imported on first use, keeping it off the worker's startup
+    path, and a new session is created if the event loop changed.
+    """
+    loop = asyncio.get_running_loop()
+    session, session_loop = _sessions.get(name, (None, None))
+    if session is None or session.closed or session_loop is not loop:
+        import aiohttp
+
+        session = aiohttp.ClientSession()
+        _sessions[name] = (session, loop)
+
+    return session
+
+
+async def close_client_session():
+    for session, _ in list(_sessions.values()):
+        if not session.closed:
+            await session.close()
+
+    _sessions.clear()
@@ -1,82 +1,176 @@
-import aiohttp
+import asyncio
 import traceback
 from typing import List
 
 from weather_data_fetcher_service.services.base_weather_api_service import (
     BaseWeatherAPIService,
 )
-from weather_data_fetcher_service.core.constants import WeatherAPIConstants
+from weather_data_fetcher_service.core.constants import (
+    HedgingConstants,
+    WeatherAPIConstants,
+)
+from weather_data_fetcher_service.core.geo_index import BoundingBox
 from weather_data_fetcher_service.core import settings
 from weather_data_fetcher_service.core.logger import logger
+from weather_data_fetcher_service.services.hedging import get_request_hedger
+from weather_data_fetcher_service.services.http_client import get_client_session
+from weather_data_fetcher_service.services.response_parsing import (
+    get_parse_executor,
+    parse_group_response,
+    project_city_list,
+)
 
 
 class OpenWeatherAPIService(BaseWeatherAPIService):
 
+    supports_box_queries = True
+
     def __init__(self, log_identifier: str):
         self.log_identifier = log_identifier
         self.base_url = settings.OPEN_WEATHER_BASE_URL
         self.api_key = settings.OPEN_WEATHER_API_KEY
 
         self.group_endpoint = "/group"
+        self.box_endpoint = "/box/city"
         self.cities_per_minute = WeatherAPIConstants.OPEN_WEATHER_CITIES_PER_MINUTE
         self.cities_per_request = WeatherAPIConstants.OPEN_WEATHER_CITIES_PER_REQUEST
+        self.malformed_cities_ids = []
 
     def format_city_id_list(self, city_ids: List[str]):
         try:
             return ",".join(city_ids)
         except TypeError:
             logger.error(
-                f"{self.log_identifier} - city_ids list must be string: {city_ids}"
+                "%s - city_ids list must be string: %s", self.log_identifier, city_ids
             )
             raise TypeError
 
-    def filter_relevant_data(self, response: dict):
-        try:
-            return {
-                "city_id": response["id"],
-                "temperature": response["main"]["temp"],
-                "humidity": response["main"]["humidity"],
-            }
-        except KeyError:
-            logger.error(
-                f"{self.log_identifier} - Incorrect fields provided in response: {response}"
+    def keep_well_formed(self, parsed: tuple) -> list:
+        """
+        Record the cities whose payload lacks a relevant field instead of
+        failing their whole batch, and return the other cities.
+        """
+        results, malformed_cities_ids = parsed
+        if malformed_cities_ids:
+            logger.warning(
+                "%s - Incorrect fields provided for cities: %s",
+                self.log_identifier,
+                malformed_cities_ids,
+            )
+            self.malformed_cities_ids.extend(malformed_cities_ids)
+
+        return results
+
+    async def parse_in_executor(self, parse_executor, body: bytes):
+        """
+        Parse a raw response in the parse executor, keeping the event loop free
+        for other requests. Small bodies aren't worth the hand-off and are
+        parsed inline.
+        """
+        if len(body) < settings.PARSE_EXECUTOR_MIN_BYTES:
+            return self.keep_well_formed(parse_group_response(body))
+
+        return self.keep_well_formed(
+            await asyncio.get_running_loop().run_in_executor(
+                parse_executor, parse_group_response, body
             )
-            raise KeyError
+        )
+
+    def group_url(self, city_ids: List[str], api_key: str = None) -> str:
+        temp_unit = WeatherAPIConstants.OPEN_WEATHER_METRIC_TEMP_UNITS
+        formatted_city_ids = self.format_city_id_list(city_ids)
+
+        return (
+            f"{self.base_url}{self.group_endpoint}"
+            f"?id={formatted_city_ids}&appid={api_key or self.api_key}"
+            f"&units={temp_unit}"
+        )
+
+    def box_url(self, box: BoundingBox, api_key: str = None) -> str:
+        temp_unit = WeatherAPIConstants.OPEN_WEATHER_METRIC_TEMP_UNITS
+        bbox = (
+            f"{box.lon_left},{box.lat_bottom},{box.lon_right},{box.lat_top},"
+            f"{settings.GEO_BOX_ZOOM}"
+        )
+
+        return (
+            f"{self.base_url}{self.box_endpoint}"
+            f"?bbox={bbox}&appid={api_key or self.api_key}&units={temp_unit}"
+        )
 
     async def fetch_data_in_bulk(self, city_ids: List[str]):
+        return await self.fetch_city_list(
+            lambda api_key=None: self.group_url(city_ids, api_key), len(city_ids)
+        )
+
+    async def fetch_data_in_box(self, box: BoundingBox):
+        """
+        Fetch every city the provider knows in a bounding box in one request.
+        The caller keeps the cities it asked for.
+        """
+        return await self.fetch_city_list(
+            lambda api_key=None: self.box_url(box, api_key), len(box)
+        )
+
+    async def fetch_city_list(self, build_url, batch_size: int):
+        """
+        Request a city list. With hedging enabled, a slow request is
+        duplicated through the hedge session, using `HEDGING_API_KEY` if set.
+        """
+        if not settings.HEDGING_ENABLED:
+            return await self.request_city_list(build_url, batch_size)
+
+        return await get_request_hedger().run(
+            lambda: self.request_city_list(build_url, batch_size),
+            lambda: self.request_city_list(
+                lambda: build_url(settings.HEDGING_API_KEY),
+                batch_size,
+                HedgingConstants.HEDGE_SESSION,
+            ),
+            quota=self.hedge_quota,
+        )
+
+    async def request_city_list(
+        self,
+        build_url,
+        batch_size: int,
+        session_name: str = HedgingConstants.PRIMARY_SESSION,
+    ):
         try:
 
-            temp_unit = WeatherAPIConstants.OPEN_WEATHER_METRIC_TEMP_UNITS
-            formatted_city_ids = self.format_city_id_list(city_ids)
+            full_url = build_url()
 
-            full_url = (
-                f"{self.base_url}{self.group_endpoint}"
-                f"?id={formatted_city_ids}&appid={self.api_key}&units={temp_unit}"
-            )
-
-            async with aiohttp.ClientSession() as session:
-                async with session.get(full_url) as response:
+            session = get_client_session(session_name)
+            async with session.get(full_url) as response:
 
-                    if not response.status == 200:
-                        logger.error(
-                            f"{self.log_identifier} - request wasn't sucessful. "
-                            f"Status code: {response.status} "
-                            f"Message: {response.message}"
-                        )
-                        return False
+                if not response.status == 200:
+                    logger.error(
+                        "%s - request wasn't sucessful. Status code: %s Message: %s",
+                        self.log_identifier,
+                        response.status,
+                        response.message,
+                        status=response.status,
+                        batch_size=batch_size,
+                    )
+                    return False
 
+                parse_executor = get_parse_executor()
+                if parse_executor is None:
                     data = await response.json()
 
-                    return [
-                        self.filter_relevant_data(city_data)
-                        for city_data in data["list"]
-                    ]
+                    return self.keep_well_formed(project_city_list(data["list"]))
+
+                return await self.parse_in_executor(
+                    parse_executor, await response.read()
+                )
 
         except TimeoutError as e:
-            logger.error(f"{self.log_identifier} - Timeout error occurred: {e}")
+            logger.error("%s - Timeout error occurred: %s", self.log_identifier, e)
             return False
 
         except Exception as e:
-            logger.error(f"{self.log_identifier} - An error occurred: {e}")
-            logger.error(f"{self.log_identifier} - Traceback: {traceback.format_exc()}")
+            logger.error("%s - An error occurred: %s", self.log_identifier, e)
+            logger.error(
+                "%s - Traceback: %s", self.log_identifier, traceback.format_exc()
+            )
             return False
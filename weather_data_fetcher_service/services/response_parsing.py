@@ -0,0 +1,89 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+
+from weather_data_fetcher_service.core import settings
+from weather_data_fetcher_service.core.constants import WeatherAPIConstants
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(body: bytes):
+    """
+    Decode a JSON body with orjson when it is installed, falling back to the
+    standard library.
+    """
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def project_city_data(city_data: dict) -> dict:
+    return {
+        "city_id": city_data["id"],
+        "temperature": city_data["main"]["temp"],
+        "humidity": city_data["main"]["humidity"],
+    }
+
+
+def project_city_list(cities: list):
+    """
+    Keep only the relevant fields of each city of a response.
+
+    Returns:
+        tuple: The projected cities, and the IDs of the cities whose payload
+        lacks a relevant field.
+    """
+    results = []
+    malformed_cities_ids = []
+    for city_data in cities:
+        try:
+            results.append(project_city_data(city_data))
+        except (KeyError, TypeError):
+            if isinstance(city_data, dict) and city_data.get("id") is not None:
+                malformed_cities_ids.append(city_data["id"])
+
+    return results, malformed_cities_ids
+
+
+def parse_group_response(body: bytes):
+    """
+    Decode a raw `/group` response and project its cities as
+    `project_city_list` does. Top level so a process pool can pickle it.
+    """
+    return project_city_list(loads(body)["list"])
+
+
+@lru_cache(maxsize=None)
+def get_parse_executor():
+    """
+    Return the worker's executor for parsing upstream responses off the event
+    loop, as selected by `settings.PARSE_EXECUTOR`, or None to parse inline.
+    """
+    executor = settings.PARSE_EXECUTOR.lower()
+    max_workers = settings.PARSE_EXECUTOR_WORKERS or min(os.cpu_count() or 1, 4)
+
+    if executor == WeatherAPIConstants.THREAD_PARSE_EXECUTOR:
+        return ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="response-parser"
+        )
+
+    if executor == WeatherAPIConstants.PROCESS_PARSE_EXECUTOR:
+        return ProcessPoolExecutor(max_workers=max_workers)
+
+    if executor == WeatherAPIConstants.INLINE_PARSE_EXECUTOR:
+        return None
+
+    raise ValueError(f"Unknown parse executor: {settings.PARSE_EXECUTOR}")
+
+
+def shutdown_parse_executor():
+    if get_parse_executor.cache_info().currsize:
+        executor = get_parse_executor()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    get_parse_executor.cache_clear()